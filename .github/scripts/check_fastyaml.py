@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Fast YAML Check - Compares the annotation fast path with yaml.safe_load.
+
+Wherever fastyaml.parse_block accepts a document (rather than leaving it
+to the libyaml fallback) it must return exactly what yaml.safe_load does,
+and safe_load must not reject it. Covers the cases below, every character
+of SWEEP inside a plain scalar and every annotation in sequences/.
+"""
+import sys
+
+import yaml
+
+from pulseprograms import fastyaml
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import extract_annotation
+
+CASES = [
+    'a: x\u2028y',  # line separator, a line break to YAML
+    'a: x\x85y',    # next line (NEL)
+    'a: x\u2029',   # paragraph separator
+    'a: \ufffe',    # not a YAML character
+    'a: \x7f',
+    'a: x\ty',
+    'a: x\ufeffy',
+    'a: \xa0x',
+    'a: [x y, z]',
+    'a: |\n  x\u2028y\n',
+    'a: "x\u2028y"',
+    'a: 1\nb: [1, 2.5, x]\nc: {d: e}\n',
+]
+# Characters placed at the start, middle and end of a plain scalar
+SWEEP = [chr(c) for c in range(0x3000) if c != 0x0a] + ['\ufeff', '\ufffd', '\ufffe', '\uffff']
+
+
+def check(text: str) -> bool:
+    try:
+        fast = fastyaml.parse_block(text.split('\n'))
+    except fastyaml.Unsupported:
+        return True  # parsed by libyaml instead
+    try:
+        full = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        print(f"✗ {text!r}: accepted here, yaml.safe_load raises {type(e).__name__}")
+        return False
+    if fast != full:
+        print(f"✗ {text!r}: {fast!r} here, {full!r} from yaml.safe_load")
+        return False
+    return True
+
+
+def main() -> bool:
+    texts = list(CASES)
+    texts += [t for c in SWEEP for t in (f'a: {c}x', f'a: x{c}y', f'a: x{c}')]
+    for file_path in Corpus().sequence_files():
+        lines = [text for _, _, text in extract_annotation(file_path.read_text(encoding='utf-8'))]
+        if lines:
+            texts.append('\n'.join(lines))
+    failed = sum(not check(text) for text in texts)
+    if failed:
+        print(f"✗ {failed} of {len(texts)} documents differ from yaml.safe_load")
+        return False
+    print(f"✓ {len(texts)} documents parse as yaml.safe_load parses them")
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Phase Cycle Check - Expands phase programs that span several lines.
+
+sequences/19f_r2pe_bb.cw defines ph4 over two lines of 16 steps; it must
+expand to 32 steps, not stop at the end of the first line. Run from the
+repository root (requires numpy, ``pip install -e .[analysis]``).
+"""
+import sys
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.phases import PhaseCycle
+
+# sequence -> {phase program: steps}
+EXPECTED = {
+    '19f_r2pe_bb.cw': {'ph4': 32},
+}
+
+
+def main() -> bool:
+    corpus = Corpus()
+    ok = True
+    for name, expected in EXPECTED.items():
+        cycle = PhaseCycle.scan(corpus.source(corpus.sequences_dir / name))
+        for program, steps in expected.items():
+            found = len(cycle.programs[program][0]) if program in cycle.programs else 0
+            if found == steps:
+                print(f"✓ {name} {program}: {found} steps")
+            else:
+                print(f"✗ {name} {program}: {found} steps, expected {steps}")
+                ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
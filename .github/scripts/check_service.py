@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Catalog Service Check - Smoke test and keep-alive load test of ``pulseprograms serve``.
+
+Copies sequences/ and schemas/ into a throwaway git repository, serves it
+in-process on a free port and checks lookups, search, facets, ETag
+revalidation (304), bad queries (400), unsupported methods (405), unknown
+paths (404) and reloading after a new commit. Then runs --clients
+keep-alive connections of --requests requests each and reports requests
+per second. Run from the repository root.
+"""
+import argparse
+import asyncio
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pulseprograms.service import Service
+
+# Request targets of the load test, cycled through by every client
+LOAD_TARGETS = ['/', '/sequences', '/search?q=r1', '/facets?experiment_type=relaxation']
+
+
+def git(root: Path, *args: str):
+    subprocess.run(['git', '-c', 'user.name=check', '-c', 'user.email=check@localhost', *args],
+                   cwd=root, check=True, capture_output=True)
+
+
+def fixture(root: Path):
+    """A repository holding a copy of this one's sequences and schemas."""
+    for name in ('sequences', 'schemas'):
+        shutil.copytree(name, root / name)
+    if Path('VOCABULARY.md').exists():
+        shutil.copy('VOCABULARY.md', root / 'VOCABULARY.md')
+    git(root, 'init', '-q')
+    git(root, 'add', '.')
+    git(root, 'commit', '-q', '-m', 'fixture')
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port: int) -> 'Client':
+        return cls(*await asyncio.open_connection('127.0.0.1', port))
+
+    async def request(self, target: str, method: str = 'GET',
+                      headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        lines = [f"{method} {target} HTTP/1.1", "Host: localhost"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        self.writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        received = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            received[name.strip().lower()] = value.strip()
+        length = int(received.get('content-length', 0))
+        body = b'' if method == 'HEAD' or status == 304 else await self.reader.readexactly(length)
+        return status, received, body
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def smoke(service: Service, root: Path, port: int) -> List[str]:
+    """Failed checks, as messages."""
+    failures = []
+
+    def check(ok: bool, message: str):
+        print(f"{'✓' if ok else '✗'} {message}")
+        if not ok:
+            failures.append(message)
+
+    client = await Client.connect(port)
+    status, headers, body = await client.request('/')
+    summary = json.loads(body)
+    check(status == 200 and summary['sequences'] > 0, f"/ lists {summary.get('sequences')} sequences")
+    etag = headers.get('etag')
+    status, _, body = await client.request('/', headers={'If-None-Match': etag})
+    check(status == 304 and not body, f"/ with its ETag is 304 Not Modified ({status})")
+    status, _, body = await client.request('/', 'HEAD')
+    check(status == 200 and not body, "HEAD / has no body")
+
+    status, _, body = await client.request('/sequences')
+    names = [s['name'] for s in json.loads(body)['sequences']]
+    check(status == 200 and len(names) == summary['sequences'], f"/sequences has {len(names)} entries")
+    name = names[0]
+    status, _, body = await client.request(f'/sequences/{name}')
+    check(status == 200 and json.loads(body)['name'] == name, f"/sequences/{name} is its record")
+    status, headers, body = await client.request(f'/sequences/{name}/source')
+    check(status == 200 and headers['content-type'].startswith('text/plain')
+          and body == (root / 'sequences' / name).read_bytes(), f"/sequences/{name}/source is the file")
+
+    status, _, body = await client.request('/search?q=r1')
+    results = json.loads(body)['results']
+    check(status == 200 and results and all(r['score'] > 0 for r in results),
+          f"/search?q=r1 finds {len(results)} sequences")
+    status, _, body = await client.request('/search?q=r1&limit=1')
+    check(status == 200 and len(json.loads(body)['results']) == 1, "/search limit=1 returns one result")
+    status, _, body = await client.request('/facets')
+    facets = json.loads(body)['facets']
+    check(status == 200 and facets.get('experiment_type'), f"/facets counts {len(facets)} facets")
+    value = next(iter(facets['experiment_type']))
+    status, _, body = await client.request(f'/facets?experiment_type={value}')
+    count = json.loads(body)['count']
+    check(status == 200 and count == facets['experiment_type'][value],
+          f"/facets?experiment_type={value} narrows to {count} sequences")
+
+    status, _, _ = await client.request('/search?q=r1&limit=abc')
+    check(status == 400, f"/search?limit=abc is 400 Bad Request ({status})")
+    status, _, _ = await client.request('/', 'POST', {'Content-Length': '0'})
+    check(status == 405, f"POST / is 405 Method Not Allowed ({status})")
+    status, _, _ = await client.request('/no-such-thing')
+    check(status == 404, f"/no-such-thing is 404 Not Found ({status})")
+
+    shutil.copy(root / 'sequences' / name, root / 'sequences' / f'copy_{name}')
+    git(root, 'add', '.')
+    git(root, 'commit', '-q', '-m', 'add a copy')
+    reloaded = await service.reload()
+    status, headers, body = await client.request('/', headers={'If-None-Match': etag})
+    check(reloaded and status == 200 and json.loads(body)['sequences'] == summary['sequences'] + 1,
+          "reload picks up a new commit; / changes and its old ETag no longer matches")
+    status, _, _ = await client.request(f'/sequences/copy_{name}')
+    check(status == 200, f"/sequences/copy_{name} is served after reload")
+    check(not await service.reload(), "reload without a new commit keeps the catalog")
+    await client.close()
+    return failures
+
+
+async def load(port: int, clients: int, requests: int) -> float:
+    """Requests per second over ``clients`` concurrent keep-alive connections."""
+    async def run(client: Client):
+        for i in range(requests):
+            status, _, _ = await client.request(LOAD_TARGETS[i % len(LOAD_TARGETS)])
+            assert status == 200, status
+
+    connections = [await Client.connect(port) for _ in range(clients)]
+    start = time.perf_counter()
+    await asyncio.gather(*(run(c) for c in connections))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(c.close() for c in connections))
+    return clients * requests / elapsed
+
+
+async def main(clients: int, requests: int) -> bool:
+    with tempfile.TemporaryDirectory() as directory:
+        root = Path(directory)
+        fixture(root)
+        service = Service(directory)
+        server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            failures = await smoke(service, root, port)
+            if clients and requests:
+                rate = await load(port, clients, requests)
+                print(f"✓ {clients} keep-alive clients x {requests} requests: {rate:,.0f} requests/s")
+            await asyncio.sleep(0.1)  # let the server see every connection close
+    if failures:
+        print(f"✗ {len(failures)} checks failed")
+    return not failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--clients', type=int, default=16, help="concurrent connections (0 skips the load test)")
+    parser.add_argument('--requests', type=int, default=500, help="requests per connection")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(main(args.clients, args.requests)) else 1)
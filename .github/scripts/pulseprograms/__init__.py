@@ -0,0 +1,8 @@
+"""
+Tooling for the NMR pulse sequence repository.
+
+Heavy dependencies (yaml, jsonschema) are imported by the task modules only,
+so importing this package and running ``pulseprograms --help`` stays cheap.
+"""
+
+__version__ = "0.1.0"
@@ -0,0 +1,294 @@
+"""
+Batch experiment setup - list files and parameter macros for a sample queue.
+
+A queue file (YAML) names, for each sample, a dataset, an experiment number,
+a sequence and the values to acquire with:
+
+    defaults:                       # every sample's 'set' starts from these
+      d1: 2
+    samples:
+      - dataset: lysozyme_19f
+        expno: 10
+        sequence: 19f_cest.cw
+        set:
+          cest.offset: -5000:5000:41  # start:stop:count, Hz
+          cnst25: 25
+      - dataset: lysozyme_19f
+        expno: 11
+        sequence: 19f_r1.cw
+        set:
+          relaxation.duration: {start: 0.01, stop: 2, count: 10, spacing: log}
+
+Names are experiment block paths ('cest.offset' is F19sat in 19f_cest.cw)
+or program parameters. A name that is a 'define list<...> x = <$VDLIST>'
+variable becomes that list file (vdlist, vclist, vplist, valist, fq1list,
+...); every other name is a single value written to the experiment's
+setup.mac TopSpin macro, together with 'pulprog' and, for an experiment with
+one list dimension, its TD in F1. Values use the units of the parameter in
+TopSpin: seconds for delays, microseconds for pulses, watts for power
+levels, Hz for frequency offsets; delays and pulses may also be written
+with a TopSpin time suffix ('200m', '10u', '2s').
+
+Sweeps of the whole queue are evaluated together, one NumPy operation per
+spacing and length. Each distinct list is formatted once and reused by every
+sample that asks for it. Files whose content is already on disk are left
+untouched, so re-running a queue only rewrites what changed.
+
+Requires numpy (``pip install -e .[analysis]``).
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import load_yaml
+from pulseprograms.safety import SafetyError, parse_value, parse_values, unit, value_name
+
+DEFAULT_OUTPUT = "experiments"
+MACRO = 'setup.mac'
+SPACINGS = ('linear', 'log')
+
+_LIST_FILE = re.compile(r'^\s*define\s+list\s*<\s*(\w+)\s*>\s+([A-Za-z_]\w*)\s*=\s*<\$(\w+)>', re.MULTILINE)
+
+# A list of values: ('values', (v, ...)) or a sweep: (spacing, start, stop, count)
+Spec = Tuple[Any, ...]
+
+
+class SetupError(Exception):
+    pass
+
+
+def list_files(content: str) -> Dict[str, Tuple[str, str]]:
+    """List variables read from files: name -> (type, file name), e.g. t1delay -> ('delay', 'vdlist')."""
+    return {name: (kind, macro.lower()) for kind, name, macro in _LIST_FILE.findall(content)}
+
+
+def spec(value: Any, target: str = '') -> Spec:
+    """
+    Normalise a queue value: a number, a list, 'start:stop:count' or {start, stop, count, spacing}.
+
+    Numbers are in the unit ``target`` of the parameter they set (see
+    safety.unit); TopSpin time suffixes such as '200m' or '10u' are converted.
+    """
+    def number(v: Any) -> float:
+        return parse_value(str(v), target)
+
+    try:
+        if isinstance(value, dict):
+            unknown = set(value) - {'start', 'stop', 'count', 'spacing'}
+            if unknown or not {'start', 'stop', 'count'} <= set(value):
+                raise SetupError(f"a sweep needs start, stop and count (and optionally spacing), not {value!r}")
+            spacing = value.get('spacing', 'linear')
+            if spacing not in SPACINGS:
+                raise SetupError(f"spacing must be one of {', '.join(SPACINGS)}, not {spacing!r}")
+            start, stop = number(value['start']), number(value['stop'])
+            if spacing == 'log' and start * stop <= 0:
+                raise SetupError(f"a log sweep cannot cross zero ({value['start']} to {value['stop']})")
+            return spacing, start, stop, int(value['count'])
+        if isinstance(value, str) and value.count(':') == 2:
+            start, stop, count = value.split(':')
+            return 'linear', number(start), number(stop), int(count)
+        if isinstance(value, list):
+            return 'values', tuple(number(v) for v in value)
+        return 'values', tuple(parse_values(str(value), target))
+    except (SafetyError, ValueError) as e:
+        raise SetupError(f"not a number, list or sweep: {value!r} ({e})") from None
+
+
+def evaluate(specs: List[Spec]) -> Dict[Spec, np.ndarray]:
+    """Values of every spec; sweeps sharing a spacing and length are computed in one operation."""
+    values = {s: np.asarray(s[1], dtype=float) for s in specs if s[0] == 'values'}
+    groups: Dict[Tuple[str, int], List[Spec]] = {}
+    for s in dict.fromkeys(specs):
+        if s[0] != 'values':
+            groups.setdefault((s[0], s[3]), []).append(s)
+    for (spacing, count), members in groups.items():
+        start = np.array([s[1] for s in members])[:, None]
+        stop = np.array([s[2] for s in members])[:, None]
+        steps = np.linspace(0.0, 1.0, count)[None, :]
+        if spacing == 'log':
+            rows = start * (stop / start) ** steps
+        else:
+            rows = start + (stop - start) * steps
+        values.update(zip(members, rows))
+    return values
+
+
+def format_list(kind: str, values: np.ndarray) -> str:
+    """Text of a TopSpin list file of the given 'define list<kind>' type."""
+    if kind == 'loopcounter':
+        counts = np.rint(values).astype(int)
+        if (counts != values).any() or (counts < 0).any():
+            raise SetupError(f"loop counters must be whole numbers >= 0, not {values.tolist()}")
+        return ''.join(f'{n}\n' for n in counts)
+    if kind == 'pulse':
+        return ''.join(f'{v:.9g}u\n' for v in values)
+    header = {'frequency': 'sfo hz\n', 'power': 'Watt\n'}.get(kind, '')
+    return header + ''.join(f'{v:.9g}\n' for v in values)
+
+
+class Experiment:
+    """One queue entry, resolved against its sequence: list files and single parameters."""
+
+    def __init__(self, dataset: str, expno: int, sequence: str):
+        self.dataset = dataset
+        self.expno = expno
+        self.sequence = sequence
+        self.lists: Dict[str, Tuple[str, Spec]] = {}  # file name -> (list type, spec)
+        self.parameters: Dict[str, float] = {}
+        self.dimension: Optional[str] = None  # list file of the one indirect dimension
+
+    @property
+    def path(self) -> Path:
+        return Path(self.dataset) / str(self.expno)
+
+    def __repr__(self):
+        return f"Experiment({self.path}, {self.sequence}, lists={self.lists}, parameters={self.parameters})"
+
+
+def resolve(corpus: Corpus, entry: Dict[str, Any], defaults: Dict[str, Any]) -> Experiment:
+    """Map one queue entry's names to its sequence's list files and parameters."""
+    for field in ('dataset', 'expno', 'sequence'):
+        if field not in entry:
+            raise SetupError(f"missing '{field}'")
+    file_path = corpus.sequences_dir / entry['sequence']
+    if not file_path.is_file():
+        raise SetupError(f"no sequence {entry['sequence']}")
+    content = corpus.source(file_path)
+    metadata = corpus.metadata(file_path) or {}
+    lists = list_files(content)
+
+    def name(key: str) -> Optional[str]:
+        block, _, field = key.partition('.')
+        if not field:
+            return key
+        if not isinstance(metadata.get(block), dict) or field not in metadata[block]:
+            return None
+        target = metadata[block][field]
+        if not isinstance(target, str):
+            raise SetupError(f"{key} is not a single parameter in {entry['sequence']} ({target!r}); "
+                             f"set its parameters instead")
+        return target
+
+    experiment = Experiment(str(entry['dataset']), int(entry['expno']), entry['sequence'])
+    settings = entry.get('set') or {}
+    for key, value in {**defaults, **settings}.items():
+        target = name(str(key))
+        if target is None:
+            if key in settings:
+                raise SetupError(f"{entry['sequence']} has no {key}")
+            continue  # a default for another kind of experiment
+        values = spec(value, unit(target, {name: kind for name, (kind, _) in lists.items()}))
+        if target in lists:
+            kind, list_file = lists[target]
+            experiment.lists[list_file] = (kind, values)
+        elif values[0] == 'values' and len(values[1]) == 1:
+            experiment.parameters[value_name(target)] = values[1][0]
+        else:
+            raise SetupError(f"{key} is not a list in {entry['sequence']}; give a single value")
+
+    # The list swept along each indirect dimension; a counter*scale duration is swept by its counter
+    dimensions = []
+    for path in metadata.get('dimensions') or []:
+        block, _, field = str(path).partition('.')
+        target = metadata[block].get(field) if field and isinstance(metadata.get(block), dict) else path
+        dimensions.append(target.get('counter') if isinstance(target, dict) else target)
+    # TD in F1 is only the list length when the sequence sweeps a single list (not e.g. durations x powers)
+    indirect = [lists[d][1] for d in dimensions if d in lists]
+    if len(indirect) == 1 and indirect[0] in experiment.lists:
+        experiment.dimension = indirect[0]
+    return experiment
+
+
+def _write(path: Path, text: str) -> bool:
+    """Write ``text`` unless the file already holds it; returns True if written."""
+    try:
+        if path.read_text(encoding='utf-8') == text:
+            return False
+    except OSError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+    return True
+
+
+class Queue:
+    """A queue file resolved against the corpus."""
+
+    def __init__(self, experiments: List[Experiment], missing: Dict[Path, List[str]]):
+        self.experiments = experiments
+        self.missing = missing  # experiment path -> list files its sequence reads but the queue leaves unset
+
+    @classmethod
+    def load(cls, corpus: Corpus, path: str) -> 'Queue':
+        with open(path, 'r', encoding='utf-8') as f:
+            data = load_yaml(f.read()) or {}
+        if not isinstance(data, dict) or not isinstance(data.get('samples'), list):
+            raise SetupError(f"{path} has no 'samples' list")
+        experiments, missing = [], {}
+        seen: Dict[Path, int] = {}
+        for number, entry in enumerate(data['samples'], 1):
+            try:
+                experiment = resolve(corpus, entry, data.get('defaults') or {})
+            except (SetupError, TypeError, ValueError) as e:
+                raise SetupError(f"sample {number}: {e}") from None
+            if experiment.path in seen:
+                raise SetupError(f"sample {number}: {experiment.path} is already used by sample "
+                                 f"{seen[experiment.path]}")
+            seen[experiment.path] = number
+            experiments.append(experiment)
+            source = corpus.source(corpus.sequences_dir / experiment.sequence)
+            unset = sorted({f for _, f in list_files(source).values()} - set(experiment.lists))
+            if unset:
+                missing[experiment.path] = unset
+        return cls(experiments, missing)
+
+    def write(self, output: str) -> Tuple[int, int, int]:
+        """Write every experiment below ``output``; returns (files written, unchanged, distinct lists)."""
+        values = evaluate([s for e in self.experiments for _, s in e.lists.values()])
+        texts: Dict[Tuple[str, Spec], str] = {}
+        written = unchanged = 0
+        for experiment in self.experiments:
+            directory = Path(output) / experiment.path
+            for list_file, (kind, s) in sorted(experiment.lists.items()):
+                if (kind, s) not in texts:
+                    texts[kind, s] = format_list(kind, values[s])
+                if _write(directory / list_file, texts[kind, s]):
+                    written += 1
+                else:
+                    unchanged += 1
+            if _write(directory / MACRO, self.macro(experiment, values)):
+                written += 1
+            else:
+                unchanged += 1
+        return written, unchanged, len(texts)
+
+    @staticmethod
+    def macro(experiment: Experiment, values: Dict[Spec, np.ndarray]) -> str:
+        lines = [f"# {experiment.path.as_posix()}: {experiment.sequence} (written by pulseprograms setup)",
+                 f"pulprog {experiment.sequence}"]
+        lines += [f"{name} {value:.9g}" for name, value in sorted(experiment.parameters.items())]
+        if experiment.dimension is not None:
+            lines.append(f"1 td {len(values[experiment.lists[experiment.dimension][1]])}")
+        return '\n'.join(lines) + '\n'
+
+
+def main(corpus: Optional[Corpus] = None, queue: Optional[str] = None, output: str = DEFAULT_OUTPUT) -> bool:
+    """Write the list files and setup macros of every sample in ``queue``."""
+    corpus = corpus or Corpus()
+    if not queue:
+        print("✗ setup needs a queue file (--queue PATH)")
+        return False
+    try:
+        loaded = Queue.load(corpus, queue)
+        written, unchanged, distinct = loaded.write(output)
+    except (OSError, SetupError) as e:
+        print(f"✗ {queue}: {e}")
+        return False
+    for path, unset in loaded.missing.items():
+        print(f"⚠️  {path.as_posix()} - {', '.join(unset)} not set by the queue")
+    print(f"✓ Set up {len(loaded.experiments)} experiments in {output}: {written} files written, "
+          f"{unchanged} unchanged, {distinct} distinct lists")
+    return True
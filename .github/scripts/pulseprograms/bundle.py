@@ -0,0 +1,305 @@
+"""
+Indexed single-file sequence bundle for distribution to spectrometer workstations.
+
+Layout::
+
+    header   8-byte magic, format version (u32), index offset (u64), index length (u64)
+    data     the sequence files, back to back
+    index    JSON: bundle id, commit, schema version, removed names (deltas only)
+             and per-sequence offset, length, SHA-256 and parsed metadata
+
+The reader maps the file and parses only the index, so listing, metadata
+lookups and single-file reads need no unpacking. A delta bundle has the
+same layout but carries only entries that changed against a base bundle,
+plus the names removed; apply_delta() combines the two into a new bundle.
+
+Reading on a workstation needs only the standard library::
+
+    python -m pulseprograms.bundle list sequences.ppb
+    python -m pulseprograms.bundle cat sequences.ppb 19f_cest.cw
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+MAGIC = b'PPBUNDLE'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIQQ')
+DEFAULT_OUTPUT = "docs-generated/sequences.ppb"
+# Next to the base bundle, named after the base it applies to
+DELTA_OUTPUT = "sequences.{base}.delta.ppb"
+
+
+class BundleError(Exception):
+    pass
+
+
+def bundle_id(entries: Dict[str, Dict[str, Any]]) -> str:
+    """Content address of a bundle: hash of its (name, SHA-256) pairs."""
+    digest = hashlib.sha256()
+    for name in sorted(entries):
+        digest.update(f"{name}\0{entries[name]['sha256']}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_bundle(output: Path, items: Iterable[Tuple[str, bytes, Optional[Dict[str, Any]]]],
+                 commit: Optional[str] = None, schema_version: Optional[str] = None,
+                 base: Optional[str] = None, removed: Iterable[str] = ()) -> Dict[str, Any]:
+    """
+    Write (name, content, metadata) items as a bundle and return its index.
+
+    Items are streamed to disk; only the index is held in memory. ``base``
+    and ``removed`` mark the output as a delta against another bundle.
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    entries: Dict[str, Dict[str, Any]] = {}
+    tmp = output.with_name(output.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+        for name, content, metadata in items:
+            entries[name] = {
+                'offset': f.tell(),
+                'length': len(content),
+                'sha256': hashlib.sha256(content).hexdigest(),
+                'metadata': metadata,
+            }
+            f.write(content)
+        index = {
+            'id': None,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': commit,
+            'schema_version': schema_version,
+            'base': base,
+            'removed': sorted(removed),
+            'entries': entries,
+        }
+        index['id'] = bundle_id(entries) if base is None else None
+        data = json.dumps(index, sort_keys=True, default=str).encode('utf-8')
+        offset = f.tell()
+        f.write(data)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, offset, len(data)))
+    tmp.replace(output)
+    return index
+
+
+class Bundle:
+    """Random-access reader over a memory-mapped bundle."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise BundleError(f"{self.path} is empty")
+        try:
+            magic, version, offset, length = HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            self.close()
+            raise BundleError(f"{self.path} is truncated (no complete header)") from None
+        if magic != MAGIC:
+            self.close()
+            raise BundleError(f"{self.path} is not a sequence bundle")
+        if version > FORMAT_VERSION:
+            self.close()
+            raise BundleError(f"{self.path} uses bundle format {version}; upgrade pulseprograms")
+        try:
+            if offset + length > len(self._map):
+                raise ValueError("index runs past the end of the file")
+            self.index = json.loads(self._map[offset:offset + length])
+            self.entries: Dict[str, Dict[str, Any]] = self.index['entries']
+        except (ValueError, KeyError, TypeError) as e:  # JSONDecodeError and UnicodeDecodeError are ValueErrors
+            self.close()
+            raise BundleError(f"{self.path} is truncated or corrupt: {e}") from None
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self.entries))
+
+    @property
+    def is_delta(self) -> bool:
+        return self.index.get('base') is not None
+
+    def metadata(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.entries[name]['metadata']
+
+    def read(self, name: str, verify: bool = False) -> bytes:
+        """Raw bytes of one sequence, sliced straight from the map."""
+        entry = self.entries[name]
+        content = self._map[entry['offset']:entry['offset'] + entry['length']]
+        if verify and hashlib.sha256(content).hexdigest() != entry['sha256']:
+            raise BundleError(f"{name}: checksum mismatch in {self.path}")
+        return content
+
+    def source(self, name: str) -> str:
+        return self.read(name).decode('utf-8')
+
+    def verify(self) -> List[str]:
+        """Names whose content does not match the recorded SHA-256."""
+        bad = []
+        for name in self:
+            try:
+                self.read(name, verify=True)
+            except BundleError:
+                bad.append(name)
+        return bad
+
+
+def corpus_items(corpus) -> Iterator[Tuple[str, bytes, Optional[Dict[str, Any]]]]:
+    for file_path in corpus.sequence_files():
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        yield file_path.name, content, corpus.metadata(file_path, cache=False)
+
+
+def build(corpus, output: str = DEFAULT_OUTPUT) -> Dict[str, Any]:
+    """Bundle every sequence file of the corpus."""
+    from pulseprograms import gitlog
+    return write_bundle(Path(output), corpus_items(corpus), commit=gitlog.head(corpus.root),
+                        schema_version=corpus.schema.get('version'))
+
+
+def delta_output(base: Bundle) -> Path:
+    """Default path of a delta against ``base``: DELTA_OUTPUT next to it."""
+    return base.path.with_name(DELTA_OUTPUT.format(base=(base.index.get('id') or 'unknown')[:8]))
+
+
+def _same_file(a, b) -> bool:
+    return Path(a).resolve() == Path(b).resolve()
+
+
+def build_delta(base: Bundle, corpus, output: str) -> Dict[str, Any]:
+    """Write only the sequences that differ from ``base``, plus the names it should drop."""
+    from pulseprograms import gitlog
+    if base.is_delta:
+        raise BundleError(f"{base.path} is a delta bundle; a delta must be made against a full bundle")
+    if _same_file(output, base.path):
+        raise BundleError(f"the delta would overwrite its base {base.path}; choose another --bundle-output")
+    removed = set(base.entries) - {f.name for f in corpus.sequence_files()}
+
+    def changed():
+        for name, content, metadata in corpus_items(corpus):
+            entry = base.entries.get(name)
+            if entry is None or entry['sha256'] != hashlib.sha256(content).hexdigest():
+                yield name, content, metadata
+
+    return write_bundle(Path(output), changed(), commit=gitlog.head(corpus.root),
+                        schema_version=corpus.schema.get('version'),
+                        base=base.index['id'], removed=removed)
+
+
+def apply_delta(base: Bundle, delta: Bundle, output: str) -> Dict[str, Any]:
+    """Combine a base bundle and a delta made against it into a new full bundle."""
+    if _same_file(output, base.path) or _same_file(output, delta.path):
+        raise BundleError(f"{output} is one of the bundles being combined; choose another output")
+    if delta.index.get('base') != base.index['id']:
+        raise BundleError(f"{delta.path} was made against bundle {delta.index.get('base')}, "
+                          f"not {base.index['id']}")
+    removed = set(delta.index.get('removed', []))
+
+    def items():
+        for name in sorted((set(base.entries) - removed) | set(delta.entries)):
+            source = delta if name in delta else base
+            yield name, source.read(name, verify=True), source.metadata(name)
+
+    return write_bundle(Path(output), items(), commit=delta.index.get('commit'),
+                        schema_version=delta.index.get('schema_version'))
+
+
+def main(corpus=None, output: Optional[str] = None, base: Optional[str] = None) -> bool:
+    """
+    Build a bundle, or with ``base`` a delta against that bundle.
+
+    ``output`` defaults to DEFAULT_OUTPUT, or for a delta to delta_output().
+    """
+    if corpus is None:
+        from pulseprograms.corpus import Corpus
+        corpus = Corpus()
+    if base:
+        try:
+            with Bundle(base) as base_bundle:
+                output = output or str(delta_output(base_bundle))
+                index = build_delta(base_bundle, corpus, output)
+        except (OSError, BundleError) as e:
+            print(f"✗ {e}")
+            return False
+        print(f"Wrote delta with {len(index['entries'])} changed and "
+              f"{len(index['removed'])} removed sequences: {output}")
+    else:
+        output = output or DEFAULT_OUTPUT
+        index = build(corpus, output)
+        print(f"Bundled {len(index['entries'])} sequences: {output}")
+    return True
+
+
+def reader_main(argv: Optional[List[str]] = None):
+    """Workstation-side commands: list, show, cat, verify and apply."""
+    parser = argparse.ArgumentParser(prog='python -m pulseprograms.bundle',
+                                     description="Read sequence bundles without unpacking them.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list sequences with their versions").add_argument('bundle')
+    for command, help in (('show', "print a sequence's metadata as JSON"), ('cat', "print a sequence")):
+        sub = commands.add_parser(command, help=help)
+        sub.add_argument('bundle')
+        sub.add_argument('name')
+    commands.add_parser('verify', help="check every checksum").add_argument('bundle')
+    apply = commands.add_parser('apply', help="apply a delta to a base bundle")
+    apply.add_argument('base')
+    apply.add_argument('delta')
+    apply.add_argument('output')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'apply':
+            with Bundle(args.base) as base, Bundle(args.delta) as delta:
+                index = apply_delta(base, delta, args.output)
+            print(f"Wrote {len(index['entries'])} sequences: {args.output}")
+            return
+        with Bundle(args.bundle) as bundle:
+            if args.command == 'list':
+                for name in bundle:
+                    metadata = bundle.metadata(name) or {}
+                    print(f"{name}\t{metadata.get('sequence_version', '')}\t{metadata.get('title', '')}")
+            elif args.command in ('show', 'cat'):
+                if args.name not in bundle:
+                    print(f"Error: {args.name} is not in {args.bundle}", file=sys.stderr)
+                    sys.exit(1)
+                if args.command == 'show':
+                    print(json.dumps(bundle.metadata(args.name), indent=2, default=str))
+                else:
+                    sys.stdout.write(bundle.source(args.name))
+            elif args.command == 'verify':
+                bad = bundle.verify()
+                for name in bad:
+                    print(f"✗ {name} - checksum mismatch")
+                if bad:
+                    sys.exit(1)
+                print(f"✓ {len(bundle.entries)} sequences verified")
+    except (OSError, BundleError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    reader_main()
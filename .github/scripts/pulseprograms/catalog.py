@@ -0,0 +1,39 @@
+"""
+Machine-readable catalog index of all annotated sequences.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from pulseprograms.corpus import Corpus
+
+DEFAULT_INDEX = "docs-generated/docs/sequences.json"
+
+
+def build_index(corpus: Corpus) -> Dict[str, Any]:
+    """Collect the metadata of every annotated sequence into one index."""
+    sequences = {}
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        if metadata is None:
+            continue
+        sequences[file_path.name] = {
+            'file': file_path.as_posix(),
+            'metadata': metadata,
+        }
+    return {
+        'schema_version': corpus.schema.get('version'),
+        'sequences': sequences,
+    }
+
+
+def main(corpus: Optional[Corpus] = None, output: str = DEFAULT_INDEX):
+    corpus = corpus or Corpus()
+    index = build_index(corpus)
+
+    output_file = Path(output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True, default=str)
+
+    print(f"Indexed {len(index['sequences'])} sequences: {output_file}")
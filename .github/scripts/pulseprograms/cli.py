@@ -0,0 +1,226 @@
+"""
+Command-line entry point: ``pulseprograms TASK [TASK ...]``.
+
+Several tasks can run in one invocation and share a single Corpus, so the
+schema and every sequence are loaded once. Task modules are imported only
+when their task runs, keeping ``--help`` and single-file checks fast.
+"""
+import argparse
+import sys
+from typing import List, Optional
+
+from pulseprograms import __version__
+
+TASKS = {
+    'validate': "validate YAML syntax, schema compliance and file names",
+    'docs': "generate sequence pages and the sequence database",
+    'schema-docs': "generate documentation for the current schema",
+    'pr': "validate changed sequences and write pr_comment.md",
+    'index': "write a JSON catalog index of all sequences",
+    'export': "stream the catalog as NDJSON or CSV (one flat record per sequence)",
+    'bundle': "pack all sequences into one indexed bundle file (or a delta with --bundle-base)",
+    'vocabulary': "compile VOCABULARY.md into a JSON term index",
+    'lint': "static checks of pulse program bodies: labels, #ifdef blocks, lists, gradients, power",
+    'phases': "expand phase cycles and check them against the receiver phase (needs numpy)",
+    'safety': "RF duty cycle and gradient load per scan over a --set parameter grid (needs numpy)",
+    'timeline': "event timeline of one scan with loops run-length encoded, for --set parameter values (needs numpy)",
+    'setup': "write list files (vdlist, fq1list, ...) and setup macros for a --queue of samples (needs numpy)",
+    'history': "index every committed sequence_version (see --show) next to the catalog",
+    'serve': "serve catalog lookups, search, facets and sources over HTTP; reloads when HEAD moves",
+    'migrate': "upgrade ';@' annotations to the current schema version (see --dry-run)",
+    'lsp': "run the ';@' annotation language server on stdin/stdout",
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='pulseprograms',
+        description="Validation and documentation tooling for the pulse sequence repository.",
+        epilog="tasks:\n" + "\n".join(f"  {name:<12} {help}" for name, help in TASKS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('tasks', nargs='+', choices=list(TASKS), metavar='TASK',
+                        help="one or more tasks to run, in order")
+    parser.add_argument('--root', default='.',
+                        help="repository root containing sequences/ and schemas/ (default: .)")
+    parser.add_argument('-f', '--files', nargs='+', metavar='PATH',
+                        help="restrict tasks to these sequence files")
+    parser.add_argument('--watch', action='store_true',
+                        help="after running the tasks, keep watching sequences/ and schemas/ "
+                             "and revalidate files as they change")
+    parser.add_argument('--poll', action='store_true',
+                        help="with --watch, poll mtimes instead of using inotify")
+    parser.add_argument('--index-output', default=None, metavar='PATH',
+                        help="output file for the index task")
+    parser.add_argument('--export-output', default=None, metavar='PATH',
+                        help="output file for the export task (CSV if it ends in .csv, NDJSON otherwise)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="with export, append only sequences changed since the previous export")
+    parser.add_argument('--bundle-output', default=None, metavar='PATH',
+                        help="output file for the bundle task (default: docs-generated/sequences.ppb, "
+                             "or for a delta sequences.<base id>.delta.ppb next to its base)")
+    parser.add_argument('--bundle-base', default=None, metavar='PATH',
+                        help="with bundle, write a delta against this earlier bundle")
+    parser.add_argument('--vocabulary-output', default=None, metavar='PATH',
+                        help="output file for the vocabulary task")
+    parser.add_argument('--set', action='append', default=[], metavar='NAME=VALUES',
+                        help="with safety, a parameter value, list (1,2,5) or range (start:stop:count); "
+                             "with timeline, a single value. Values are in us for pulses, s for delays "
+                             "and W for powers; pulses and delays also take TopSpin suffixes (200m, 10u). "
+                             "Names may be block paths such as cest.duration, given without a suffix "
+                             "(repeatable; setup reads its values from --queue)")
+    parser.add_argument('-D', '--define', action='append', default=[], metavar='NAME',
+                        help="with safety or timeline, a pulse program -D define such as HDEC (repeatable)")
+    parser.add_argument('--limit', action='append', default=[], metavar='NAME=VALUE',
+                        help="with safety, override a limit such as rf_power=0.5 or gradient_duty=0.05")
+    parser.add_argument('--repo', action='append', default=[], metavar='PATH',
+                        help="with index or docs, another local sequence repository to include; "
+                             "--root takes precedence, then each --repo in order (repeatable)")
+    parser.add_argument('--history-output', metavar='PATH',
+                        help="with history, the history index to update (default: docs-generated/docs/history.json)")
+    parser.add_argument('--show', metavar='NAME@VERSION|NAME@DATE',
+                        help="with history, print a sequence as committed at a sequence_version or date, "
+                             "e.g. 19f_r1.cw@0.1.2 or 19f_r1.cw@2026-01-15")
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="with serve, the address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765,
+                        help="with serve, the port to listen on (default: 8765)")
+    parser.add_argument('--at', type=float, metavar='SECONDS',
+                        help="with timeline, show what is running this long into the scan")
+    parser.add_argument('--scan', type=int, default=1, metavar='N',
+                        help="with timeline, the scan of the phase cycle to lay out (default: 1)")
+    parser.add_argument('--timeline-output', metavar='DIR',
+                        help="with timeline, write compact JSON timelines here "
+                             "(default: docs-generated/docs/timelines)")
+    parser.add_argument('--queue', metavar='PATH',
+                        help="with setup, the YAML queue of samples (dataset, expno, sequence, set)")
+    parser.add_argument('--setup-output', metavar='DIR',
+                        help="with setup, where the <dataset>/<expno> experiment directories go "
+                             "(default: experiments)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="with migrate, print a diff instead of rewriting files")
+    parser.add_argument('--report', default=None, metavar='PATH',
+                        help="write every finding of the validate/pr/lint/phases tasks to PATH "
+                             "(SARIF if it ends in .sarif, JSON otherwise)")
+    parser.add_argument('--report-format', choices=['json', 'sarif'], default=None,
+                        help="override the --report format")
+    parser.add_argument('--changed-since', default=None, metavar='REV',
+                        help="only rebuild outputs affected by changes since the git revision REV "
+                             "(e.g. origin/main); unaffected tasks are skipped")
+    parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
+    return parser
+
+
+def run_task(task: str, corpus, args, report=None, plan=None) -> bool:
+    """
+    Run a single task against the shared corpus. Returns False on failure.
+
+    With a dependency ``plan`` (see --changed-since), tasks whose outputs are
+    unaffected are skipped and per-sequence work is limited to what changed.
+    """
+    if plan is not None and not plan.task_needed(task):
+        print(f"Skipping {task}: no affected outputs")
+        return True
+    if task == 'validate':
+        from pulseprograms import validate
+        if plan is not None:
+            corpus = corpus.subset(plan.files(corpus, 'validate'))
+        return validate.run(corpus, report)
+    if task == 'docs':
+        from pulseprograms import docs
+        docs.main(corpus, pages=plan.names('page') if plan is not None else None, repositories=args.repo,
+                  removed=plan.removed if plan is not None else ())
+    elif task == 'schema-docs':
+        from pulseprograms import schema_docs
+        schema_docs.generate_schema_docs(corpus)
+    elif task == 'pr':
+        from pulseprograms import pr
+        pr.main(corpus, report)
+    elif task == 'index':
+        from pulseprograms import catalog
+        if args.repo:
+            from pulseprograms import federation
+            federation.main(corpus, args.repo, args.index_output or catalog.DEFAULT_INDEX)
+        else:
+            catalog.main(corpus, args.index_output or catalog.DEFAULT_INDEX)
+    elif task == 'export':
+        from pulseprograms import export
+        export.main(corpus, args.export_output or export.DEFAULT_OUTPUT, args.incremental)
+    elif task == 'bundle':
+        from pulseprograms import bundle
+        return bundle.main(corpus, args.bundle_output, args.bundle_base)
+    elif task == 'vocabulary':
+        from pulseprograms import vocabulary
+        vocabulary.main(corpus, args.vocabulary_output or vocabulary.DEFAULT_OUTPUT)
+    elif task == 'lint':
+        from pulseprograms import lint
+        if plan is not None:
+            corpus = corpus.subset(plan.files(corpus, 'validate'))
+        return lint.main(corpus, report)
+    elif task == 'phases':
+        from pulseprograms import phases
+        if plan is not None:
+            corpus = corpus.subset(plan.files(corpus, 'validate'))
+        return phases.check_phases(corpus, report)
+    elif task == 'safety':
+        from pulseprograms import safety
+        if plan is not None:
+            corpus = corpus.subset(plan.files(corpus, 'validate'))
+        return safety.main(corpus, args.set, args.define, args.limit)
+    elif task == 'timeline':
+        from pulseprograms import timeline
+        if plan is not None:
+            corpus = corpus.subset(plan.files(corpus, 'validate'))
+        return timeline.main(corpus, args.set, args.define, args.timeline_output or timeline.DEFAULT_OUTPUT,
+                             args.at, args.scan - 1)
+    elif task == 'setup':
+        from pulseprograms import batch
+        return batch.main(corpus, args.queue, args.setup_output or batch.DEFAULT_OUTPUT)
+    elif task == 'history':
+        from pulseprograms import history
+        return history.main(corpus, args.history_output or history.DEFAULT_OUTPUT, args.show)
+    elif task == 'migrate':
+        from pulseprograms import migrate
+        return migrate.main(corpus, args.dry_run)
+    elif task == 'serve':
+        from pulseprograms import service
+        service.main(corpus, args.host, args.port)
+    elif task == 'lsp':
+        from pulseprograms import lsp
+        lsp.main(corpus)
+    return True
+
+
+def main(argv: Optional[List[str]] = None):
+    args = build_parser().parse_args(argv)
+
+    from pulseprograms.corpus import Corpus
+    corpus = Corpus(args.root, args.files)
+
+    report = None
+    if args.report:
+        from pulseprograms.report import Report
+        report = Report()
+
+    plan = None
+    if args.changed_since:
+        from pulseprograms import deps
+        plan = deps.plan_since(corpus, args.changed_since)
+        if plan is None:
+            print(f"Could not diff against {args.changed_since}; running everything")
+        else:
+            print(f"Changes since {args.changed_since}: {plan.summary()}")
+
+    success = True
+    for task in args.tasks:
+        if not run_task(task, corpus, args, report, plan):
+            success = False
+
+    if report is not None:
+        report.write(args.report, args.report_format)
+
+    if args.watch:
+        from pulseprograms import watch
+        watch.run(corpus, poll=args.poll)
+    elif not success:
+        sys.exit(1)
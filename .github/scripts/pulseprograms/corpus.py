@@ -0,0 +1,130 @@
+"""
+A once-loaded view of the repository shared by all CLI tasks.
+
+Sources, parsed metadata, the schema and its compiled validator are read on
+first use and cached, so running several tasks in one invocation parses each
+sequence file only once.
+"""
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+
+class Corpus:
+    def __init__(self, root: str = ".", files: Optional[Iterable[str]] = None):
+        self.root = Path(root)
+        self.sequences_dir = self.root / "sequences"
+        self.schema_dir = self.root / "schemas"
+        self._files = [Path(f) for f in files] if files is not None else None
+        self._sources: Dict[Path, str] = {}
+        self._metadata: Dict[Path, Optional[Dict[str, Any]]] = {}
+        self._schema = None
+        self._validator = None
+        self._vocabulary = None
+        self._rules = None
+        # Parse errors keyed by file path, filled in as metadata is loaded
+        self.errors: Dict[Path, str] = {}
+
+    def subset(self, files: Iterable[Path]) -> 'Corpus':
+        """A view restricted to ``files`` that shares this corpus's caches."""
+        view = Corpus(str(self.root), [str(f) for f in files])
+        view._sources = self._sources
+        view._metadata = self._metadata
+        view.errors = self.errors
+        view._schema = self._schema
+        view._validator = self._validator
+        view._vocabulary = self._vocabulary
+        view._rules = self._rules
+        return view
+
+    def sequence_files(self) -> List[Path]:
+        """List the sequence files to process (all of sequences/ unless restricted)."""
+        if self._files is not None:
+            return list(self._files)
+        if not self.sequences_dir.exists():
+            return []
+        return sorted(f for f in self.sequences_dir.iterdir()
+                      if f.is_file() and f.name != 'README.md')
+
+    def source(self, path: Path, cache: bool = True) -> str:
+        """
+        Return the text of a sequence file.
+
+        With ``cache=False`` a file not already cached is read without being
+        kept, so streaming tasks run in constant memory.
+        """
+        path = Path(path)
+        if path in self._sources:
+            return self._sources[path]
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        if cache:
+            self._sources[path] = content
+        return content
+
+    def metadata(self, path: Path, cache: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Return the parsed annotation block of a sequence file.
+
+        None means either no metadata or a parse error; errors are recorded in
+        ``self.errors``. Callers must not mutate the returned dict. See source()
+        for ``cache``.
+        """
+        path = Path(path)
+        if path in self._metadata:
+            return self._metadata[path]
+        from pulseprograms.metadata import parse_metadata
+        try:
+            metadata = parse_metadata(self.source(path, cache))
+        except Exception as e:
+            metadata = None
+            self.errors[path] = str(e)
+        if cache:
+            self._metadata[path] = metadata
+        return metadata
+
+    def invalidate(self, path: Optional[Path] = None):
+        """Forget cached state for one file, or for everything."""
+        if path is None:
+            self._sources.clear()
+            self._metadata.clear()
+            self.errors.clear()
+            self._schema = None
+            self._validator = None
+            self._vocabulary = None
+            self._rules = None
+            return
+        path = Path(path)
+        self._sources.pop(path, None)
+        self._metadata.pop(path, None)
+        self.errors.pop(path, None)
+
+    @property
+    def schema(self) -> Dict[str, Any]:
+        if self._schema is None:
+            from pulseprograms.schema import load_schema
+            self._schema = load_schema(self.schema_dir)
+        return self._schema
+
+    @property
+    def validator(self):
+        """Compiled jsonschema validator for the current schema."""
+        if self._validator is None:
+            from pulseprograms.schema import compile_validator
+            self._validator = compile_validator(self.schema)
+        return self._validator
+
+    @property
+    def rules(self):
+        """Consistency rules compiled for the current schema (see rules.compile_rules)."""
+        if self._rules is None:
+            from pulseprograms.rules import compile_rules
+            self._rules = compile_rules(self.schema)
+        return self._rules
+
+    @property
+    def vocabulary(self):
+        """Compiled VOCABULARY.md index (see vocabulary.VocabularyIndex)."""
+        if self._vocabulary is None:
+            from pulseprograms.vocabulary import VocabularyIndex
+            self._vocabulary = VocabularyIndex.load(self.root)
+        return self._vocabulary
@@ -0,0 +1,159 @@
+"""
+Cross-reference checker - annotation parameters against the pulse-program body.
+
+Every parameter name used by ``reference_pulse``, the experiment blocks and
+the ``dimensions`` dotted paths must appear in the body of the sequence; a
+missing one usually means the annotation went stale when the body was edited.
+Files are checked in parallel worker processes, each tokenising its body once.
+
+Reference pulses are often kept as calibrations for prosol relations or
+shaped-pulse power calculations without appearing in the body, so those
+misses are reported as notes rather than warnings.
+"""
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import locator
+from pulseprograms.pulseprogram import Symbols
+from pulseprograms.report import Report, finding
+
+CHANNEL = re.compile(r'^f[1-8]$')
+PARAMETER = re.compile(r'^[A-Za-z_]\w*$')
+
+# Fewer files than this are checked in-process; workers would cost more than they save
+PARALLEL_THRESHOLD = 32
+
+
+def block_fields(schema: Dict[str, Any]) -> Tuple[List[str], List[str]]:
+    """
+    Experiment blocks and their descriptive (non-parameter) fields, from the schema.
+
+    Blocks are the top-level properties extending block_base; descriptive
+    fields are block_base's plain string properties such as type and model.
+    """
+    blocks = [name for name, spec in schema.get('properties', {}).items()
+              if isinstance(spec, dict) and any(
+                  isinstance(part, dict) and part.get('$ref', '').endswith('/block_base')
+                  for part in spec.get('allOf', []))]
+    base = schema.get('$defs', {}).get('block_base', {}).get('properties', {})
+    descriptive = [name for name, spec in base.items()
+                   if spec.get('type') == 'string' and 'pattern' not in spec and '$ref' not in spec]
+    return blocks, descriptive
+
+
+def _names(value: Any, path: List[Any], skip: List[str]) -> Iterator[Tuple[List[Any], str]]:
+    """Yield (path, name) for every parameter-like string below ``value``."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key not in skip:
+                yield from _names(item, path + [key], skip)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            yield from _names(item, path + [index], skip)
+    elif isinstance(value, str) and PARAMETER.match(value) and not CHANNEL.match(value):
+        yield path, value
+
+
+def references(metadata: Dict[str, Any], blocks: List[str],
+               descriptive: List[str]) -> Dict[str, List[Any]]:
+    """Map each referenced parameter name to the first annotation path using it."""
+    found: Dict[str, List[Any]] = {}
+    for path, name in _names(metadata.get('reference_pulse', []), ['reference_pulse'], ['channel']):
+        found.setdefault(name, path)
+    for block in blocks:
+        if isinstance(metadata.get(block), dict):
+            for path, name in _names(metadata[block], [block], descriptive):
+                found.setdefault(name, path)
+    # Dotted paths (cest.offset) point into a block; resolve them to its parameters
+    for index, entry in enumerate(metadata.get('dimensions', []) or []):
+        if not isinstance(entry, str) or '.' not in entry:
+            continue
+        value: Any = metadata
+        for part in entry.split('.'):
+            value = value.get(part) if isinstance(value, dict) else None
+        for _, name in _names(value, [], descriptive):
+            found.setdefault(name, ['dimensions', index])
+    return found
+
+
+def check_source(file_path: str, content: str, metadata: Optional[Dict[str, Any]],
+                 blocks: List[str], descriptive: List[str]) -> List[Dict[str, Any]]:
+    """Findings for one file: referenced parameters missing from its body."""
+    if not metadata:
+        return []
+    symbols = Symbols.scan(content)
+    position = None
+    findings = []
+    for name, path in references(metadata, blocks, descriptive).items():
+        if name in symbols:
+            continue
+        if position is None:
+            position = locator(content)
+        line, column, end_line, end_column = position(path)
+        dotted = '.'.join(str(p) for p in path)
+        level = 'note' if path[0] == 'reference_pulse' else 'warning'
+        findings.append(finding(file_path, f"{dotted}: parameter '{name}' does not appear in the pulse program",
+                                'crossref.unresolved', level=level, line=line, column=column,
+                                end_line=end_line, end_column=end_column, path=dotted))
+    return findings
+
+
+def _check_batch(batch: List[Tuple[str, str, Optional[Dict[str, Any]]]],
+                 blocks: List[str], descriptive: List[str]) -> List[List[Dict[str, Any]]]:
+    return [check_source(path, content, metadata, blocks, descriptive)
+            for path, content, metadata in batch]
+
+
+def check_corpus(corpus: Corpus, jobs: Optional[int] = None) -> Dict[Path, List[Dict[str, Any]]]:
+    """Cross-reference every sequence file, in parallel for large corpora."""
+    blocks, descriptive = block_fields(corpus.schema)
+    files = corpus.sequence_files()
+    work = [(str(f), corpus.source(f), corpus.metadata(f)) for f in files]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(work) < PARALLEL_THRESHOLD:
+        results = _check_batch(work, blocks, descriptive)
+    else:
+        # A few large batches per worker keeps pickling overhead low
+        size = max(1, len(work) // (jobs * 4))
+        batches = [work[i:i + size] for i in range(0, len(work), size)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = [r for batch in pool.map(_check_batch, batches,
+                                               [blocks] * len(batches),
+                                               [descriptive] * len(batches))
+                       for r in batch]
+    return dict(zip(files, results))
+
+
+def check_references(corpus: Corpus, report: Optional[Report] = None,
+                     jobs: Optional[int] = None) -> bool:
+    """Check annotation parameters against pulse-program bodies (warnings only)."""
+    print("Cross-referencing annotation parameters with pulse program bodies...")
+
+    try:
+        results = check_corpus(corpus, jobs)
+    except FileNotFoundError:
+        print("Error: No schema file found")
+        return False
+
+    warning_count = note_count = 0
+    for file_path, findings in results.items():
+        if report is not None:
+            report.extend(file_path, findings)
+        for f in findings:
+            if f['level'] == 'note':
+                note_count += 1
+                continue
+            print(f"⚠️ {file_path}:{f['line']}: {f['message']}")
+            warning_count += 1
+
+    if note_count > 0:
+        print(f"{note_count} reference pulse parameters are not used in their pulse programs (see --report)")
+    if warning_count > 0:
+        print(f"Cross-reference check: {warning_count} parameters not found in pulse programs")
+    else:
+        print("All annotation parameters appear in their pulse programs!")
+    return True
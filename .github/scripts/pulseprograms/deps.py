@@ -0,0 +1,209 @@
+"""
+Reverse-dependency graph from repository inputs to generated outputs.
+
+Outputs are (kind, name) pairs: per-sequence validation results, pages and
+catalog shards, plus aggregate outputs such as the sequence database. Given
+the paths changed since a git revision, plan() returns the minimal set of
+outputs to rebuild, so the cost follows the size of the change.
+
+Most edges are fixed rules (a sequence feeds its own outputs, the schema
+feeds every validation result, a tooling module feeds what it generates,
+hand-written pages feed the site). Include files are the exception:
+sequences are scanned for '#include' only when a changed file could be one,
+so ordinary changes never read the whole repository. A deleted sequence is
+planned as a removal of its page rather than a rebuild.
+"""
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Iterable, Optional, Set, Tuple
+
+from pulseprograms import gitlog
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import includes
+
+# Per-sequence outputs
+VALIDATE, PAGE, CATALOG = 'validate', 'page', 'catalog'
+# Aggregate outputs; SITE is the docs site built from the hand-written pages
+DATABASE, SCHEMA_DOCS, VOCABULARY, SITE = 'database', 'schema-docs', 'vocabulary', 'site'
+
+PER_SEQUENCE = (VALIDATE, PAGE, CATALOG)
+EVERYTHING = PER_SEQUENCE + (DATABASE, SCHEMA_DOCS, VOCABULARY, SITE)
+
+TOOLING_DIR = PurePosixPath('.github/scripts/pulseprograms')
+# Hand-written pages and the MkDocs configuration; README.md is the landing page on GitHub
+SITE_DIR = PurePosixPath('docs')
+SITE_FILES = (PurePosixPath('README.md'),)
+# Files an '#include' can name: TopSpin '.incl' files and extension-less ones
+INCLUDE_SUFFIXES = ('.incl', '')
+
+# What each tooling module produces. Modules not listed (corpus, metadata,
+# fastyaml, cli, ...) are shared and invalidate everything; so does a new
+# module until it is added here, which is safe, only slower
+MODULE_OUTPUTS = {
+    'validate.py': (VALIDATE,),
+    'schema.py': (VALIDATE,),
+    'rules.py': (VALIDATE,),
+    'crossref.py': (VALIDATE,),
+    'lint.py': (VALIDATE,),
+    'report.py': (VALIDATE,),
+    'pr.py': (VALIDATE,),
+    'vocabulary.py': (VALIDATE, VOCABULARY),
+    'pulseprogram.py': (VALIDATE, CATALOG),
+    'docs.py': (PAGE, DATABASE),
+    'highlight.py': (PAGE,),
+    'phases.py': (VALIDATE, PAGE),
+    'schema_docs.py': (SCHEMA_DOCS,),
+    'catalog.py': (CATALOG,),
+    'federation.py': (CATALOG, PAGE, DATABASE),
+    'history.py': (CATALOG,),
+    'diff.py': (VALIDATE,),
+    'service.py': (),
+    'export.py': (CATALOG,),
+    'bundle.py': (CATALOG,),
+    'gitlog.py': (PAGE, CATALOG),
+    'lsp.py': (),
+    'migrate.py': (),
+    'safety.py': (VALIDATE,),
+    'timeline.py': (VALIDATE,),
+    'batch.py': (),
+    'watch.py': (),
+}
+
+# Which outputs each CLI task writes
+TASK_OUTPUTS = {
+    'validate': (VALIDATE,),
+    'pr': (VALIDATE,),
+    'lint': (VALIDATE,),
+    'phases': (VALIDATE,),
+    'safety': (VALIDATE,),
+    'timeline': (VALIDATE,),
+    'docs': (PAGE, DATABASE, SITE),
+    'schema-docs': (SCHEMA_DOCS,),
+    'index': (CATALOG,),
+    'export': (CATALOG,),
+    'bundle': (CATALOG,),
+    'history': (CATALOG,),
+    'vocabulary': (VOCABULARY,),
+}
+
+
+class Plan:
+    """Outputs to rebuild: for each kind, a set of sequence names or None for all."""
+
+    def __init__(self):
+        self.outputs: Dict[str, Optional[Set[str]]] = {}
+        self.reasons: Dict[str, List[str]] = {}
+        self.removed: Set[str] = set()  # deleted sequences whose pages must go
+
+    def add(self, kind: str, name: Optional[str] = None, reason: str = ''):
+        if name is None:
+            self.outputs[kind] = None
+        elif kind not in self.outputs:
+            self.outputs[kind] = {name}
+        elif self.outputs[kind] is not None:
+            self.outputs[kind].add(name)
+        if reason:
+            self.reasons.setdefault(kind, []).append(reason)
+
+    def remove(self, name: str, reason: str = ''):
+        """A deleted sequence: drop its page, and rebuild what lists it."""
+        self.removed.add(name)
+        self.add(DATABASE, reason=reason)
+        self.add(CATALOG, reason=reason)
+
+    def needs(self, kind: str) -> bool:
+        return kind in self.outputs
+
+    def names(self, kind: str) -> Optional[Set[str]]:
+        """Sequence names of ``kind`` to rebuild; None means all of them."""
+        return self.outputs.get(kind, set())
+
+    def task_needed(self, task: str) -> bool:
+        return task not in TASK_OUTPUTS or any(self.needs(k) for k in TASK_OUTPUTS[task])
+
+    def files(self, corpus: Corpus, kind: str) -> List[Path]:
+        """The corpus files whose ``kind`` outputs must be rebuilt."""
+        names = self.names(kind)
+        return [f for f in corpus.sequence_files() if names is None or f.name in names]
+
+    def summary(self) -> str:
+        if not self.outputs:
+            return "nothing to rebuild"
+        parts = [f"removed: {len(self.removed)}"] if self.removed else []
+        for kind, names in sorted(self.outputs.items()):
+            if kind in PER_SEQUENCE:
+                parts.append(f"{kind}: {'all' if names is None else len(names)}")
+            else:
+                parts.append(kind)
+        return ', '.join(parts)
+
+
+class DependencyGraph:
+    def __init__(self, corpus: Corpus):
+        self.corpus = corpus
+        self.root = corpus.root
+        self.sequences = PurePosixPath(self._relative(corpus.sequences_dir))
+        self.schemas = PurePosixPath(self._relative(corpus.schema_dir))
+        self._included_by: Optional[Dict[str, Set[str]]] = None
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return Path(path).resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return Path(path).as_posix()
+
+    def included_by(self) -> Dict[str, Set[str]]:
+        """Include file name -> names of the sequences including it (built on first use)."""
+        if self._included_by is None:
+            self._included_by = {}
+            for file_path in self.corpus.sequence_files():
+                for name in includes(self.corpus.source(file_path, cache=False)):
+                    self._included_by.setdefault(PurePosixPath(name).name, set()).add(file_path.name)
+        return self._included_by
+
+    def dependents(self, path: str) -> List[Tuple[str, Optional[str]]]:
+        """Outputs depending on one input path (relative to the repository root)."""
+        path = PurePosixPath(path)
+        if path.parent == self.sequences:
+            if path.name == 'README.md':
+                return []
+            return [(kind, path.name) for kind in PER_SEQUENCE] + [(DATABASE, None)]
+        if path.parent == self.schemas:
+            return [(VALIDATE, None), (CATALOG, None), (SCHEMA_DOCS, None)]
+        if path == PurePosixPath('VOCABULARY.md'):
+            return [(VALIDATE, None), (VOCABULARY, None)]
+        if path == PurePosixPath('pyproject.toml'):
+            return [(kind, None) for kind in EVERYTHING]
+        if path.parent == TOOLING_DIR and path.suffix == '.py':
+            kinds = MODULE_OUTPUTS.get(path.name, EVERYTHING)
+            return [(kind, None) for kind in kinds]
+        if SITE_DIR in path.parents or path in SITE_FILES:
+            return [(SITE, None)]
+        if path.suffix not in INCLUDE_SUFFIXES:
+            return []
+        users = self.included_by().get(path.name, set())
+        return [(kind, name) for name in sorted(users) for kind in (VALIDATE, PAGE)]
+
+    def plan(self, changed: Iterable[str]) -> Plan:
+        plan = Plan()
+        for path in changed:
+            posix = PurePosixPath(path)
+            if (posix.parent == self.sequences and posix.name != 'README.md'
+                    and not (self.root / posix).exists()):
+                plan.remove(posix.name, reason=str(path))
+                continue
+            for kind, name in self.dependents(path):
+                plan.add(kind, name, reason=str(path))
+        return plan
+
+
+def changed_since(corpus: Corpus, revision: str) -> Optional[List[str]]:
+    """Paths changed between ``revision`` and the work tree, or None if git cannot tell."""
+    changed = gitlog.changed_files(corpus.root, revision, paths=('.',))
+    return None if changed is None else [p.as_posix() for p in changed]
+
+
+def plan_since(corpus: Corpus, revision: str) -> Optional[Plan]:
+    changed = changed_since(corpus, revision)
+    if changed is None:
+        return None
+    return DependencyGraph(corpus).plan(changed)
@@ -0,0 +1,161 @@
+"""
+Structural diff of sequence files between two revisions.
+
+Files are compared as parsed annotation trees and normalised pulse-program
+token streams rather than as text, and each change is classified as one of
+KINDS, from least to most significant:
+
+- 'cosmetic': whitespace, comments, blank lines or YAML formatting only
+- 'metadata': the annotation changed, the pulse program did not
+- 'relation': only quoted relations such as '"d11=30m"' changed
+- 'timing': the statements changed (pulses, delays, loops, phase programs,
+  definitions or includes)
+
+plus 'added' and 'deleted'. The base side of a whole PR is read with one
+'git cat-file --batch'; everything else is in memory.
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+from pulseprograms import gitlog
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import extract_annotation, parse_metadata
+from pulseprograms.pulseprogram import code_lines, tokens
+
+KINDS = ('cosmetic', 'metadata', 'relation', 'timing')
+# Changes to what the spectrometer runs, which call for a new sequence_version
+BUMP_KINDS = {'relation', 'timing'}
+
+_PUNCTUATION = re.compile(r'\s*([(){}\[\]:,=*/+<>-])\s*')
+
+
+def _token(token: str) -> str:
+    return _PUNCTUATION.sub(r'\1', ' '.join(token.split()))
+
+
+def program(content: str) -> Tuple[List[str], List[Tuple[str, ...]]]:
+    """
+    Normalised (relations, statements) of a pulse program: comments, blank
+    lines and line numbers dropped, whitespace collapsed.
+    """
+    relations, statements = [], []
+    for _, code in code_lines(content):
+        stripped = code.strip()
+        if stripped.startswith('"'):
+            relations.extend(re.sub(r'\s+', '', r) for r in re.findall(r'"([^"]*)"', stripped))
+        else:
+            statements.append(tuple(_token(t) for t in tokens(stripped)))
+    return relations, statements
+
+
+def _annotation(content: str) -> Any:
+    """The parsed annotation, or its stripped lines if it does not parse."""
+    try:
+        return parse_metadata(content)
+    except Exception:
+        return [text.strip() for _, _, text in extract_annotation(content)]
+
+
+def fields(old: Any, new: Any, prefix: str = '') -> List[str]:
+    """Dotted paths of the annotation fields that differ ('cest.power', 'features')."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        changed = []
+        for key in sorted(set(old) | set(new), key=str):
+            changed.extend(fields(old.get(key), new.get(key), f'{prefix}{key}.'))
+        return changed
+    return [] if old == new else [prefix.rstrip('.') or '(annotation)']
+
+
+class Change:
+    """How one file differs between base and head."""
+
+    def __init__(self, file: str, kind: str, fields: Optional[List[str]] = None,
+                 old_metadata: Any = None, new_metadata: Any = None):
+        self.file = file
+        self.kind = kind
+        self.fields = fields or []
+        self.old_metadata = old_metadata
+        self.new_metadata = new_metadata
+
+    @property
+    def needs_bump(self) -> bool:
+        return self.kind in BUMP_KINDS
+
+    @property
+    def old_version(self) -> Optional[str]:
+        if isinstance(self.old_metadata, dict):
+            return self.old_metadata.get('sequence_version')
+        return None
+
+    def describe(self) -> str:
+        text = {
+            'added': "new file",
+            'deleted': "file removed",
+            'cosmetic': "formatting or comments only",
+            'metadata': "metadata only",
+            'relation': "relations changed",
+            'timing': "pulse program statements changed",
+        }[self.kind]
+        if self.fields:
+            text += f" ({', '.join(self.fields)})" if self.kind == 'metadata' else \
+                f"; metadata: {', '.join(self.fields)}"
+        return text
+
+    def __repr__(self):
+        return f"Change({self.file}, {self.kind}, {self.fields})"
+
+
+def compare(file: str, old: Optional[str], new: Optional[str]) -> Optional[Change]:
+    """Classify the change from ``old`` to ``new`` content; None if they are identical."""
+    if old == new:
+        return None
+    if old is None:
+        return Change(file, 'added', new_metadata=_annotation(new))
+    if new is None:
+        return Change(file, 'deleted', old_metadata=_annotation(old))
+    old_metadata, new_metadata = _annotation(old), _annotation(new)
+    changed = fields(old_metadata, new_metadata)
+    old_relations, old_statements = program(old)
+    new_relations, new_statements = program(new)
+    if old_statements != new_statements:
+        kind = 'timing'
+    elif old_relations != new_relations:
+        kind = 'relation'
+    elif changed:
+        kind = 'metadata'
+    else:
+        kind = 'cosmetic'
+    return Change(file, kind, changed, old_metadata, new_metadata)
+
+
+def merge_base(root: Path, base: str) -> Optional[str]:
+    output = gitlog.git(root, 'merge-base', base, 'HEAD')
+    return output.strip() if output else None
+
+
+def compare_files(corpus: Corpus, files: Iterable[Path], base: str = 'origin/main') -> Dict[str, Change]:
+    """
+    Changes of ``files`` (in the work tree) since their merge base with ``base``,
+    keyed by file as given. Unchanged files are left out; the result is empty
+    if ``base`` cannot be resolved.
+    """
+    root = corpus.root.resolve()
+    since = merge_base(root, base)
+    if since is None:
+        return {}
+    paths = {}
+    for file_path in files:
+        try:
+            paths[str(file_path)] = Path(file_path).resolve().relative_to(root).as_posix()
+        except ValueError:
+            continue
+    old = gitlog.read_blobs(root, (f'{since}:{path}' for path in paths.values()))
+    changes = {}
+    for name, path in paths.items():
+        file_path = Path(name)
+        new = corpus.source(file_path) if file_path.exists() else None
+        change = compare(name, old.get(f'{since}:{path}'), new)
+        if change is not None:
+            changes[name] = change
+    return changes
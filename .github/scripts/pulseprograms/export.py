@@ -0,0 +1,201 @@
+"""
+Streaming catalog export - one flat record per sequence as NDJSON or CSV.
+
+Records are written as each file is read, without caching sources or
+metadata, so memory use does not grow with the size of the catalog.
+
+A ``<output>.hwm`` file next to the export (the high-water mark) records
+the commit it was made at and a digest of every file as it was exported,
+committed or not. An incremental export appends records only for sequences
+whose content differs from that digest, plus a ``deleted`` record for
+removed ones; readers keep the last record per file. A file that no longer
+parses gets an ``error`` record rather than disappearing.
+"""
+import csv
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional
+
+from pulseprograms import gitlog
+from pulseprograms.corpus import Corpus
+from pulseprograms.crossref import block_fields
+from pulseprograms.pulseprogram import fingerprint
+
+DEFAULT_OUTPUT = "docs-generated/catalog.ndjson"
+
+# Columns every record has, ahead of the metadata fields
+RECORD_COLUMNS = [
+    'file', 'name', 'sequence_version', 'fingerprint', 'deleted', 'error',
+    'git.commit', 'git.date', 'git.author', 'git.email',
+]
+
+
+def flatten(metadata: Dict[str, Any], prefix: str = '') -> Dict[str, Any]:
+    """Flatten nested mappings into dotted keys ('cest.power'); lists are kept as values."""
+    flat = {}
+    for key, value in metadata.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        else:
+            flat[name] = value
+    return flat
+
+
+def csv_columns(schema: Dict[str, Any]) -> List[str]:
+    """
+    Fixed CSV header derived from the schema, so rows can be streamed.
+
+    Top-level properties become columns, experiment blocks contribute one
+    column per block_base field, and anything else lands in 'extra' as JSON.
+    """
+    blocks, _ = block_fields(schema)
+    base = schema.get('$defs', {}).get('block_base', {}).get('properties', {})
+    columns = list(RECORD_COLUMNS)
+    for name in schema.get('properties', {}):
+        if name in blocks:
+            columns.extend(f'{name}.{field}' for field in base)
+        elif name not in columns:
+            columns.append(name)
+    columns.append('extra')
+    return columns
+
+
+def _relative(corpus: Corpus, file_path: Path) -> Path:
+    try:
+        return file_path.resolve().relative_to(corpus.root.resolve())
+    except ValueError:
+        return file_path
+
+
+def records(corpus: Corpus, files: Iterable[Path], tombstones: bool = False) -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per annotated file.
+
+    With ``tombstones``, files that no longer exist or lost their metadata
+    yield a ``deleted`` record instead of being skipped. Files whose
+    metadata does not parse yield an ``error`` record.
+    """
+    files = list(files)
+    commits = gitlog.last_commits(corpus.root, [_relative(corpus, f) for f in files])
+    for file_path in files:
+        relative = _relative(corpus, file_path)
+        record = {'file': relative.as_posix(), 'name': file_path.name}
+        metadata = corpus.metadata(file_path, cache=False) if file_path.exists() else None
+        if metadata is None and file_path in corpus.errors:
+            record['deleted'] = False
+            record['error'] = corpus.errors[file_path]
+            yield record
+            continue
+        if metadata is None:
+            if tombstones:
+                record['deleted'] = True
+                yield record
+            continue
+        record['sequence_version'] = metadata.get('sequence_version')
+        record['fingerprint'] = fingerprint(corpus.source(file_path, cache=False))
+        record['deleted'] = False
+        for key, value in commits.get(relative, {}).items():
+            record[f'git.{key}'] = value
+        for key, value in flatten(metadata).items():
+            record.setdefault(key, value)
+        yield record
+
+
+class NDJSONWriter:
+    def __init__(self, stream, schema: Dict[str, Any], append: bool):
+        self.stream = stream
+
+    def write(self, record: Dict[str, Any]):
+        self.stream.write(json.dumps(record, sort_keys=True, default=str) + '\n')
+
+
+class CSVWriter:
+    def __init__(self, stream, schema: Dict[str, Any], append: bool):
+        self.columns = csv_columns(schema)
+        self.known = set(self.columns)
+        self.writer = csv.writer(stream)
+        if not append:
+            self.writer.writerow(self.columns)
+
+    @staticmethod
+    def cell(value: Any) -> str:
+        if value is None:
+            return ''
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, default=str)
+        return str(value)
+
+    def write(self, record: Dict[str, Any]):
+        extra = {key: value for key, value in record.items() if key not in self.known}
+        row = [self.cell(record.get(column)) for column in self.columns[:-1]]
+        row.append(json.dumps(extra, sort_keys=True, default=str) if extra else '')
+        self.writer.writerow(row)
+
+
+WRITERS = {'.csv': CSVWriter}
+
+
+def read_mark(output: Path) -> Optional[Dict[str, Any]]:
+    mark = output.with_name(output.name + '.hwm')
+    if not mark.exists() or not output.exists():
+        return None
+    with open(mark, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_mark(output: Path, commit: Optional[str], count: int, digests: Dict[str, str]):
+    mark = output.with_name(output.name + '.hwm')
+    with open(mark, 'w', encoding='utf-8') as f:
+        json.dump({
+            'commit': commit,
+            'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'records': count,
+            'files': digests,
+        }, f, indent=2, sort_keys=True)
+
+
+def digest(file_path: Path) -> str:
+    """Digest of a file's content as it is on disk."""
+    return hashlib.sha256(file_path.read_bytes()).hexdigest()
+
+
+def export(corpus: Corpus, output: str = DEFAULT_OUTPUT, incremental: bool = False) -> int:
+    """Write the catalog to ``output`` (CSV for .csv, NDJSON otherwise). Returns the record count."""
+    output_file = Path(output)
+    head = gitlog.head(corpus.root)
+    files = corpus.sequence_files()
+
+    current = {_relative(corpus, f).as_posix(): f for f in files}
+    digests = {name: digest(f) for name, f in current.items()}
+
+    mark = read_mark(output_file) if incremental else None
+    append = bool(mark) and isinstance(mark.get('files'), dict)
+    if append:
+        # Work-tree content, committed or not, compared with what was last exported
+        exported = mark['files']
+        removed = [name for name in exported if name not in current and not (corpus.root / name).exists()]
+        files = [f for name, f in current.items() if exported.get(name) != digests[name]]
+        files += [corpus.root / name for name in removed]
+        digests = {**{k: v for k, v in exported.items() if k not in removed}, **digests}
+        print(f"Incremental export since {str(mark.get('commit'))[:8]}: {len(files)} changed files")
+    elif incremental:
+        print("No usable high-water mark; exporting the full catalog")
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with open(output_file, 'a' if append else 'w', encoding='utf-8', newline='') as stream:
+        writer = WRITERS.get(output_file.suffix, NDJSONWriter)(stream, corpus.schema, append)
+        for record in records(corpus, files, tombstones=append):
+            writer.write(record)
+            count += 1
+    write_mark(output_file, head, count, digests)
+    return count
+
+
+def main(corpus: Optional[Corpus] = None, output: str = DEFAULT_OUTPUT, incremental: bool = False):
+    corpus = corpus or Corpus()
+    count = export(corpus, output, incremental)
+    print(f"Exported {count} records: {output}")
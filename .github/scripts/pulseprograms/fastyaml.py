@@ -0,0 +1,305 @@
+"""
+Restricted fast-path parser for ';@' annotation blocks.
+
+Handles the shapes used by sequence annotations - block mappings, block
+sequences of inline values, '|' literal blocks, quoted and plain scalars,
+and single-line flow lists/mappings such as ``[cest, 1d]`` or
+``{channel: f1, duration: p1}``. Plain scalars are resolved with PyYAML's
+own implicit resolvers and constructors, so results are identical to
+``yaml.safe_load``. Anything outside this subset raises Unsupported and the
+caller falls back to full YAML.
+"""
+import re
+from functools import lru_cache
+from typing import Dict, List, Any, Tuple
+
+from yaml.constructor import SafeConstructor
+from yaml.nodes import ScalarNode
+from yaml.reader import Reader
+from yaml.resolver import Resolver
+
+_KEY = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):(?:[ ]+(.*))?$')
+_STR_TAG = 'tag:yaml.org,2002:str'
+_SCALAR_TAGS = {
+    'tag:yaml.org,2002:str',
+    'tag:yaml.org,2002:int',
+    'tag:yaml.org,2002:float',
+    'tag:yaml.org,2002:bool',
+    'tag:yaml.org,2002:null',
+    'tag:yaml.org,2002:timestamp',
+}
+# Control characters and the line breaks YAML knows besides '\n' (NEL, LS, PS); characters
+# PyYAML rejects outright are Reader.NON_PRINTABLE
+_CONTROL = re.compile('[\x00-\x1f\x7f\x85\u2028\u2029]')
+# Characters that start something other than a plain scalar
+_INDICATORS = set('-?:,[]{}#&*!|>\'"%@`')
+_FLOW_STOP = set(',[]{}')
+_CONSTRUCTOR = SafeConstructor()
+
+
+class Unsupported(Exception):
+    """The block uses YAML beyond the fast-path subset."""
+
+
+@lru_cache(maxsize=4096)
+def plain_scalar(value: str) -> Any:
+    """Resolve and construct a plain scalar exactly as SafeLoader would."""
+    if not value:
+        raise Unsupported("empty plain scalar")
+    if value[0] in _INDICATORS and not (value[0] == '-' and value[1:2].isdigit()):
+        raise Unsupported(f"indicator at start of {value!r}")
+    if ': ' in value or ' #' in value or value.endswith(':'):
+        raise Unsupported(f"ambiguous plain scalar {value!r}")
+
+    tag = _STR_TAG
+    resolvers = (Resolver.yaml_implicit_resolvers.get(value[0], [])
+                 + Resolver.yaml_implicit_resolvers.get(None, []))
+    for candidate, regexp in resolvers:
+        if regexp.match(value):
+            tag = candidate
+            break
+    if tag not in _SCALAR_TAGS:
+        raise Unsupported(f"special tag {tag} for {value!r}")
+    if tag == _STR_TAG:
+        return value
+    try:
+        return SafeConstructor.yaml_constructors[tag](_CONSTRUCTOR, ScalarNode(tag, value))
+    except Exception:
+        # e.g. an impossible date; let full YAML report it
+        raise Unsupported(f"cannot construct {value!r}")
+
+
+def _quoted(text: str, pos: int) -> Tuple[str, int]:
+    """Parse a single-line quoted scalar without escapes starting at text[pos]."""
+    quote = text[pos]
+    end = text.find(quote, pos + 1)
+    if end < 0:
+        raise Unsupported("unterminated quoted scalar")
+    inner = text[pos + 1:end]
+    if quote == '"' and '\\' in inner:
+        raise Unsupported("escape sequence in double-quoted scalar")
+    if quote == "'" and text[end + 1:end + 2] == "'":
+        raise Unsupported("escaped quote in single-quoted scalar")
+    return inner, end + 1
+
+
+def _skip_spaces(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos] == ' ':
+        pos += 1
+    return pos
+
+
+def _flow_node(text: str, pos: int) -> Tuple[Any, int]:
+    """Parse a node inside a flow collection, returning (value, next position)."""
+    pos = _skip_spaces(text, pos)
+    if pos >= len(text):
+        raise Unsupported("unterminated flow collection")
+    char = text[pos]
+    if char == '[':
+        return _flow_sequence(text, pos)
+    if char == '{':
+        return _flow_mapping(text, pos)
+    if char in '"\'':
+        return _quoted(text, pos)
+    end = pos
+    while end < len(text) and text[end] not in _FLOW_STOP:
+        end += 1
+    value = text[pos:end].strip(' ')
+    # PyYAML also ends flow plain scalars at '?'
+    if ':' in value or '#' in value or '?' in value:
+        raise Unsupported(f"ambiguous flow scalar {value!r}")
+    return plain_scalar(value), end
+
+
+def _flow_sequence(text: str, pos: int) -> Tuple[List[Any], int]:
+    items = []
+    pos = _skip_spaces(text, pos + 1)
+    if text[pos:pos + 1] == ']':
+        return items, pos + 1
+    while True:
+        value, pos = _flow_node(text, pos)
+        items.append(value)
+        pos = _skip_spaces(text, pos)
+        char = text[pos:pos + 1]
+        if char == ']':
+            return items, pos + 1
+        if char != ',':
+            raise Unsupported("malformed flow sequence")
+        pos += 1
+
+
+def _flow_mapping(text: str, pos: int) -> Tuple[Dict[Any, Any], int]:
+    mapping = {}
+    pos = _skip_spaces(text, pos + 1)
+    if text[pos:pos + 1] == '}':
+        return mapping, pos + 1
+    while True:
+        pos = _skip_spaces(text, pos)
+        colon = text.find(':', pos)
+        if colon < 0 or text[colon + 1:colon + 2] != ' ':
+            raise Unsupported("malformed flow mapping key")
+        key_text = text[pos:colon].strip(' ')
+        if any(c in _FLOW_STOP or c in '?#' for c in key_text):
+            raise Unsupported("malformed flow mapping key")
+        key = plain_scalar(key_text)
+        value, pos = _flow_node(text, colon + 1)
+        mapping[key] = value
+        pos = _skip_spaces(text, pos)
+        char = text[pos:pos + 1]
+        if char == '}':
+            return mapping, pos + 1
+        if char != ',':
+            raise Unsupported("malformed flow mapping")
+        pos += 1
+
+
+def inline_value(text: str) -> Any:
+    """Parse a value written on the same line as its key or '-' indicator."""
+    text = text.rstrip(' ')
+    char = text[:1]
+    if char in ('[', '{', '"', "'"):
+        if char == '[':
+            value, end = _flow_sequence(text, 0)
+        elif char == '{':
+            value, end = _flow_mapping(text, 0)
+        else:
+            value, end = _quoted(text, 0)
+        if end != len(text):
+            raise Unsupported("trailing content after inline value")
+        return value
+    return plain_scalar(text)
+
+
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+class _BlockParser:
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+        self.i = 0
+
+    def _skip_blank(self):
+        while self.i < len(self.lines) and not self.lines[self.i]:
+            self.i += 1
+
+    def _expect_dedent(self, indent: int):
+        """A more-indented line after an inline value would continue the scalar."""
+        self._skip_blank()
+        if self.i < len(self.lines) and _indent(self.lines[self.i]) > indent:
+            raise Unsupported("multi-line plain scalar")
+
+    def mapping(self, indent: int) -> Dict[Any, Any]:
+        result = {}
+        while True:
+            self._skip_blank()
+            if self.i >= len(self.lines):
+                return result
+            line = self.lines[self.i]
+            ind = _indent(line)
+            if ind < indent or (ind == indent and line.startswith('- ', ind)):
+                return result
+            if ind > indent:
+                raise Unsupported("unexpected indentation")
+            match = _KEY.match(line, ind)
+            if not match:
+                raise Unsupported(f"not a simple key: {line!r}")
+            key = plain_scalar(match.group(1))
+            rest = (match.group(2) or '').rstrip(' ')
+            self.i += 1
+            if not rest:
+                result[key] = self.nested(indent)
+            elif rest == '|':
+                result[key] = self.literal(indent)
+            else:
+                result[key] = inline_value(rest)
+                self._expect_dedent(indent)
+
+    def nested(self, indent: int) -> Any:
+        """Parse the block value of a key with nothing after its colon."""
+        self._skip_blank()
+        if self.i >= len(self.lines):
+            return None
+        line = self.lines[self.i]
+        ind = _indent(line)
+        if line.startswith('- ', ind) and ind >= indent:
+            return self.sequence(ind)
+        if ind > indent:
+            return self.mapping(ind)
+        return None
+
+    def sequence(self, indent: int) -> List[Any]:
+        items = []
+        while True:
+            self._skip_blank()
+            if self.i >= len(self.lines):
+                return items
+            line = self.lines[self.i]
+            ind = _indent(line)
+            if ind < indent or (ind == indent and not line.startswith('- ', ind)):
+                return items
+            if ind > indent:
+                raise Unsupported("unexpected indentation in sequence")
+            rest = line[ind + 2:].strip(' ')
+            if not rest or rest[0] == '|':
+                raise Unsupported("nested block in sequence item")
+            items.append(inline_value(rest))
+            self.i += 1
+            self._expect_dedent(indent)
+
+    def literal(self, indent: int) -> str:
+        """Parse a '|' literal block scalar with clip chomping."""
+        start = self.i
+        block_indent = None
+        content = []
+        while self.i < len(self.lines):
+            line = self.lines[self.i]
+            if not line:
+                content.append('')
+                self.i += 1
+                continue
+            if not line.strip(' '):
+                raise Unsupported("whitespace-only line in literal block")
+            ind = _indent(line)
+            if block_indent is None:
+                if ind <= indent:
+                    break
+                block_indent = ind
+            elif ind < block_indent:
+                break
+            content.append(line[block_indent:])
+            self.i += 1
+
+        # Trailing empty lines belong to the following content, not the scalar
+        while content and not content[-1]:
+            content.pop()
+            self.i -= 1
+        if not content or block_indent is None:
+            self.i = start
+            raise Unsupported("empty literal block")
+        text = '\n'.join(content)
+        # Clip chomping keeps the final line break only if there is one
+        if self.i < len(self.lines):
+            text += '\n'
+        return text
+
+
+def parse_block(yaml_lines: List[str]) -> Dict[Any, Any]:
+    """
+    Parse annotation lines (';@' prefix already stripped) into a mapping.
+
+    Raises Unsupported if the block uses YAML outside the fast-path subset.
+    """
+    for line in yaml_lines:
+        if (_CONTROL.search(line) or Reader.NON_PRINTABLE.search(line)
+                or line.startswith(('#', '%', '---', '...'))):
+            raise Unsupported("control or non-printable characters, line breaks, comments or directives")
+    parser = _BlockParser(yaml_lines)
+    parser._skip_blank()
+    if parser.i >= len(yaml_lines):
+        raise Unsupported("empty block")
+    result = parser.mapping(0)
+    parser._skip_blank()
+    if parser.i < len(yaml_lines) or not result:
+        raise Unsupported("content outside the top-level mapping")
+    return result
@@ -0,0 +1,226 @@
+"""
+Federated catalog across several local sequence repositories.
+
+Repositories are given in order of precedence (the --root repository
+first). Each is scanned into records keyed by (repository, file, version);
+stale repositories are scanned in parallel, one process each. A repository
+is rescanned only when its HEAD has moved since the last run or its
+sequences/ directory has uncommitted changes; otherwise its records come
+from the cache file.
+
+A file name present in more than one repository resolves to the first
+repository that has it. The other copies are "duplicate" when they carry
+the same pulse program body (fingerprint) and sequence_version, and
+"shadowed" otherwise. The same body under a different file name is
+reported as a duplicate as well.
+"""
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+from pulseprograms import gitlog
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import fingerprint
+
+DEFAULT_CACHE = "docs-generated/federation-cache.json"
+CACHE_VERSION = 1
+
+
+def label(root: Path) -> str:
+    """Name of a repository: its origin remote as host/path, else its directory name."""
+    remote = (gitlog.git(root, 'remote', 'get-url', 'origin') or '').strip()
+    if remote and not re.match(r'^(?:file://|[./~]|[A-Za-z]:\\)', remote):
+        scp = '://' not in remote  # git@host:owner/repo
+        remote = re.sub(r'^(?:\w+://)?(?:[^@/]+@)?', '', remote)
+        if scp:
+            remote = remote.replace(':', '/', 1)
+        return re.sub(r'\.git$', '', remote.rstrip('/'))
+    return root.resolve().name
+
+
+def key(record: Dict[str, Any]) -> str:
+    return f"{record['repository']}:{record['file']}@{record['version']}"
+
+
+def _dirty(root: Path) -> bool:
+    return bool((gitlog.git(root, 'status', '--porcelain', '--', 'sequences') or '').strip())
+
+
+def scan(root: str, repository: str) -> List[Dict[str, Any]]:
+    """One record per annotated sequence of the repository at ``root``."""
+    corpus = Corpus(root)
+    records = []
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        if metadata is None:
+            continue
+        records.append({
+            'repository': repository,
+            'file': file_path.relative_to(corpus.root).as_posix(),
+            'name': file_path.name,
+            'version': metadata.get('sequence_version'),
+            'fingerprint': fingerprint(corpus.source(file_path)),
+            'metadata': metadata,
+        })
+    return records
+
+
+class Federation:
+    """Records of several repositories, resolved by precedence."""
+
+    def __init__(self, repositories: List[Dict[str, Any]]):
+        # Each entry: {'repository', 'root', 'head', 'records'}, in order of precedence
+        self.repositories = repositories
+        self.rescanned: List[str] = []
+
+    @classmethod
+    def load(cls, roots: Iterable[str], cache: str = DEFAULT_CACHE,
+             jobs: Optional[int] = None) -> 'Federation':
+        """Scan ``roots``, reusing cached records of repositories whose HEAD has not moved."""
+        cached = {}
+        try:
+            with open(cache, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                cached = {entry['root']: entry for entry in data['repositories']}
+        except (OSError, ValueError, KeyError):
+            pass
+
+        repositories = []
+        stale = []
+        for path in dict.fromkeys(Path(root).resolve() for root in roots):
+            head = gitlog.head(path)
+            entry = cached.get(str(path))
+            fresh = entry is not None and head is not None and entry['head'] == head and not _dirty(path)
+            if not fresh:
+                name = label(path)
+                if any(e['repository'] == name for e in repositories):
+                    name = f"{name} ({path.name})"  # e.g. a fork cloned from the same remote
+                entry = {'repository': name, 'root': str(path), 'head': head, 'records': None}
+                stale.append(entry)
+            repositories.append(entry)
+
+        jobs = jobs or os.cpu_count() or 1
+        if jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(jobs, len(stale))) as pool:
+                results = list(pool.map(scan, [e['root'] for e in stale], [e['repository'] for e in stale]))
+        else:
+            results = [scan(e['root'], e['repository']) for e in stale]
+        for entry, records in zip(stale, results):
+            entry['records'] = records
+
+        federation = cls(repositories)
+        federation.rescanned = [entry['repository'] for entry in stale]
+        Path(cache).parent.mkdir(parents=True, exist_ok=True)
+        with open(cache, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'repositories': repositories}, f, default=str)
+        return federation
+
+    def records(self) -> Dict[str, Dict[str, Any]]:
+        """Every record of every repository, keyed by (repository, file, version)."""
+        result = {}
+        for entry in self.repositories:
+            for record in entry['records']:
+                result[key(record)] = record
+        return result
+
+    def resolve(self) -> Tuple[Dict[str, Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        (name -> winning record, conflicts). Each conflict has 'kind'
+        ('shadowed' or 'duplicate'), 'record' (the winner's key) and 'other'.
+        """
+        winners: Dict[str, Dict[str, Any]] = {}
+        bodies: Dict[str, Dict[str, Any]] = {}
+        conflicts = []
+        for entry in self.repositories:
+            for record in entry['records']:
+                winner = winners.get(record['name'])
+                if winner is None:
+                    winners[record['name']] = record
+                    original = bodies.setdefault(record['fingerprint'], record)
+                    if original is not record:
+                        conflicts.append({'kind': 'duplicate', 'record': key(original), 'other': key(record)})
+                    continue
+                same = (winner['fingerprint'] == record['fingerprint']
+                        and winner['version'] == record['version'])
+                conflicts.append({'kind': 'duplicate' if same else 'shadowed',
+                                  'record': key(winner), 'other': key(record)})
+        return winners, conflicts
+
+    def index(self, schema_version: Optional[str] = None) -> Dict[str, Any]:
+        """Combined catalog index: catalog.build_index's layout plus repositories and conflicts."""
+        winners, conflicts = self.resolve()
+        others: Dict[str, List[str]] = {}
+        for conflict in conflicts:
+            others.setdefault(conflict['record'], []).append(conflict['other'])
+        sequences = {}
+        for name, record in winners.items():
+            sequences[name] = {
+                'file': record['file'],
+                'repository': record['repository'],
+                'key': key(record),
+                'metadata': record['metadata'],
+            }
+            if key(record) in others:
+                sequences[name]['shadows'] = others[key(record)]
+        return {
+            'schema_version': schema_version,
+            'repositories': [{'repository': e['repository'], 'root': e['root'], 'head': e['head']}
+                             for e in self.repositories],
+            'sequences': sequences,
+            'records': {k: {f: v for f, v in r.items() if f != 'metadata'} for k, r in self.records().items()},
+            'conflicts': conflicts,
+        }
+
+    def sequences(self, corpus: Corpus, history_for: Optional[Set[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """The winning sequences in the form docs.SequenceParser.parse_all_sequences() returns."""
+        from pulseprograms.docs import SequenceParser
+
+        parser = SequenceParser(corpus)
+        roots = {e['repository']: Path(e['root']) for e in self.repositories}
+        winners, conflicts = self.resolve()
+        also: Dict[str, List[str]] = {}
+        for conflict in conflicts:
+            also.setdefault(conflict['record'], []).append(f"{conflict['other']} ({conflict['kind']})")
+        sequences = {}
+        for name, record in winners.items():
+            file_path = roots[record['repository']] / record['file']
+            metadata = dict(record['metadata'])
+            metadata['_file_path'] = str(file_path)
+            metadata['_file_name'] = name
+            metadata['_repository'] = record['repository']
+            if key(record) in also:
+                metadata['_shadows'] = also[key(record)]
+            if history_for is None or name in history_for:
+                metadata['_git_history'] = parser.get_git_history(file_path)
+            sequences[name] = metadata
+        return sequences
+
+
+def report(federation: Federation):
+    for entry in federation.repositories:
+        state = "rescanned" if entry['repository'] in federation.rescanned else "unchanged"
+        head = (entry['head'] or 'no git')[:8]
+        print(f"  {entry['repository']} ({head}, {state}): {len(entry['records'])} sequences")
+    _, conflicts = federation.resolve()
+    for conflict in conflicts:
+        verb = "duplicates" if conflict['kind'] == 'duplicate' else "is shadowed by"
+        print(f"⚠️  {conflict['other']} {verb} {conflict['record']}")
+
+
+def main(corpus: Optional[Corpus], roots: List[str], output: str, cache: str = DEFAULT_CACHE):
+    """Write one index over the --root repository and every --repo."""
+    corpus = corpus or Corpus()
+    print(f"Scanning {len(roots) + 1} repositories...")
+    federation = Federation.load([str(corpus.root)] + list(roots), cache)
+    report(federation)
+    index = federation.index(corpus.schema.get('version'))
+
+    output_file = Path(output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True, default=str)
+    print(f"Indexed {len(index['sequences'])} sequences from {len(roots) + 1} repositories: {output_file}")
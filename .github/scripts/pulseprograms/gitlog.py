@@ -0,0 +1,108 @@
+"""
+Small git helpers shared by the catalog tasks.
+
+All functions return empty results outside a git work tree instead of
+raising, matching how the documentation generator treats missing history.
+"""
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Iterable, Optional
+
+# Record separator for 'git log' output that cannot occur in commit metadata
+_SEPARATOR = '\x1e'
+
+
+def git(root: Path, *args: str) -> Optional[str]:
+    """Run a git command in ``root`` and return stdout, or None if it fails."""
+    try:
+        result = subprocess.run(['git', *args], capture_output=True, text=True, cwd=root)
+    except OSError:
+        return None
+    return result.stdout if result.returncode == 0 else None
+
+
+def head(root: Path) -> Optional[str]:
+    """Full hash of HEAD, or None outside a repository."""
+    output = git(root, 'rev-parse', 'HEAD')
+    return output.strip() if output else None
+
+
+def changed_files(root: Path, since: str, paths: Iterable[str] = ('sequences',)) -> Optional[List[Path]]:
+    """
+    Files under ``paths`` changed between ``since`` and the work tree, relative to ``root``.
+
+    Includes uncommitted changes and untracked files. Returns None if
+    ``since`` is unknown to the repository (e.g. after a force push).
+    """
+    committed = git(root, 'diff', '--name-only', '--no-renames', since, '--', *paths)
+    if committed is None:
+        return None
+    untracked = git(root, 'ls-files', '--others', '--exclude-standard', '--', *paths) or ''
+    names = set(committed.split('\n')) | set(untracked.split('\n'))
+    return sorted(Path(name) for name in names if name)
+
+
+def last_commits(root: Path, files: Iterable[Path]) -> Dict[Path, Dict[str, str]]:
+    """
+    The most recent commit touching each file, from one streamed 'git log' pass.
+
+    Reading stops as soon as every requested file has been seen, so only the
+    history needed is walked.
+    """
+    wanted = {Path(f).as_posix() for f in files}
+    found: Dict[Path, Dict[str, str]] = {}
+    if not wanted:
+        return found
+    try:
+        process = subprocess.Popen(
+            ['git', 'log', f'--format={_SEPARATOR}%H|%aI|%an|%ae', '--name-only', '--no-renames',
+             '--', *sorted({str(Path(f).parent) for f in wanted})],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, cwd=root)
+    except OSError:
+        return found
+    commit = None
+    try:
+        for line in process.stdout:
+            line = line.rstrip('\n')
+            if line.startswith(_SEPARATOR):
+                sha, date, author, email = line[1:].split('|', 3)
+                commit = {'commit': sha, 'date': date, 'author': author, 'email': email}
+            elif line and commit is not None and line in wanted:
+                found.setdefault(Path(line), commit)
+                if len(found) == len(wanted):
+                    break
+    finally:
+        process.stdout.close()
+        process.kill()
+        process.wait()
+    return found
+
+
+def read_blobs(root: Path, names: Iterable[str]) -> Dict[str, str]:
+    """
+    Contents of blobs from one 'git cat-file --batch', keyed by the names
+    asked for: hashes or '<rev>:<path>'. Missing objects are left out.
+    """
+    wanted = list(dict.fromkeys(names))
+    contents: Dict[str, str] = {}
+    if not wanted:
+        return contents
+    try:
+        result = subprocess.run(['git', 'cat-file', '--batch'], capture_output=True, cwd=root,
+                                input=''.join(f'{name}\n' for name in wanted).encode())
+    except OSError:
+        return contents
+    output, pos = result.stdout, 0
+    # One response per name, in order: '<sha> <type> <size>\n<content>\n' or '<name> missing\n'
+    for name in wanted:
+        end = output.find(b'\n', pos)
+        if end < 0:
+            break
+        header = output[pos:end].decode(errors='replace').split()
+        pos = end + 1
+        if len(header) != 3 or not header[2].isdigit():
+            continue
+        size = int(header[2])
+        contents[name] = output[pos:pos + size].decode('utf-8', errors='replace')
+        pos += size + 1
+    return contents
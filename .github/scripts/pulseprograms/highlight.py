@@ -0,0 +1,158 @@
+"""
+Syntax highlighting of Bruker pulse programs for the generated pages.
+
+BrukerLexer is a Pygments lexer for pulse-program bodies. Each run of ';@'
+annotation lines is lexed as one YAML document, so block scalars and nested
+lists highlight as they would in a .yaml file. The lexer is also registered
+as a Pygments plugin (entry point 'bruker' in pyproject.toml), so ```bruker
+fences in the hand-written docs use it too.
+
+Highlighted HTML is cached per file content in DEFAULT_CACHE, one file per
+content hash. A docs build therefore only re-highlights sequences that
+changed. Cached HTML is dropped when this module or Pygments changes.
+
+Requires Pygments (``pip install -e .[docs]``; MkDocs Material installs it).
+"""
+import hashlib
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import pygments
+from pygments import highlight as render
+from pygments.formatters import HtmlFormatter
+from pygments.lexer import RegexLexer, bygroups, do_insertions, words
+from pygments.lexers.data import YamlLexer
+from pygments.token import Comment, Keyword, Name, Number, Operator, Punctuation, String, Whitespace
+
+from pulseprograms.metadata import annotation_line
+
+DEFAULT_CACHE = "docs-generated/highlight-cache"
+# Same wrapper classes pymdownx.highlight gives a ```bruker fence, so the theme styles it alike
+CSS_CLASS = 'language-bruker highlight'
+
+# Parameter families of the acquisition parameters (p1, d11, plw25, cnst4, ...)
+_PARAMETERS = (r'(?:p|d|pl|plw|pldb|sp|spw|spdb|spnam|spoffs|spoal|gp|gpz|gpx|gpy|gpnam|cnst|l|in|inp|inf|'
+               r'cpd|cpds|cpdprg|pcpd|vd|vc|vp|vdlist|td|ns|ds|de|aq|dw|nbl|o|sfo|bf)\d*\b')
+
+
+class BrukerLexer(RegexLexer):
+    """Bruker TopSpin pulse programs, with the ';@' annotation lexed as YAML."""
+
+    name = 'Bruker pulse program'
+    aliases = ['bruker', 'pulseprogram']
+    filenames = ['*.cw']
+    mimetypes = ['text/x-bruker-pulseprogram']
+
+    tokens = {
+        'root': [
+            (r'^([ \t]*)(#\s*include)([ \t]*)([<"][^>"\n]*[>"])',
+             bygroups(Whitespace, Comment.Preproc, Whitespace, String.Other)),
+            (r'^([ \t]*)(#\s*[a-z]+.*)', bygroups(Whitespace, Comment.Preproc)),
+            (r'^([ \t]*)(\d+)(?=[ \t])', bygroups(Whitespace, Name.Label)),
+            (r'\n', Whitespace),
+            (r'[ \t\r]+', Whitespace),
+            (r';.*', Comment.Single),
+            (r'/\*', Comment.Multiline, 'comment'),
+            (r'"', String.Double, 'relation'),
+            (r'(define)(\s+)(list)(\s*)(<)(\w+)(>)',
+             bygroups(Keyword.Declaration, Whitespace, Keyword.Type, Whitespace, Punctuation,
+                      Keyword.Type, Punctuation)),
+            (words(('define', 'delay', 'pulse', 'loopcounter', 'gradient', 'frequency', 'power', 'nucleus'),
+                   suffix=r'\b'), Keyword.Declaration),
+            (r'<\$?\w+>', String.Other),
+            (words(('lo', 'to', 'times', 'goto', 'go', 'gosc', 'mc', 'exit', 'ze', 'zd', 'wr', 'if', 'else',
+                    'center', 'prosol', 'relations', 'do', 'cw', 'fq'), prefix=r'\b', suffix=r'\b'), Keyword),
+            (r'\b(?:F[1-6](?:QF|PH|EA|I|D)|calclc|calph|calgrad|calgradf|MC)\b', Keyword),
+            (r'\b(?:UNBLKGRAD|BLKGRAD|HaltAcqu|aqseq|setnmr\d*|trigpe\d*|trigne\d*)\b', Name.Builtin),
+            (r'\b[idr](?:u|d|p|pp|pu)\d+\b', Name.Builtin),
+            (r'(:)(f\d)\b', bygroups(Punctuation, Name.Tag)),
+            (r'(:)(r)\b', bygroups(Punctuation, Name.Tag)),
+            (r'\bph\d+\b', Name.Variable),
+            (r'\b' + _PARAMETERS, Name.Builtin),
+            (r'\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?:[mu]p|[umns])?\b', Number),
+            (r'[A-Za-z_]\w*', Name),
+            (r'[-+*/^=<>!&|]', Operator),
+            (r'[(){}\[\].,:#$]', Punctuation),
+        ],
+        'comment': [
+            (r'[^*]+', Comment.Multiline),
+            (r'\*+/', Comment.Multiline, '#pop'),
+            (r'\*+', Comment.Multiline),
+        ],
+        'relation': [
+            (r'"', String.Double, '#pop'),
+            (r'\n', Whitespace),
+            (r'\b' + _PARAMETERS, Name.Builtin),
+            (r'\d+(?:\.\d+)?(?:[eE][-+]?\d+)?[umns]?\b', Number),
+            (r'[A-Za-z_]\w*', Name),
+            (r'[-+*/^=<>!&|]', Operator),
+            (r'[^"\w\n]', Punctuation),
+        ],
+    }
+
+    def get_tokens_unprocessed(self, text: str, stack: Tuple[str, ...] = ('root',)) -> Iterator[Tuple]:
+        """Body text through the rules above; each run of ';@' lines through YamlLexer."""
+        for start, lines, header in _runs(text):
+            if not header:
+                for index, token, value in super().get_tokens_unprocessed(''.join(lines), stack):
+                    yield start + index, token, value
+                continue
+            yaml, insertions = '', []
+            for line in lines:
+                column = annotation_line(line.rstrip('\n'))[0]
+                insertions.append((len(yaml), [(0, Comment.Special, line[:column])]))
+                yaml += line[column:]
+            tokens = do_insertions(insertions, YamlLexer(**self.options).get_tokens_unprocessed(yaml))
+            position = start
+            for _, token, value in tokens:
+                yield position, token, value
+                position += len(value)
+
+
+def _runs(text: str) -> Iterator[Tuple[int, List[str], bool]]:
+    """(offset, lines, is annotation) for each run of annotation or body lines."""
+    start, lines, header = 0, [], False
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        annotated = annotation_line(line.rstrip('\n')) is not None
+        if lines and annotated != header:
+            yield start, lines, header
+            start, lines = offset, []
+        header = annotated
+        lines.append(line)
+        offset += len(line)
+    if lines:
+        yield start, lines, header
+
+
+def version() -> str:
+    """Digest of what highlighted HTML depends on besides the source."""
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    digest.update(pygments.__version__.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class Highlighter:
+    """Renders sources to HTML through the per-content cache; counts hits and misses."""
+
+    def __init__(self, cache: str = DEFAULT_CACHE):
+        self.cache = Path(cache)
+        self.version = version()
+        self.lexer = BrukerLexer(stripnl=False, ensurenl=True)
+        self.formatter = HtmlFormatter(cssclass=CSS_CLASS, wrapcode=True)
+        self.hits = self.misses = 0
+
+    def html(self, source: str) -> str:
+        key = hashlib.sha256((self.version + source).encode('utf-8')).hexdigest()
+        path = self.cache / f'{key}.html'
+        try:
+            html = path.read_text(encoding='utf-8')
+            self.hits += 1
+            return html
+        except OSError:
+            pass
+        html = render(source, self.lexer, self.formatter)
+        self.cache.mkdir(parents=True, exist_ok=True)
+        path.write_text(html, encoding='utf-8')
+        self.misses += 1
+        return html
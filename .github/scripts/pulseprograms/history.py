@@ -0,0 +1,208 @@
+"""
+Time-travel index of every committed version of every sequence.
+
+One 'git log --first-parent --raw' pass over sequences/ lists each change
+with the hash of the blob it produced. Distinct blobs are read together
+with one 'git cat-file --batch' and their annotations parsed once, so
+identical contents (reverts, copies, unchanged files across commits) are
+stored once. The index is written next to the catalog index and updated
+incrementally: a later run walks only the commits after the recorded head,
+unless history was rewritten.
+
+Lookups are made on the loaded index without git: a sequence at a given
+sequence_version is a dictionary lookup, and the version in effect on a
+date is a bisection over that file's own changes (a handful per file).
+Dates are commit dates on the first-parent line of HEAD, i.e. when a change
+landed on the branch.
+"""
+import bisect
+import itertools
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+
+from pulseprograms import gitlog
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import parse_metadata
+from pulseprograms.pulseprogram import fingerprint
+
+DEFAULT_OUTPUT = "docs-generated/docs/history.json"
+INDEX_VERSION = 1
+
+_SEPARATOR = '\x1e'
+_DELETED = '0' * 40
+
+
+def utc(date: str) -> str:
+    """An ISO 8601 date or timestamp as a sortable UTC timestamp; a bare date is the end of that day."""
+    if len(date) == 10:
+        date += 'T23:59:59+00:00'
+    parsed = datetime.fromisoformat(date.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def walk(root: Path, since: Optional[str] = None) -> Iterator[Tuple[str, str, str, Optional[str]]]:
+    """(commit, UTC date, file name, blob or None if deleted) for every change, oldest first."""
+    output = gitlog.git(root, 'log', '--first-parent', '-m', '--raw', '--no-renames', '--no-abbrev',
+                        '--reverse', f'--format={_SEPARATOR}%H|%cI',
+                        f'{since}..HEAD' if since else 'HEAD', '--', 'sequences')
+    commit = date = None
+    for line in (output or '').split('\n'):
+        if line.startswith(_SEPARATOR):
+            commit, date = line[1:].split('|', 1)
+            date = utc(date)
+        elif line.startswith(':') and commit is not None:
+            fields, _, path = line.partition('\t')
+            blob = fields.split()[3]
+            path = Path(path)
+            if path.parent.as_posix() != 'sequences' or path.name == 'README.md':
+                continue
+            yield commit, date, path.name, None if blob == _DELETED else blob
+
+
+def _describe(content: str) -> Dict[str, Any]:
+    try:
+        metadata = parse_metadata(content) or {}
+    except Exception:
+        metadata = {}
+    return {
+        'sequence_version': metadata.get('sequence_version'),
+        'schema_version': metadata.get('schema_version'),
+        'fingerprint': fingerprint(content),
+    }
+
+
+class History:
+    """
+    Loaded history index. ``files`` maps each file name to its changes,
+    oldest first, as [date, commit, blob]; ``blobs`` describes each blob once.
+    """
+
+    def __init__(self, head: Optional[str] = None, files: Optional[Dict[str, List[List[Any]]]] = None,
+                 blobs: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.head = head
+        self.files = files or {}
+        self.blobs = blobs or {}
+        self._lookups()
+
+    def _lookups(self):
+        # Running maxima: a change cannot take effect before the one it follows,
+        # whatever the commit dates say, and bisection needs sorted keys
+        self._dates = {name: list(itertools.accumulate((change[0] for change in changes), max))
+                       for name, changes in self.files.items()}
+        self._versions: Dict[str, Dict[str, int]] = {}
+        for name, changes in self.files.items():
+            versions = self._versions[name] = {}
+            for position, (_, _, blob) in enumerate(changes):
+                version = self.blobs[blob]['sequence_version'] if blob else None
+                if version is not None:
+                    versions[str(version)] = position  # the last content carrying the version
+
+    @classmethod
+    def load(cls, path: str) -> 'History':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if data.get('version') != INDEX_VERSION:
+            return cls()
+        return cls(data.get('head'), data.get('files'), data.get('blobs'))
+
+    def save(self, path: str):
+        output = Path(path)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'head': self.head, 'files': self.files,
+                       'blobs': self.blobs}, f, sort_keys=True)
+
+    def update(self, root: Path) -> int:
+        """Add the commits since the recorded head (all of them after a rewrite); returns changes added."""
+        head = gitlog.head(root)
+        if head is None or head == self.head:
+            return 0
+        since = self.head
+        if since and gitlog.git(root, 'merge-base', '--is-ancestor', since, 'HEAD') is None:
+            since = None
+        if since is None:
+            self.files, self.blobs = {}, {}
+        changes = list(walk(root, since))
+        contents = gitlog.read_blobs(root, (blob for _, _, _, blob in changes
+                                            if blob and blob not in self.blobs))
+        for blob, content in contents.items():
+            self.blobs[blob] = _describe(content)
+        for commit, date, name, blob in changes:
+            self.files.setdefault(name, []).append([date, commit, blob if blob in self.blobs else None])
+        self.head = head
+        self._lookups()
+        return len(changes)
+
+    def _entry(self, name: str, position: int) -> Optional[Dict[str, Any]]:
+        changes = self.files[name]
+        date, commit, blob = changes[position]
+        if blob is None:
+            return None
+        return {
+            'file': name,
+            'blob': blob,
+            'commit': commit,
+            'date': date,
+            'until': self._dates[name][position + 1] if position + 1 < len(changes) else None,
+            **self.blobs[blob],
+        }
+
+    def versions(self, name: str) -> List[str]:
+        return list(self._versions.get(name, {}))
+
+    def at_version(self, name: str, version: str) -> Optional[Dict[str, Any]]:
+        """The last committed content of ``name`` carrying sequence_version ``version``."""
+        position = self._versions.get(name, {}).get(str(version))
+        return None if position is None else self._entry(name, position)
+
+    def at_date(self, name: str, date: str) -> Optional[Dict[str, Any]]:
+        """The content of ``name`` in effect at ``date`` (ISO; a bare date means end of day)."""
+        position = bisect.bisect_right(self._dates.get(name, []), utc(date)) - 1
+        return None if position < 0 else self._entry(name, position)
+
+    def find(self, spec: str) -> Optional[Dict[str, Any]]:
+        """'19f_r1.cw@0.1.2' (a version) or '19f_r1.cw@2026-01-15' (a date)."""
+        name, _, when = spec.partition('@')
+        if not when:
+            return self.at_date(name, datetime.now(timezone.utc).isoformat())
+        if name in self._versions and when in self._versions[name]:
+            return self.at_version(name, when)
+        try:
+            return self.at_date(name, when)
+        except ValueError:
+            return None
+
+
+def main(corpus: Optional[Corpus] = None, output: str = DEFAULT_OUTPUT, show: Optional[str] = None) -> bool:
+    """
+    Update the history index; with ``show`` ('name@version' or 'name@date')
+    print only that sequence's committed content.
+    """
+    corpus = corpus or Corpus()
+    history = History.load(output)
+    added = history.update(corpus.root)
+    if added:
+        history.save(output)
+    if show:
+        entry = history.find(show)
+        if entry is None:
+            print(f"✗ No committed content for {show}")
+            return False
+        content = gitlog.read_blobs(corpus.root, [entry['blob']]).get(entry['blob'])
+        if content is None:
+            print(f"✗ Blob {entry['blob']} of {show} is not in this repository")
+            return False
+        print(content, end='')
+        return True
+
+    versions = sum(len(history.versions(name)) for name in history.files)
+    print(f"✓ History of {len(history.files)} sequences: {versions} versions in {len(history.blobs)} "
+          f"distinct blobs ({added} new changes): {output}")
+    return True
@@ -0,0 +1,334 @@
+"""
+Static analysis of pulse-program bodies - mistakes that otherwise only show
+up when the program is compiled or run on the spectrometer.
+
+Each rule in RULES is a plain function over a Source: its code lines, its
+preprocessor directives and its statement trees (pulseprogram.parse).
+Rules that follow the program flow run on every build: without -D names
+and with each '#ifdef'/'#ifndef' name set on its own, so code in every
+branch is checked. A problem found only in some builds names them.
+
+Results are cached per file content in DEFAULT_CACHE and dropped when the
+rules change; the remaining files are linted in parallel worker processes.
+The lint task prints the time spent in each rule.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import Conditional, Program, Statement, code_lines, parse
+from pulseprograms.report import Report, finding
+
+DEFAULT_CACHE = "docs-generated/lint-cache.json"
+CACHE_VERSION = 1
+# A cache holding more contents than this is rewritten with only the current ones
+MAX_CACHED = 4096
+# Fewer files than this are linted in-process; workers would cost more than they save
+PARALLEL_THRESHOLD = 32
+# Files with more '#ifdef' names than this are checked in the default build only
+MAX_BUILDS = 16
+
+_CONDITIONAL = re.compile(r'^\s*#\s*(ifdef|ifndef|else|endif)\b\s*(\w*)')
+_LIST = re.compile(r'^\s*define\s+list\s*<\s*\w+\s*>\s+([A-Za-z_]\w*)')
+_IDENTIFIER = re.compile(r'(?<![\w.])[A-Za-z_]\w*')
+
+# (line, message)
+Problem = Tuple[int, str]
+
+
+class Source:
+    """One pulse program as the rules see it; statement trees are built on first use."""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.lines = list(code_lines(content))
+        self.directives = [(number, match.group(1), match.group(2)) for number, match in
+                           ((number, _CONDITIONAL.match(code)) for number, code in self.lines) if match]
+        self._builds: Optional[List[Tuple[Optional[str], Program]]] = None
+
+    @property
+    def builds(self) -> List[Tuple[Optional[str], Program]]:
+        """(-D name, statement tree) of the default build (None) and each single -D build."""
+        if self._builds is None:
+            names = sorted({name for _, kind, name in self.directives if kind in ('ifdef', 'ifndef') and name})
+            self._builds = [(None, parse(self.content))]
+            if len(names) <= MAX_BUILDS:
+                self._builds += [(name, parse(self.content, [name])) for name in names]
+        return self._builds
+
+
+def every_build(check: Callable[[Program], List[Problem]]) -> Callable[[Source], List[Problem]]:
+    """Run a rule over one statement tree on every build of the source."""
+    def rule(source: Source) -> List[Problem]:
+        found: Dict[Problem, List[Optional[str]]] = {}
+        for name, program in source.builds:
+            for problem in check(program):
+                found.setdefault(problem, []).append(name)
+        return [(line, message if None in names else f"{message} (with {', '.join('-D' + n for n in names)})")
+                for (line, message), names in found.items()]
+    rule.__name__ = check.__name__
+    rule.__doc__ = check.__doc__
+    return rule
+
+
+def unbalanced_directives(source: Source) -> List[Problem]:
+    """Stray '#else'/'#endif' and '#ifdef' blocks left open."""
+    problems = []
+    open_blocks: List[List[Any]] = []  # [line, kind, name, seen '#else']
+    for number, kind, name in source.directives:
+        if kind in ('ifdef', 'ifndef'):
+            open_blocks.append([number, kind, name, False])
+        elif not open_blocks:
+            problems.append((number, f"'#{kind}' without a matching '#ifdef'"))
+        elif kind == 'else':
+            if open_blocks[-1][3]:
+                problems.append((number, f"second '#else' for '#{open_blocks[-1][1]} {open_blocks[-1][2]}' "
+                                         f"(line {open_blocks[-1][0]})"))
+            open_blocks[-1][3] = True
+        else:
+            open_blocks.pop()
+    for number, kind, name, _ in open_blocks:
+        problems.append((number, f"'#{kind} {name}' is never closed with '#endif'"))
+    return problems
+
+
+@every_build
+def undefined_labels(program: Program) -> List[Problem]:
+    """Jumps ('go=', 'lo to', 'goto', 'mc #0 to') to labels that do not exist, and duplicate labels."""
+    problems = []
+    labels: Dict[str, int] = {}
+    statements = list(program.statements())
+    for statement in statements:
+        if statement.label is None:
+            continue
+        if statement.label in labels:
+            problems.append((statement.line, f"label {statement.label} is already defined on line "
+                                             f"{labels[statement.label]}"))
+        labels.setdefault(statement.label, statement.line)
+    for statement in statements:
+        for label in statement.jumps:
+            if label not in labels:
+                problems.append((statement.line, f"jump to label {label}, which is not defined"))
+    return problems
+
+
+def unused_lists(source: Source) -> List[Problem]:
+    """'define list' declarations whose name appears nowhere else."""
+    declared = {}
+    used = set()
+    for number, code in source.lines:
+        match = _LIST.match(code)
+        if match:
+            declared.setdefault(match.group(1), number)
+            code = code[match.end():]
+        used.update(_IDENTIFIER.findall(code))
+    return [(number, f"list '{name}' is defined but never used")
+            for name, number in declared.items() if name not in used]
+
+
+def _blanking(nodes: List[Any], unblanked: Optional[bool], since: Optional[int],
+              problems: List[Problem]) -> Tuple[Optional[bool], Optional[int]]:
+    """Follow UNBLKGRAD/BLKGRAD through ``nodes``; None means it depends on the branch taken."""
+    for node in nodes:
+        if isinstance(node, Conditional):
+            then = _blanking(node.then, unblanked, since, problems)
+            otherwise = _blanking(node.otherwise, unblanked, since, problems)
+            unblanked, since = then if then == otherwise else (None, then[1] or otherwise[1])
+            continue
+        if not isinstance(node, Statement):
+            continue
+        if 'UNBLKGRAD' in node.instructions:
+            unblanked, since = True, node.line
+        if unblanked is False:
+            for group in node.groups:
+                for element in group:
+                    if element.kind == 'gradient':
+                        problems.append((node.line, f"gradient {element.power} while the gradient amplifier "
+                                                    f"is blanked; UNBLKGRAD is missing before it"))
+        if 'BLKGRAD' in node.instructions:
+            unblanked, since = False, None
+    return unblanked, since
+
+
+@every_build
+def gradient_blanking(program: Program) -> List[Problem]:
+    """Gradients outside UNBLKGRAD ... BLKGRAD, and an amplifier left unblanked at the end."""
+    problems: List[Problem] = []
+    unblanked, since = _blanking(program.nodes, False, None, problems)
+    if unblanked and since is not None:
+        problems.append((since, "UNBLKGRAD is not followed by BLKGRAD before the program ends"))
+    return problems
+
+
+@every_build
+def unset_power(program: Program) -> List[Problem]:
+    """Hard pulses, cw and cpd on a channel before its first power switch (shaped pulses carry their own)."""
+    problems = []
+    powered = set()
+    for statement in program.statements():
+        used = [(element.duration, element.channel) for group in statement.groups for element in group
+                if element.kind == 'rf' and element.power is None]
+        for action, channel, argument in statement.actions:
+            if action == 'power':
+                powered.add(channel)
+            elif action in ('cw', 'cpd'):
+                used.append((argument or action, channel))
+        for name, channel in used:
+            if channel not in powered:
+                powered.add(channel)  # reported once per channel
+                problems.append((statement.line, f"{name} on {channel} before any power level is set "
+                                                 f"on {channel}"))
+    return problems
+
+
+# Rule id -> (level, rule); a rule returns (line, message) pairs
+RULES: Dict[str, Tuple[str, Callable[[Source], List[Problem]]]] = {
+    'lint.directive': ('error', unbalanced_directives),
+    'lint.label': ('error', undefined_labels),
+    'lint.unused_list': ('warning', unused_lists),
+    'lint.gradient': ('warning', gradient_blanking),
+    'lint.power': ('warning', unset_power),
+}
+
+
+def ruleset() -> str:
+    """Digest of the code the results depend on, so a cache does not outlive a rule change."""
+    digest = hashlib.sha256()
+    for module in ('lint.py', 'pulseprogram.py'):
+        digest.update((Path(__file__).parent / module).read_bytes())
+    return digest.hexdigest()
+
+
+def lint_source(content: str) -> Tuple[List[Dict[str, Any]], Dict[str, float]]:
+    """
+    Run every rule on one file. Returns its problems as {'rule', 'level',
+    'line', 'message'} dicts, ordered by line, and the seconds spent per rule.
+    """
+    source = Source(content)
+    problems = []
+    timings = {}
+    for rule, (level, check) in RULES.items():
+        start = time.perf_counter()
+        seen = set()
+        for line, message in check(source):
+            if (line, message) not in seen:
+                seen.add((line, message))
+                problems.append({'rule': rule, 'level': level, 'line': line, 'message': message})
+        timings[rule] = time.perf_counter() - start
+    problems.sort(key=lambda p: p['line'])
+    return problems, timings
+
+
+def check_source(file: str, content: str) -> List[Dict[str, Any]]:
+    """Findings of every rule for one file."""
+    return [finding(file, p['message'], p['rule'], level=p['level'], line=p['line'])
+            for p in lint_source(content)[0]]
+
+
+def _lint_batch(contents: List[str]) -> List[Tuple[List[Dict[str, Any]], Dict[str, float]]]:
+    return [lint_source(content) for content in contents]
+
+
+class Linter:
+    """Lints a corpus through the content cache; ``timings`` adds up the seconds per rule."""
+
+    def __init__(self, cache: str = DEFAULT_CACHE):
+        self.cache = cache
+        self.ruleset = ruleset()
+        self.results: Dict[str, List[Dict[str, Any]]] = {}
+        self.timings = {rule: 0.0 for rule in RULES}
+        self.cached = 0
+        try:
+            with open(cache, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION and data.get('rules') == self.ruleset:
+                self.results = data['files']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def run(self, corpus: Corpus, jobs: Optional[int] = None) -> Dict[Path, List[Dict[str, Any]]]:
+        """Findings per sequence file; files whose content was linted before come from the cache."""
+        files = corpus.sequence_files()
+        digests = {}
+        pending: Dict[str, str] = {}
+        for file_path in files:
+            content = corpus.source(file_path)
+            digest = digests[file_path] = hashlib.sha256(content.encode('utf-8')).hexdigest()
+            if digest not in self.results:
+                pending[digest] = content
+        self.cached = len(files) - sum(1 for d in digests.values() if d in pending)
+
+        work = list(pending.values())
+        jobs = jobs or os.cpu_count() or 1
+        if jobs <= 1 or len(work) < PARALLEL_THRESHOLD:
+            linted = _lint_batch(work)
+        else:
+            # A few large batches per worker keeps pickling overhead low
+            size = max(1, len(work) // (jobs * 4))
+            batches = [work[i:i + size] for i in range(0, len(work), size)]
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                linted = [r for batch in pool.map(_lint_batch, batches) for r in batch]
+        for digest, (problems, timings) in zip(pending, linted):
+            self.results[digest] = problems
+            for rule, seconds in timings.items():
+                self.timings[rule] += seconds
+
+        if pending:
+            self.save(set(digests.values()))
+        return {file_path: [finding(str(file_path), p['message'], p['rule'], level=p['level'], line=p['line'])
+                            for p in self.results[digest]]
+                for file_path, digest in digests.items()}
+
+    def save(self, current: set):
+        if len(self.results) > MAX_CACHED:
+            self.results = {digest: problems for digest, problems in self.results.items() if digest in current}
+        output = Path(self.cache)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'rules': self.ruleset, 'files': self.results}, f)
+
+
+def check_lint(corpus: Corpus, report: Optional[Report] = None, jobs: Optional[int] = None,
+               linter: Optional[Linter] = None) -> bool:
+    """Lint every pulse program; fails only on findings at error level."""
+    print("Linting pulse program bodies...")
+    linter = linter or Linter()
+    results = linter.run(corpus, jobs)
+
+    errors = warnings = 0
+    for file_path, findings in results.items():
+        if report is not None:
+            report.extend(file_path, findings)
+        for f in findings:
+            if f['level'] == 'error':
+                print(f"✗ {file_path}:{f['line']}: {f['message']}")
+                errors += 1
+            elif f['level'] == 'warning':
+                print(f"⚠️ {file_path}:{f['line']}: {f['message']}")
+                warnings += 1
+
+    if errors or warnings:
+        print(f"Lint: {errors} errors and {warnings} warnings in pulse program bodies")
+    else:
+        print("No problems found in pulse program bodies!")
+    return errors == 0
+
+
+def main(corpus: Optional[Corpus] = None, report: Optional[Report] = None, cache: str = DEFAULT_CACHE) -> bool:
+    """Lint the corpus and print the time spent in each rule."""
+    corpus = corpus or Corpus()
+    linter = Linter(cache)
+    start = time.perf_counter()
+    success = check_lint(corpus, report, linter=linter)
+    elapsed = time.perf_counter() - start
+    files = len(corpus.sequence_files())
+    print(f"Linted {files} files in {elapsed:.2f}s ({linter.cached} from the cache)")
+    for rule, seconds in sorted(linter.timings.items(), key=lambda item: -item[1]):
+        print(f"  {rule:<18} {seconds * 1000:8.1f} ms")
+    return success
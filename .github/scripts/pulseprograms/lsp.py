@@ -0,0 +1,378 @@
+"""
+Language server for ';@' annotations in pulse program files (stdio, JSON-RPC).
+
+Provides schema diagnostics, completions for field names and controlled
+vocabularies (experiment_type, features, status, channels f1-f8) and hover
+documentation. Documents use incremental sync: an edit that does not touch a
+';@' line only shifts the cached header positions, and the header is only
+re-parsed and re-validated when its YAML text actually changes.
+"""
+import json
+import re
+import sys
+from typing import Dict, List, Any, Optional, Tuple
+
+import yaml
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import (AnnotationLine, annotation_line, compose,
+                                    extract_annotation, locate, parse_yaml_lines)
+from pulseprograms.schema import iter_leaf_errors
+
+# LSP constants
+_SYNC_INCREMENTAL = 2
+_ERROR = 1
+_WARNING = 2
+_KIND_FIELD = 5
+_KIND_VALUE = 12
+_MESSAGE_ERROR = 1
+
+_KEY_BEFORE = re.compile(r'([A-Za-z_][A-Za-z0-9_]*):[ ]*')
+_WORD = re.compile(r'[A-Za-z0-9_.-]+')
+
+
+class Document:
+    """An open text document with a cached view of its annotation header."""
+
+    def __init__(self, uri: str, text: str, version: int = 0):
+        self.uri = uri
+        self.version = version
+        self.lines = text.split('\n')
+        self.annotation: List[AnnotationLine] = extract_annotation(text)
+        self.header_text: Optional[str] = None
+        self.diagnostics: List[Tuple[int, int, int, int, int, str]] = []
+
+    @property
+    def yaml_lines(self) -> List[str]:
+        return [text for _, _, text in self.annotation]
+
+    def apply_change(self, change: Dict[str, Any]):
+        """Apply one TextDocumentContentChangeEvent, keeping the header index current."""
+        if 'range' not in change:
+            self.lines = change['text'].split('\n')
+            self.annotation = extract_annotation(change['text'])
+            return
+
+        start, end = change['range']['start'], change['range']['end']
+        first, last = start['line'], end['line']
+        head = self.lines[first][:start['character']] if first < len(self.lines) else ''
+        tail = self.lines[last][end['character']:] if last < len(self.lines) else ''
+        new_lines = (head + change['text'] + tail).split('\n')
+        self.lines[first:last + 1] = new_lines
+        delta = len(new_lines) - (last - first + 1)
+
+        # Re-read only the edited lines; header entries below the edit just shift
+        annotation = [a for a in self.annotation if a[0] < first]
+        for offset, line in enumerate(new_lines):
+            parsed = annotation_line(line) if ';@' in line else None
+            if parsed is not None:
+                annotation.append((first + offset, parsed[0], parsed[1]))
+        annotation.extend((n + delta, column, text) for n, column, text in self.annotation if n > last)
+        self.annotation = annotation
+
+    def position(self, yaml_line: int, yaml_column: int) -> Tuple[int, int]:
+        """Map a position in the extracted YAML text to a file position."""
+        if not self.annotation:
+            return 0, 0
+        yaml_line = min(yaml_line, len(self.annotation) - 1)
+        line, column, text = self.annotation[yaml_line]
+        return line, column + min(yaml_column, len(text))
+
+
+class Server:
+    def __init__(self, corpus: Corpus, stdin=None, stdout=None):
+        self.corpus = corpus
+        self.stdin = stdin or sys.stdin.buffer
+        self.stdout = stdout or sys.stdout.buffer
+        self.documents: Dict[str, Document] = {}
+        self.vocabulary = corpus.vocabulary.descriptions
+        self.running = True
+
+    # -- transport -------------------------------------------------------
+
+    def read_message(self) -> Optional[Dict[str, Any]]:
+        length = None
+        while True:
+            header = self.stdin.readline()
+            if not header:
+                return None
+            header = header.strip()
+            if not header:
+                break
+            name, _, value = header.decode('ascii').partition(':')
+            if name.lower() == 'content-length':
+                length = int(value)
+        if length is None:
+            return None
+        return json.loads(self.stdin.read(length).decode('utf-8'))
+
+    def send(self, message: Dict[str, Any]):
+        message['jsonrpc'] = '2.0'
+        body = json.dumps(message).encode('utf-8')
+        self.stdout.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+        self.stdout.flush()
+
+    def notify(self, method: str, params: Dict[str, Any]):
+        self.send({'method': method, 'params': params})
+
+    def serve(self):
+        while self.running:
+            message = self.read_message()
+            if message is None:
+                break
+            self.dispatch(message)
+
+    def dispatch(self, message: Dict[str, Any]):
+        method = message.get('method')
+        handler = getattr(self, 'on_' + method.replace('/', '_').replace('$', '_'), None) if method else None
+        if 'id' not in message:
+            if handler is None:
+                return
+            try:
+                handler(message.get('params') or {})
+            except Exception as e:
+                # A notification has no response to carry the error; keep serving
+                text = f"{method} failed: {type(e).__name__}: {e}"
+                print(f"pulseprograms lsp: {text}", file=sys.stderr)
+                self.notify('window/logMessage', {'type': _MESSAGE_ERROR, 'message': text})
+            return
+        if handler is None:
+            self.send({'id': message['id'], 'error': {'code': -32601, 'message': f"unknown method {method}"}})
+            return
+        try:
+            result = handler(message.get('params') or {})
+        except Exception as e:
+            self.send({'id': message['id'], 'error': {'code': -32603, 'message': str(e)}})
+            return
+        self.send({'id': message['id'], 'result': result})
+
+    # -- lifecycle -------------------------------------------------------
+
+    def on_initialize(self, params):
+        # Compile the schema up front so the first keystroke is fast
+        self.corpus.validator
+        return {
+            'capabilities': {
+                'textDocumentSync': {'openClose': True, 'change': _SYNC_INCREMENTAL},
+                'completionProvider': {'triggerCharacters': [' ', '[', ',', ':']},
+                'hoverProvider': True,
+            },
+            'serverInfo': {'name': 'pulseprograms'},
+        }
+
+    def on_initialized(self, params):
+        pass
+
+    def on_shutdown(self, params):
+        return None
+
+    def on_exit(self, params):
+        self.running = False
+
+    # -- documents -------------------------------------------------------
+
+    def on_textDocument_didOpen(self, params):
+        item = params['textDocument']
+        document = Document(item['uri'], item['text'], item.get('version', 0))
+        self.documents[document.uri] = document
+        self.refresh(document)
+
+    def on_textDocument_didChange(self, params):
+        document = self.documents.get(params['textDocument']['uri'])
+        if document is None:
+            return
+        document.version = params['textDocument'].get('version', document.version)
+        for change in params['contentChanges']:
+            document.apply_change(change)
+        self.refresh(document)
+
+    def on_textDocument_didClose(self, params):
+        uri = params['textDocument']['uri']
+        self.documents.pop(uri, None)
+        self.notify('textDocument/publishDiagnostics', {'uri': uri, 'diagnostics': []})
+
+    def refresh(self, document: Document):
+        """Revalidate the header if its text changed, then publish diagnostics."""
+        yaml_lines = document.yaml_lines
+        header_text = '\n'.join(yaml_lines)
+        if header_text != document.header_text:
+            document.header_text = header_text
+            document.diagnostics = self.diagnose(yaml_lines)
+
+        diagnostics = []
+        for line, column, end_line, end_column, severity, message in document.diagnostics:
+            start = document.position(line, column)
+            end = document.position(end_line, end_column)
+            if end <= start:
+                # Empty or multi-line ranges: underline to the end of the start line
+                end = (start[0], len(document.lines[start[0]]) if start[0] < len(document.lines) else start[1])
+            diagnostics.append({
+                'range': {'start': {'line': start[0], 'character': start[1]},
+                          'end': {'line': end[0], 'character': end[1]}},
+                'severity': severity,
+                'source': 'pulseprograms',
+                'message': message,
+            })
+        self.notify('textDocument/publishDiagnostics', {
+            'uri': document.uri, 'version': document.version, 'diagnostics': diagnostics})
+
+    def diagnose(self, yaml_lines: List[str]) -> List[Tuple[int, int, int, int, int, str]]:
+        """Schema and syntax problems of a header, in YAML coordinates."""
+        if not yaml_lines:
+            return [(0, 0, 0, 0, _WARNING, "No ';@' metadata found")]
+        try:
+            metadata = parse_yaml_lines(yaml_lines)
+        except yaml.MarkedYAMLError as e:
+            mark = e.problem_mark or e.context_mark
+            line, column = (mark.line, mark.column) if mark else (0, 0)
+            return [(line, column, line, column, _ERROR, f"YAML syntax error: {e.problem or e}")]
+        except Exception as e:
+            return [(0, 0, 0, 0, _ERROR, str(e))]
+        if metadata is None:
+            return [(0, 0, 0, 0, _WARNING, "No metadata found")]
+
+        diagnostics = []
+        node = None
+        for error in iter_leaf_errors(self.corpus.validator, metadata):
+            if node is None:
+                # Only invalid headers pay for a second, position-tracking parse
+                node = compose(yaml_lines)
+            path = list(error.absolute_path)
+            line, column, end_line, end_column = locate(node, path)
+            if error.validator == 'required':
+                # Missing keys are reported at the start of the mapping that should hold them
+                end_line, end_column = line, column
+            location = '.'.join(str(p) for p in path)
+            message = f"{location}: {error.message}" if location else error.message
+            diagnostics.append((line, column, end_line, end_column, _ERROR, message))
+        return diagnostics
+
+    # -- completion and hover -------------------------------------------
+
+    def _block_properties(self) -> Dict[str, Any]:
+        return self.corpus.schema.get('$defs', {}).get('block_base', {}).get('properties', {})
+
+    def _channels(self) -> List[str]:
+        pattern = self._block_properties().get('channel', {}).get('pattern', '')
+        match = re.fullmatch(r'\^(\w+)\[(\d)-(\d)\]\$', pattern)
+        if not match:
+            return []
+        prefix, low, high = match.group(1), int(match.group(2)), int(match.group(3))
+        return [f"{prefix}{i}" for i in range(low, high + 1)]
+
+    def _parent_key(self, document: Document, index: int) -> Optional[str]:
+        """The key owning annotation line ``index`` (None at top level)."""
+        text = document.annotation[index][2]
+        indent = len(text) - len(text.lstrip(' '))
+        is_item = text.lstrip(' ').startswith('-')
+        for _, _, previous in reversed(document.annotation[:index]):
+            stripped = previous.lstrip(' ')
+            if not stripped:
+                continue
+            previous_indent = len(previous) - len(stripped)
+            if previous_indent < indent or (is_item and previous_indent == indent and not stripped.startswith('-')):
+                match = _KEY_BEFORE.match(stripped)
+                return match.group(1) if match else None
+        return None
+
+    def _value_choices(self, key: str) -> List[Tuple[str, str]]:
+        properties = self.corpus.schema.get('properties', {})
+        if key in self.vocabulary and self.vocabulary[key]:
+            return sorted(self.vocabulary[key].items())
+        if key == 'experiment_type':
+            return [(v, '') for v in properties[key].get('items', {}).get('enum', [])]
+        if key == 'channel':
+            return [(c, "Spectrometer channel") for c in self._channels()]
+        enum = properties.get(key, {}).get('enum')
+        return [(v, '') for v in enum] if enum else []
+
+    def _context(self, document: Document, line: int, character: int) -> Optional[Tuple[str, Optional[str]]]:
+        """Return ('key', parent) or ('value', key) for a cursor on a ';@' line."""
+        index = next((i for i, a in enumerate(document.annotation) if a[0] == line), None)
+        if index is None:
+            return None
+        _, column, text = document.annotation[index]
+        prefix = text[:max(0, character - column)]
+
+        # Inside a flow collection: the innermost '{' expects keys after ',' or '{'
+        depth = []
+        for i, char in enumerate(prefix):
+            if char in '[{':
+                depth.append((char, i))
+            elif char in ']}' and depth:
+                depth.pop()
+        keys = list(_KEY_BEFORE.finditer(prefix))
+        if depth and depth[-1][0] == '{':
+            segment = prefix[depth[-1][1] + 1:]
+            last_sep = max(segment.rfind(','), -1)
+            if ':' not in segment[last_sep + 1:]:
+                owners = [k.group(1) for k in keys if k.start() < depth[-1][1]]
+                return 'key', owners[-1] if owners else None
+        if keys:
+            return 'value', keys[-1].group(1)
+        if prefix.lstrip(' ').startswith('-'):
+            return 'value', self._parent_key(document, index)
+        parent = self._parent_key(document, index)
+        return 'key', parent
+
+    def on_textDocument_completion(self, params):
+        document = self.documents.get(params['textDocument']['uri'])
+        if document is None:
+            return []
+        position = params['position']
+        context = self._context(document, position['line'], position['character'])
+        if context is None:
+            return []
+        kind, name = context
+        items = []
+        if kind == 'key':
+            properties = self.corpus.schema.get('properties', {}) if name is None else self._block_properties()
+            for key, prop in properties.items():
+                items.append({'label': key, 'kind': _KIND_FIELD,
+                              'detail': prop.get('description', ''), 'insertText': f"{key}: "})
+        elif name is not None:
+            for value, description in self._value_choices(name):
+                items.append({'label': value, 'kind': _KIND_VALUE, 'detail': description})
+        return {'isIncomplete': False, 'items': items}
+
+    def on_textDocument_hover(self, params):
+        document = self.documents.get(params['textDocument']['uri'])
+        if document is None:
+            return None
+        line, character = params['position']['line'], params['position']['character']
+        if line >= len(document.lines) or not any(a[0] == line for a in document.annotation):
+            return None
+        match = next((m for m in _WORD.finditer(document.lines[line])
+                      if m.start() <= character <= m.end()), None)
+        if match is None:
+            return None
+        word = match.group(0)
+        is_key = document.lines[line][match.end():match.end() + 1] == ':'
+
+        if not is_key:
+            for field, terms in self.vocabulary.items():
+                if word in terms:
+                    return {'contents': {'kind': 'markdown',
+                                         'value': f"**{word}** ({field})\n\n{terms[word]}"}}
+            return None
+
+        schema = self.corpus.schema
+        prop = schema.get('properties', {}).get(word) or self._block_properties().get(word)
+        if prop is None:
+            return None
+        description = prop.get('description')
+        if not description:
+            # Experiment blocks describe themselves through the $def they extend
+            for ref in prop.get('allOf', []):
+                name = ref.get('$ref', '').rsplit('/', 1)[-1]
+                description = schema.get('$defs', {}).get(name, {}).get('description')
+        text = f"**{word}**"
+        if description:
+            text += f"\n\n{description.strip()}"
+        if word in schema.get('required', []):
+            text += "\n\n*required*"
+        return {'contents': {'kind': 'markdown', 'value': text}}
+
+
+def main(corpus: Optional[Corpus] = None):
+    Server(corpus or Corpus()).serve()
@@ -0,0 +1,161 @@
+"""
+Extraction of the ``;@`` YAML annotation block from pulse program files.
+"""
+from datetime import date
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+
+import yaml
+
+from pulseprograms import fastyaml
+
+# libyaml's C loader is several times faster when PyYAML was built with it
+SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# (file line, column where the YAML text starts, YAML text), all 0-based
+AnnotationLine = Tuple[int, int, str]
+
+
+def load_yaml(text: str) -> Any:
+    """yaml.safe_load using the C loader where available."""
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def annotation_line(line: str) -> Optional[Tuple[int, str]]:
+    """Split one source line into (column, YAML text) if it is a ';@' line."""
+    stripped = line.strip()
+    if not stripped.startswith(';@'):
+        return None
+    column = len(line) - len(line.lstrip()) + 2
+    # Remove ';@' prefix but preserve indentation after it
+    yaml_line = stripped[2:]
+    if yaml_line.startswith(' '):
+        yaml_line = yaml_line[1:]  # Remove one space after ';@'
+        column += 1
+    return column, yaml_line
+
+
+def extract_annotation(content: str) -> List[AnnotationLine]:
+    """Return every ';@' line with its position in the file."""
+    annotation = []
+    for number, line in enumerate(content.split('\n')):
+        if ';@' in line:
+            parsed = annotation_line(line)
+            if parsed is not None:
+                annotation.append((number, parsed[0], parsed[1]))
+    return annotation
+
+
+def extract_yaml_lines(content: str) -> List[str]:
+    """Return the YAML lines of all ';@' comments, with the prefix stripped."""
+    return [text for _, _, text in extract_annotation(content)]
+
+
+def parse_yaml_lines(yaml_lines: Sequence[str]) -> Optional[Dict[str, Any]]:
+    """Parse already-extracted annotation lines; see parse_metadata."""
+    if not yaml_lines:
+        return None
+
+    # Common annotation shapes take the fast path; anything else is full YAML
+    try:
+        metadata = fastyaml.parse_block(list(yaml_lines))
+    except fastyaml.Unsupported:
+        metadata = load_yaml('\n'.join(yaml_lines))
+    if metadata is None:
+        return None
+    if not isinstance(metadata, dict):
+        raise ValueError("metadata block is not a YAML mapping")
+
+    # Convert date objects to strings for JSON schema validation
+    for key, value in metadata.items():
+        if isinstance(value, date):
+            metadata[key] = value.isoformat()
+
+    return metadata
+
+
+def parse_metadata(content: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the annotation block of a sequence file.
+
+    Returns None if the file has no ';@' lines. Raises yaml.YAMLError on
+    syntax errors and ValueError if the block is not a mapping.
+    """
+    return parse_yaml_lines(extract_yaml_lines(content))
+
+
+def compose(yaml_lines: Sequence[str]) -> Optional[yaml.Node]:
+    """Compose annotation lines into a YAML node tree carrying source marks."""
+    return yaml.compose('\n'.join(yaml_lines), Loader=SafeLoader)
+
+
+def locate(node: Optional[yaml.Node], path: Sequence[Any]) -> Tuple[int, int, int, int]:
+    """
+    Find the YAML range of the node at a jsonschema instance path.
+
+    ``node`` is the result of compose(). Returns (start line, start column,
+    end line, end column) in YAML coordinates. Paths that do not resolve stop
+    at the deepest node found; a mapping key is reported by its value's range.
+    """
+    if node is None:
+        return 0, 0, 0, 0
+    for part in path:
+        child = None
+        if isinstance(node, yaml.MappingNode):
+            for key, value in node.value:
+                if key.value == str(part):
+                    child = value
+                    break
+        elif isinstance(node, yaml.SequenceNode) and isinstance(part, int) and part < len(node.value):
+            child = node.value[part]
+        if child is None:
+            break
+        node = child
+    start, end = node.start_mark, node.end_mark
+    return start.line, start.column, end.line, end.column
+
+
+def file_range(annotation: Sequence[AnnotationLine],
+               yaml_range: Tuple[int, int, int, int]) -> Tuple[int, int, int, int]:
+    """
+    Map a YAML range (see locate) to 1-based (line, column, end line, end column)
+    in the sequence file. Ranges ending past the block are clamped to its last line.
+    """
+    if not annotation:
+        return 1, 1, 1, 1
+
+    def position(line: int, column: int) -> Tuple[int, int]:
+        if line >= len(annotation):
+            number, offset, text = annotation[-1]
+            return number + 1, offset + len(text) + 1
+        number, offset, _ = annotation[line]
+        return number + 1, offset + column + 1
+
+    start_line, start_col, end_line, end_col = yaml_range
+    line, column = position(start_line, start_col)
+    if end_col == 0 and end_line > start_line:
+        # block nodes end at column 0 of the following line
+        end = position(end_line - 1, len(annotation[min(end_line, len(annotation)) - 1][2]))
+    else:
+        end = position(end_line, end_col)
+    return line, column, end[0], end[1]
+
+
+def locator(content: str) -> Callable[[Sequence[Any]], Tuple[int, int, int, int]]:
+    """
+    Return a function mapping instance paths to 1-based file ranges (see file_range).
+
+    The annotation is composed on the first call only, so files without
+    findings never pay for the position-tracking parse.
+    """
+    annotation = extract_annotation(content)
+    cache = {}
+
+    def position(path: Sequence[Any]) -> Tuple[int, int, int, int]:
+        if 'root' not in cache:
+            try:
+                cache['root'] = compose([text for _, _, text in annotation])
+            except yaml.YAMLError:
+                cache['root'] = None
+        return file_range(annotation, locate(cache['root'], path))
+
+    return position
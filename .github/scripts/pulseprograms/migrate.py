@@ -0,0 +1,238 @@
+"""
+Schema migrations - upgrade ';@' annotations to the current schema version.
+
+Each schema version with a successor declares, as data (MIGRATIONS), the
+steps that carry an annotation forward; steps chain automatically until a
+file reaches the version of schemas/current. Steps edit the ';@' lines in
+place at the positions of the composed YAML nodes, so indentation, comments,
+quoting and the pulse program body are kept byte for byte and a migration
+diff shows only the fields that actually changed. Vocabulary steps map
+terms to their spelling in VOCABULARY.md and leave unknown terms alone.
+"""
+import difflib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+import yaml
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.metadata import compose, extract_annotation, load_yaml
+from pulseprograms.vocabulary import normalize
+
+# Steps from each schema version to the next; every step also sets schema_version
+MIGRATIONS: Dict[str, Tuple[str, List[Dict[str, Any]]]] = {
+    '0.0.1': ('0.0.2', [
+        # DECISIONS.md 2025-11-14: rename nuclei_hint to typical_nuclei
+        {'op': 'rename', 'field': 'nuclei_hint', 'to': 'typical_nuclei'},
+    ]),
+    '0.0.2': ('0.0.3', [
+        # experiment_type became an enum of VOCABULARY.md terms (DECISIONS.md 2025-11-15)
+        {'op': 'canonicalize', 'field': 'experiment_type'},
+    ]),
+}
+
+PARALLEL_THRESHOLD = 64
+
+
+class MigrationError(Exception):
+    pass
+
+
+def chain(version: str, target: str) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """The (next version, steps) hops from ``version`` to ``target``."""
+    hops = []
+    while version != target:
+        if version not in MIGRATIONS:
+            raise MigrationError(f"no migration from schema {version} to {target}")
+        version, steps = MIGRATIONS[version]
+        hops.append((version, steps))
+    return hops
+
+
+def scalar(value: str, style: Optional[str]) -> str:
+    """Render a string in the quoting style of the scalar it replaces."""
+    if style == "'":
+        return "'" + value.replace("'", "''") + "'"
+    if not style and value and load_yaml(value) == value:
+        return value
+    return json.dumps(value)
+
+
+class Annotation:
+    """The lines of one sequence file with in-place edits of its ';@' block."""
+
+    def __init__(self, content: str):
+        self.lines = content.split('\n')
+        self.refresh()
+
+    def refresh(self):
+        self.annotation = extract_annotation('\n'.join(self.lines))
+        self.root = compose([text for _, _, text in self.annotation])
+        if self.root is not None and not isinstance(self.root, yaml.MappingNode):
+            raise MigrationError("metadata block is not a YAML mapping")
+        self.edits: List[Tuple[int, int, int, str]] = []
+
+    def entry(self, field: str) -> Optional[Tuple[yaml.Node, yaml.Node]]:
+        for key, value in self.root.value:
+            if key.value == field:
+                return key, value
+        return None
+
+    def replace(self, node: yaml.Node, text: str):
+        """Queue replacing a single-line node with ``text``."""
+        start, end = node.start_mark, node.end_mark
+        if start.line != end.line:
+            raise MigrationError(f"cannot rewrite multi-line value on annotation line {start.line + 1}")
+        number, offset, _ = self.annotation[start.line]
+        self.edits.append((number, offset + start.column, offset + end.column, text))
+
+    def apply(self):
+        # right to left, so earlier edits on a line keep their columns
+        for number, start, end, text in sorted(self.edits, reverse=True):
+            line = self.lines[number]
+            self.lines[number] = line[:start] + text + line[end:]
+        self.refresh()
+
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+
+# field -> {normalized spelling: VOCABULARY.md term}, as VocabularyIndex.variants
+Variants = Dict[str, Dict[str, str]]
+
+
+def _rename(annotation: Annotation, step: Dict[str, Any], notes: List[str], variants: Variants):
+    found = annotation.entry(step['field'])
+    if found is None:
+        return
+    if annotation.entry(step['to']) is not None:
+        notes.append(f"both {step['field']} and {step['to']} are present; {step['field']} left as is")
+        return
+    annotation.replace(found[0], step['to'])
+
+
+def _canonicalize(annotation: Annotation, step: Dict[str, Any], notes: List[str], variants: Variants):
+    """Respell terms as VOCABULARY.md does ('States-TPPI' -> 'states_tppi', 'r1' -> 'R1')."""
+    found = annotation.entry(step['field'])
+    if found is None:
+        return
+    value = found[1]
+    terms = variants.get(step['field'], {})
+    items = value.value if isinstance(value, yaml.SequenceNode) else [value]
+    for item in items:
+        if not isinstance(item, yaml.ScalarNode):
+            continue
+        term = terms.get(normalize(item.value))
+        if term is None:
+            notes.append(f"{step['field']}: {item.value!r} is not in VOCABULARY.md; left as is")
+        elif term != item.value:
+            annotation.replace(item, scalar(term, item.style))
+
+
+OPERATIONS = {
+    'rename': _rename,
+    'canonicalize': _canonicalize,
+}
+
+
+def migrate_source(content: str, target: str,
+                   variants: Optional[Variants] = None) -> Tuple[str, Optional[str], List[str]]:
+    """
+    Upgrade one file's annotation to ``target``, respelling vocabulary terms from ``variants``.
+
+    Returns (new content, original schema version, notes). Files without an
+    annotation or already at ``target`` are returned unchanged.
+    """
+    annotation = Annotation(content)
+    if annotation.root is None:
+        return content, None, []
+    found = annotation.entry('schema_version')
+    version = found[1].value if found else None
+    if version is None:
+        raise MigrationError("no schema_version to migrate from")
+    if version == target:
+        return content, version, []
+    notes: List[str] = []
+    for next_version, steps in chain(version, target):
+        for step in steps:
+            OPERATIONS[step['op']](annotation, step, notes, variants or {})
+        annotation.apply()
+        found = annotation.entry('schema_version')
+        annotation.replace(found[1], scalar(next_version, found[1].style))
+        annotation.apply()
+    return annotation.text(), version, notes
+
+
+def _migrate_batch(batch: List[str], target: str, variants: Variants) -> List[Dict[str, Any]]:
+    results = []
+    for path in batch:
+        result = {'file': path, 'from': None, 'content': None, 'migrated': None, 'notes': [], 'error': None}
+        try:
+            # newline='' keeps CRLF line endings as they are
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                result['content'] = f.read()
+            if ';@' in result['content']:
+                migrated, result['from'], result['notes'] = migrate_source(result['content'], target, variants)
+                if migrated != result['content']:
+                    result['migrated'] = migrated
+        except (OSError, UnicodeDecodeError, yaml.YAMLError, MigrationError) as e:
+            result['error'] = str(e).replace('\n', ' ')
+        if result['migrated'] is None:
+            result['content'] = None  # nothing to diff; keep the results small
+        results.append(result)
+    return results
+
+
+def migrate_files(files: Iterable[Path], target: str, jobs: Optional[int] = None,
+                  variants: Optional[Variants] = None) -> List[Dict[str, Any]]:
+    """Migrate files in memory, in parallel for large corpora. Nothing is written."""
+    variants = variants or {}
+    work = [str(f) for f in files]
+    jobs = jobs or os.cpu_count() or 1
+    if jobs <= 1 or len(work) < PARALLEL_THRESHOLD:
+        return _migrate_batch(work, target, variants)
+    size = max(1, len(work) // (jobs * 4))
+    batches = [work[i:i + size] for i in range(0, len(work), size)]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return [r for batch in pool.map(_migrate_batch, batches, [target] * len(batches),
+                                                  [variants] * len(batches))
+                for r in batch]
+
+
+def diff(result: Dict[str, Any]) -> str:
+    return ''.join(difflib.unified_diff(
+        result['content'].splitlines(keepends=True), result['migrated'].splitlines(keepends=True),
+        fromfile=f"a/{result['file']}", tofile=f"b/{result['file']}"))
+
+
+def main(corpus: Optional[Corpus] = None, dry_run: bool = False, jobs: Optional[int] = None) -> bool:
+    """Upgrade every sequence to the current schema version; with ``dry_run`` print a diff instead."""
+    corpus = corpus or Corpus()
+    target = corpus.schema.get('version')
+    print(f"Migrating annotations to schema {target}{' (dry run)' if dry_run else ''}...")
+    results = migrate_files(corpus.sequence_files(), target, jobs, corpus.vocabulary.variants)
+
+    migrated = failed = 0
+    for result in results:
+        for note in result['notes']:
+            print(f"⚠️  {result['file']} - {note}")
+        if result['error']:
+            failed += 1
+            print(f"✗ {result['file']} - {result['error']}")
+        elif result['migrated'] is not None:
+            migrated += 1
+            if dry_run:
+                print(diff(result), end='')
+            else:
+                with open(result['file'], 'w', encoding='utf-8', newline='') as f:
+                    f.write(result['migrated'])
+                corpus.invalidate(Path(result['file']))
+                print(f"✓ {result['file']} - {result['from']} -> {target}")
+
+    verb = "Would migrate" if dry_run else "Migrated"
+    print(f"{verb} {migrated} of {len(results)} files to schema {target}"
+          + (f"; {failed} could not be migrated" if failed else ""))
+    return failed == 0
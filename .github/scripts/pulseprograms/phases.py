@@ -0,0 +1,272 @@
+"""
+Phase-cycle expansion and receiver-phase consistency checks.
+
+Phase programs ('ph1 = 0 2 2 0', 'ph3 = (8) {0 2}*2^1') are expanded to
+NumPy arrays and laid out over the full cycle; a program continues on the
+lines of steps that follow its definition. The coherence pathways the
+cycle selects are found by testing every combination of coherence-order
+changes (|dp| <= MAX_ORDER_CHANGE per cycled phase program) against the
+receiver in one array operation: a pathway is kept when its signal phase,
+-sum(dp * phase), follows the receiver up to a constant over the cycle.
+
+Requires numpy (``pip install -e .[analysis]``).
+"""
+import itertools
+import math
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import PHASE_CONTINUATION, code_lines
+from pulseprograms.report import Report, finding
+
+_DEFINITION = re.compile(r'^\s*ph(\d+)\s*=\s*(.*?)\s*$')
+_DIVISOR = re.compile(r'^\((?:float\s*)?(\d+)\)\s*')
+_REFERENCE = re.compile(r'(?<![\w.])ph(\d+)\b')
+_RECEIVER = re.compile(r'\bgo\w*\s*(?:=\s*\w+\s*)?ph(\d+)\b')
+_TOKEN = re.compile(r'\s*(\{|\}|[*^]\s*-?\d+|-?\d+)')
+
+DEFAULT_DIVISOR = 4
+DEFAULT_RECEIVER = 'ph31'
+MAX_ORDER_CHANGE = 2
+# Beyond this many cycled phase programs the pathway search is skipped (5**8 candidates)
+MAX_CYCLED = 8
+
+
+class PhaseSyntaxError(ValueError):
+    pass
+
+
+def _expand_tokens(tokens: List[str], pos: int, divisor: int) -> Tuple[List[int], int]:
+    """Expand tokens from ``pos`` up to a closing brace; returns (steps, next position)."""
+    steps: List[int] = []
+    while pos < len(tokens) and tokens[pos] != '}':
+        if tokens[pos] == '{':
+            group, pos = _expand_tokens(tokens, pos + 1, divisor)
+            if pos >= len(tokens):
+                raise PhaseSyntaxError("unbalanced '{'")
+            pos += 1
+        elif tokens[pos][0] in '*^':
+            raise PhaseSyntaxError(f"'{tokens[pos]}' does not follow a value or group")
+        else:
+            group = [int(tokens[pos])]
+            pos += 1
+        # '*n' repeats the group n times, '^k' appends a copy advanced by k
+        while pos < len(tokens) and tokens[pos][0] in '*^':
+            amount = int(tokens[pos][1:])
+            if tokens[pos][0] == '*':
+                group = group * amount
+            else:
+                group = group + [(step + amount) % divisor for step in group]
+            pos += 1
+        steps.extend(group)
+    return steps, pos
+
+
+def expand(text: str) -> Tuple[np.ndarray, int]:
+    """
+    Expand one phase program definition (the text after '=').
+
+    Returns (steps, divisor): phases in units of 360/divisor degrees.
+    """
+    divisor = DEFAULT_DIVISOR
+    match = _DIVISOR.match(text)
+    if match:
+        divisor = int(match.group(1))
+        text = text[match.end():]
+    tokens = []
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            if text[pos:].strip():
+                raise PhaseSyntaxError(f"unexpected '{text[pos:].strip()[:10]}'")
+            break
+        tokens.append(match.group(1).replace(' ', ''))
+        pos = match.end()
+    steps, pos = _expand_tokens(tokens, 0, divisor)
+    if pos < len(tokens):
+        raise PhaseSyntaxError("unbalanced '}'")
+    if not steps or divisor <= 0:
+        raise PhaseSyntaxError("empty phase program")
+    return np.array(steps, dtype=np.int64) % divisor, divisor
+
+
+class PhaseCycle:
+    """The phase programs of one pulse program, expanded over the full cycle."""
+
+    def __init__(self, programs: Dict[str, Tuple[np.ndarray, int]], lines: Dict[str, int],
+                 used: Dict[str, int], receiver: str, errors: List[Tuple[str, int, str]]):
+        self.programs = programs
+        self.lines = lines
+        self.used = used
+        self.receiver = receiver
+        self.errors = errors
+
+    @classmethod
+    def scan(cls, content: str) -> 'PhaseCycle':
+        programs: Dict[str, Tuple[np.ndarray, int]] = {}
+        lines: Dict[str, int] = {}
+        used: Dict[str, int] = {}
+        receiver = None
+        errors = []
+        texts: Dict[str, str] = {}
+        current = None  # the definition that following continuation lines extend
+        for number, code in code_lines(content):
+            match = _DEFINITION.match(code)
+            if match:
+                current = f'ph{match.group(1)}'
+                lines[current] = number
+                texts[current] = match.group(2)
+                continue
+            if current is not None and PHASE_CONTINUATION.match(code):
+                texts[current] += ' ' + code.strip()
+                continue
+            current = None
+            go = _RECEIVER.search(code)
+            if go and receiver is None:
+                receiver = f'ph{go.group(1)}'
+            for index in _REFERENCE.findall(code):
+                used.setdefault(f'ph{index}', number)
+        for name, text in texts.items():
+            try:
+                programs[name] = expand(text)
+            except (PhaseSyntaxError, ValueError) as e:
+                errors.append((name, lines[name], str(e)))
+        return cls(programs, lines, used, receiver or DEFAULT_RECEIVER, errors)
+
+    @property
+    def length(self) -> int:
+        """Steps in the full cycle: the least common multiple of the program lengths."""
+        names = [n for n in self.programs if n in self.used]
+        return math.lcm(*(len(self.programs[n][0]) for n in names)) if names else 1
+
+    @property
+    def divisor(self) -> int:
+        return math.lcm(*(d for _, d in self.programs.values())) if self.programs else DEFAULT_DIVISOR
+
+    def table(self) -> Dict[str, np.ndarray]:
+        """Phase of every used program at every step of the cycle, in degrees."""
+        length = self.length
+        return {name: np.resize(steps, length) * (360.0 / divisor)
+                for name, (steps, divisor) in sorted(self.programs.items(), key=lambda i: int(i[0][2:]))
+                if name in self.used}
+
+    def _aligned(self, name: str, length: int, divisor: int) -> np.ndarray:
+        steps, own = self.programs[name]
+        return np.resize(steps, length) * (divisor // own)
+
+    def cycled(self) -> List[str]:
+        """Pulse phase programs that take more than one value over the cycle."""
+        return [name for name in self.table() if name != self.receiver
+                and len(np.unique(self.programs[name][0])) > 1]
+
+    def pathways(self) -> Optional[np.ndarray]:
+        """
+        Coherence-order changes selected by the cycle, one row per pathway and one
+        column per cycled() program, lowest total order change first.
+
+        Returns None when the search is not possible (no receiver program, or
+        more than MAX_CYCLED cycled programs).
+        """
+        cycled = self.cycled()
+        if self.receiver not in self.programs or len(cycled) > MAX_CYCLED:
+            return None
+        length, divisor = self.length, self.divisor
+        receiver = self._aligned(self.receiver, length, divisor)
+        if not cycled:
+            constant = bool(np.all(receiver == receiver[0]))
+            return np.zeros((1 if constant else 0, 0), dtype=np.int64)
+        phases = np.stack([self._aligned(name, length, divisor) for name in cycled])
+        orders = range(-MAX_ORDER_CHANGE, MAX_ORDER_CHANGE + 1)
+        candidates = np.array(list(itertools.product(orders, repeat=len(cycled))), dtype=np.int64)
+        # Signal phase of every candidate at every step, relative to the receiver
+        offset = (-(candidates @ phases) - receiver) % divisor
+        selected = candidates[np.all(offset == offset[:, :1], axis=1)]
+        return selected[np.argsort(np.abs(selected).sum(axis=1), kind='stable')]
+
+
+def check_cycle(file_path: str, cycle: PhaseCycle) -> List[Dict[str, Any]]:
+    """Findings for one file's phase cycle."""
+    findings = []
+    for name, line, message in cycle.errors:
+        findings.append(finding(file_path, f"{name}: cannot expand phase program: {message}",
+                                rule='phase.syntax', level='warning', line=line))
+    for name, line in sorted(cycle.used.items(), key=lambda i: i[1]):
+        if name not in cycle.programs and name not in cycle.lines:
+            findings.append(finding(file_path, f"{name} is used but never defined",
+                                    rule='phase.undefined', level='warning', line=line))
+    if not cycle.used:
+        return findings
+    pathways = cycle.pathways()
+    if pathways is not None and len(pathways) == 0:
+        findings.append(finding(
+            file_path,
+            f"receiver phase {cycle.receiver} matches no coherence pathway with "
+            f"|dp| <= {MAX_ORDER_CHANGE} on {', '.join(cycle.cycled()) or 'any phase'}; "
+            f"the signal cancels over the cycle",
+            rule='phase.cancelled', level='warning', line=cycle.lines.get(cycle.receiver)))
+    length = cycle.length
+    if length & (length - 1):
+        findings.append(finding(
+            file_path,
+            f"full phase cycle is {length} steps; NS must be a multiple of {length}, "
+            f"which the usual powers of two are not",
+            rule='phase.cycle_length', level='note', line=cycle.lines.get(cycle.receiver)))
+    return findings
+
+
+def describe(cycle: PhaseCycle) -> str:
+    """One-line summary: cycle length and the simplest selected pathway."""
+    length = cycle.length
+    text = f"{length}-step cycle (NS = {length}, {2 * length}, ...)"
+    pathways = cycle.pathways()
+    if pathways is None or not len(pathways):
+        return text
+    cycled = cycle.cycled()
+    if cycled:
+        changes = ', '.join(f"{name} {int(dp):+d}" for name, dp in zip(cycled, pathways[0]))
+        text += f"; selects dp: {changes}"
+        if len(pathways) > 1:
+            text += f" ({len(pathways)} pathways with |dp| <= {MAX_ORDER_CHANGE})"
+    return text
+
+
+def markdown(cycle: PhaseCycle) -> List[str]:
+    """The expanded phase table for a sequence page, or nothing if there is no cycle."""
+    table = cycle.table()
+    if not table:
+        return []
+    length = cycle.length
+    lines = ["## Phase Cycle", "", describe(cycle), "",
+             "| Program | " + " | ".join(str(i) for i in range(1, length + 1)) + " |",
+             "|---|" + "---|" * length]
+    for name, phases in table.items():
+        label = f"{name} (receiver)" if name == cycle.receiver else name
+        lines.append(f"| {label} | " + " | ".join(f"{p:g}" for p in phases) + " |")
+    lines.append("")
+    return lines
+
+
+def check_phases(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Expand every sequence's phase cycle and check it against the receiver."""
+    print("Expanding phase cycles...")
+    warnings = 0
+    for file_path in corpus.sequence_files():
+        cycle = PhaseCycle.scan(corpus.source(file_path))
+        findings = check_cycle(str(file_path), cycle)
+        if report is not None:
+            report.extend(str(file_path), findings)
+        for f in findings:
+            if f['level'] == 'warning':
+                warnings += 1
+                print(f"⚠️  {file_path}:{f['line']}: {f['message']}")
+        if cycle.used:
+            print(f"✓ {file_path} - {describe(cycle)}")
+    if warnings:
+        print(f"{warnings} phase cycle warnings")
+    else:
+        print("All phase cycles are consistent with their receiver phase!")
+    return True
@@ -0,0 +1,400 @@
+"""
+Tokenising of Bruker pulse-program bodies into a per-file symbol index and
+a statement tree (parse()) for analyses that follow the program's timing.
+"""
+import hashlib
+import re
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
+
+# Identifiers not glued to a number or a member access: '4u', '1e-3' and
+# 'taulist.max' contribute no symbol for the unit or member part
+_IDENTIFIER = re.compile(r'(?<![\w.])[A-Za-z_]\w*')
+_BLOCK_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+_INCLUDE = re.compile(r'^\s*#\s*include\s*[<"]([^>"]+)[>"]', re.MULTILINE)
+_DEFINE = re.compile(r'^\s*define\s+(?:list\s*<\s*\w+\s*>|\w+)\s+([A-Za-z_]\w*)')
+_LIST = re.compile(r'^\s*define\s+list\s*<\s*(\w+)\s*>\s+([A-Za-z_]\w*)')
+_DIRECTIVE = re.compile(r'^\s*#\s*(ifdef|ifndef|else|endif|include|define|undef)\b\s*(\w*)')
+_LABEL = re.compile(r'^\s*(\d+)\s+(?=\S)')
+_RELATION = re.compile(r'^\s*([A-Za-z_]\w*(?:\[[^\]]*\])?)\s*=\s*(.+?)\s*$', re.DOTALL)
+_PULSE = re.compile(r'^(p\d+|pcpd\d+|\d+(?:\.\d+)?[um]p)(?::(sp\d+|gp\d+|f\d))?(.*)$')
+_CHANNEL_ACTION = re.compile(r'^(pl\d+|cw|do|cpds?\d+|\w+):(f\d)$')
+_PHASE = re.compile(r'^ph\d+$')
+# A line continuing the phase program defined above it ('  2 2 3 3', '  {0 2}*2')
+PHASE_CONTINUATION = re.compile(r'^[-\d\s(){}*^]+$')
+_DURATION = re.compile(r'^(?:[A-Za-z_]\w*|\d+(?:\.\d+)?[mus]?)(?:[*/][-\w.]+)*$')
+# Instructions and macros that take no time of their own (or too little to matter)
+_INSTRUCTION = re.compile(r'^(?:(?:[idr][udp]|[idr]pp|[idr]pu)\d+|ze|zd|exit|wr|rf|aqseq|prosol|'
+                          r'BLKGRAD|UNBLKGRAD|HaltAcqu|if|else)$')
+
+# Parameter families spelt differently in annotations and bodies, e.g.
+# 'p19:gp6' uses gpz6/gpnam6, 'p11:sp1' uses spnam1/spw1/spoffs1, plw30 is pl30
+FAMILIES = [
+    ('gp', 'gpz', 'gpx', 'gpy', 'gpnam'),
+    ('sp', 'spnam', 'spw', 'spdb', 'spoal', 'spoffs'),
+    ('pl', 'plw', 'pldb'),
+    ('cpd', 'cpdprg', 'pcpd'),
+]
+_INDEXED = re.compile(r'^([A-Za-z]+)(\d+)$')
+_FAMILY = {prefix: family for family in FAMILIES for prefix in family}
+
+
+def body(content: str) -> str:
+    """The pulse program without its ';@' annotation lines."""
+    return '\n'.join(line for line in content.split('\n') if not line.lstrip().startswith(';@'))
+
+
+def includes(content: str) -> List[str]:
+    """Names of the files pulled in with '#include <...>' or '#include "..."'."""
+    return _INCLUDE.findall(content)
+
+
+def fingerprint(content: str) -> str:
+    """SHA-256 of the body, so metadata-only edits keep the same fingerprint."""
+    return hashlib.sha256(body(content).encode('utf-8')).hexdigest()
+
+
+def code_lines(content: str) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (1-based line number, code) for every line with code on it.
+
+    /* */ comments are blanked out (keeping their newlines) and ';' starts a
+    comment, which also drops the ';@' annotation lines.
+    """
+    content = _BLOCK_COMMENT.sub(lambda m: '\n' * m.group().count('\n'), content)
+    for number, line in enumerate(content.split('\n'), 1):
+        code = line.split(';', 1)[0]
+        if code and not code.isspace():
+            yield number, code
+
+
+class Symbols:
+    """
+    Symbol table of a pulse-program body.
+
+    ``names`` maps every identifier to the 1-based line it first appears on;
+    ``defined`` holds names introduced by 'define' statements.
+    """
+
+    def __init__(self, names: Dict[str, int], defined: Dict[str, int]):
+        self.names = names
+        self.defined = defined
+
+    @classmethod
+    def scan(cls, content: str) -> 'Symbols':
+        """Build the table in one pass over the source, skipping comments."""
+        names: Dict[str, int] = {}
+        defined: Dict[str, int] = {}
+        for number, code in code_lines(content):
+            match = _DEFINE.match(code)
+            if match:
+                defined.setdefault(match.group(1), number)
+            for name in _IDENTIFIER.findall(code):
+                names.setdefault(name, number)
+        return cls(names, defined)
+
+    def line(self, name: str) -> Optional[int]:
+        """Line where ``name`` (or the body spelling it is used through) first appears."""
+        if name in self.names:
+            return self.names[name]
+        match = _INDEXED.match(name)
+        if match and match.group(1) in _FAMILY:
+            lines = [self.names[prefix + match.group(2)] for prefix in _FAMILY[match.group(1)]
+                     if prefix + match.group(2) in self.names]
+            if lines:
+                return min(lines)
+        return None
+
+    def __contains__(self, name: str) -> bool:
+        return self.line(name) is not None
+
+
+class Element:
+    """
+    One timed item of a statement: an RF pulse on a channel ('rf'), a wait
+    inside a channel group ('delay') or a gradient pulse ('gradient').
+
+    ``duration`` is an expression; ``power`` names a shaped pulse's power
+    (sp20) or a gradient (gp1), ``scale`` is the gradient multiplier and
+    ``phase`` the phase program of a pulse (ph1).
+    """
+
+    def __init__(self, kind: str, duration: str, channel: Optional[str] = None,
+                 power: Optional[str] = None, scale: str = ''):
+        self.kind = kind
+        self.duration = duration
+        self.channel = channel
+        self.power = power
+        self.scale = scale
+        self.phase: Optional[str] = None
+
+    def __repr__(self):
+        return f"Element({self.kind}, {self.duration}, {self.channel}, {self.power}{self.scale}, {self.phase})"
+
+
+class Statement:
+    """
+    One line of the pulse program proper.
+
+    ``groups`` are the channel groups executed in parallel (each a list of
+    Elements run in sequence); ``actions`` are (action, channel, argument)
+    switches such as ('power', 'f1', 'pl25'), ('cw', 'f1', ''), ('do', 'f1', '').
+    ``instructions`` are the untimed ones such as 'ze', 'UNBLKGRAD' or 'iu1'.
+    ``go`` is the label of a 'go=' loop and ``receiver`` its phase program;
+    ``goto`` is the target of 'goto' or of 'mc #0 to'.
+    """
+
+    def __init__(self, line: int, label: Optional[str] = None):
+        self.line = line
+        self.label = label
+        self.duration: Optional[str] = None
+        self.groups: List[List[Element]] = []
+        self.actions: List[Tuple[str, str, str]] = []
+        self.instructions: List[str] = []
+        self.go: Optional[str] = None
+        self.receiver: Optional[str] = None
+        self.loop: Optional[Tuple[str, str]] = None
+        self.goto: Optional[str] = None
+
+    @property
+    def jumps(self) -> List[str]:
+        """Labels this statement may jump to."""
+        return [label for label in (self.go, self.loop[0] if self.loop else None, self.goto)
+                if label is not None]
+
+    def __repr__(self):
+        return (f"Statement({self.line}, label={self.label}, duration={self.duration}, "
+                f"groups={self.groups}, actions={self.actions}, go={self.go}, loop={self.loop})")
+
+
+class Relation:
+    """A quoted assignment, e.g. '"p25=1000000/(4*cnst25)"'."""
+
+    def __init__(self, line: int, name: str, expression: str):
+        self.line = line
+        self.name = name
+        self.expression = expression
+
+    def __repr__(self):
+        return f"Relation({self.line}, {self.name} = {self.expression})"
+
+
+class Conditional:
+    """'if "condition" { ... } else { ... }'."""
+
+    def __init__(self, line: int, condition: str):
+        self.line = line
+        self.condition = condition
+        self.then: List[Any] = []
+        self.otherwise: List[Any] = []
+
+    def __repr__(self):
+        return f"Conditional({self.line}, {self.condition!r}, {self.then}, {self.otherwise})"
+
+
+class Program:
+    """
+    Statement tree of a pulse program after preprocessing.
+
+    ``nodes`` holds Relations, Statements and Conditionals in program order;
+    ``lists`` maps list variables to their type ('pulse', 'delay', 'power', ...).
+    """
+
+    def __init__(self, nodes: List[Any], lists: Dict[str, str]):
+        self.nodes = nodes
+        self.lists = lists
+
+    def statements(self, nodes: Optional[List[Any]] = None) -> Iterator[Statement]:
+        """Every Statement, including those inside conditionals."""
+        for node in self.nodes if nodes is None else nodes:
+            if isinstance(node, Statement):
+                yield node
+            elif isinstance(node, Conditional):
+                yield from self.statements(node.then)
+                yield from self.statements(node.otherwise)
+
+
+def tokens(code: str) -> List[str]:
+    """Split a code line on whitespace outside parentheses and quotes; braces stand alone."""
+    result, current, depth, quoted = [], '', 0, False
+    for char in code:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted:
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth = max(0, depth - 1)
+            elif depth == 0 and (char.isspace() or char in '{}'):
+                if current:
+                    result.append(current)
+                current = ''
+                if char in '{}':
+                    result.append(char)
+                continue
+        current += char
+    if current:
+        result.append(current)
+    return result
+
+
+def _element(text: str, channel: Optional[str], lists: Dict[str, str]) -> Optional[Element]:
+    """A pulse or wait written inside a channel group, or a bare pulse statement."""
+    if text.split('*')[0] in lists and lists[text.split('*')[0]] == 'pulse':
+        return Element('rf', text, channel or 'f1')
+    match = _PULSE.match(text)
+    if match:
+        name, modifier, rest = match.groups()
+        if modifier and modifier.startswith('gp'):
+            return Element('gradient', name, None, modifier, rest)
+        if modifier and modifier.startswith('f'):
+            channel = modifier
+        power = modifier if modifier and modifier.startswith('sp') else None
+        return Element('rf', name + rest, channel or 'f1', power)
+    if _DURATION.match(text) and not re.match(r'^ph\d', text) and not _INSTRUCTION.match(text):
+        return Element('delay', text, channel)
+    return None
+
+
+def _groups(text: str, lists: Dict[str, str], channel: Optional[str] = None) -> List[List[Element]]:
+    """Channel groups of a parenthesised pulse statement such as '(center (p2 ph1):f1 (p22):f3)'."""
+    match = re.match(r'^\((.*)\)(?::(f\d))?$', text, re.DOTALL)
+    if not match:
+        return []
+    inner, channel = match.group(1), match.group(2) or channel or 'f1'
+    if '(' in inner:
+        groups = []
+        for part in tokens(inner):
+            if part.startswith('('):
+                groups.extend(_groups(part, lists, channel))
+        return groups
+    elements = []
+    for part in inner.split():
+        if _PHASE.match(part) and elements:
+            elements[-1].phase = part
+            continue
+        element = _element(part, channel, lists)
+        if element is not None:
+            elements.append(element)
+    return [elements]
+
+
+def _statement(number: int, code: str, lists: Dict[str, str]) -> Optional[Statement]:
+    label = _LABEL.match(code)
+    statement = Statement(number, label.group(1) if label else None)
+    parts = tokens(code[label.end():] if label else code)
+    i = 0
+    while i < len(parts):
+        part = parts[i]
+        if part.startswith('go=') or part.startswith('gosc='):
+            statement.go = part.split('=', 1)[1]
+        elif _PHASE.match(part):
+            if statement.go is not None:
+                statement.receiver = part
+            elif statement.groups and statement.groups[-1]:
+                statement.groups[-1][-1].phase = part
+        elif part == 'lo' and i + 4 < len(parts) and parts[i + 1] == 'to' and parts[i + 3] == 'times':
+            statement.loop = (parts[i + 2], parts[i + 4])
+            i += 4
+        elif part == 'goto' and i + 1 < len(parts):
+            statement.goto = parts[i + 1]
+            i += 1
+        elif part == 'mc':
+            if i + 2 < len(parts) and parts[i + 1].startswith('#') and parts[i + 2] == 'to':
+                statement.goto = parts[i + 3] if i + 3 < len(parts) else None
+            break  # 'mc #0 to 2 F1QF(...)' otherwise only manages the dataset
+        elif part.startswith('('):
+            statement.groups.extend(_groups(part, lists))
+        elif _CHANNEL_ACTION.match(part):
+            name, channel = _CHANNEL_ACTION.match(part).groups()
+            if name.startswith('pl') or lists.get(name) == 'power':
+                statement.actions.append(('power', channel, name))
+            elif name in ('cw', 'do'):
+                statement.actions.append((name, channel, ''))
+            elif name.startswith('cpd'):
+                statement.actions.append(('cpd', channel, name))
+            elif name.startswith('p') and i == 0:
+                statement.groups.append([Element('rf', name, channel)])
+        elif _INSTRUCTION.match(part):
+            statement.instructions.append(part)
+        elif i == 0:
+            element = _element(part, None, lists)
+            if element is not None and element.kind == 'delay':
+                statement.duration = part
+            elif element is not None:
+                statement.groups.append([element])
+        i += 1
+    return statement
+
+
+def parse(content: str, defines: Iterable[str] = ()) -> Program:
+    """
+    Build the statement tree of a pulse program.
+
+    '#ifdef'/'#ifndef' branches are resolved against ``defines`` (the names
+    passed as -D options in the acquisition parameters).
+    """
+    defines = set(defines)
+    lists: Dict[str, str] = {}
+    root: List[Any] = []
+    blocks: List[List[Any]] = [root]
+    pending: List[Tuple[Conditional, str]] = []
+    active: List[bool] = []
+    phases = False
+    for number, code in code_lines(content):
+        directive = _DIRECTIVE.match(code)
+        if directive:
+            kind, name = directive.groups()
+            if kind in ('ifdef', 'ifndef'):
+                active.append((name in defines) == (kind == 'ifdef'))
+            elif kind == 'else' and active:
+                active[-1] = not active[-1]
+            elif kind == 'endif' and active:
+                active.pop()
+            elif kind == 'define' and name and all(active):
+                defines.add(name)
+            continue
+        if not all(active):
+            continue
+        match = _LIST.match(code)
+        if match:
+            lists[match.group(2)] = match.group(1)
+            continue
+        if _DEFINE.match(code):
+            continue
+        stripped = code.strip()
+        if stripped.startswith('"'):
+            for relation in re.findall(r'"([^"]*)"', stripped):
+                assignment = _RELATION.match(relation)
+                if assignment:
+                    blocks[-1].append(Relation(number, assignment.group(1), assignment.group(2)))
+            continue
+        if re.match(r'^ph\d+\s*=', stripped):
+            phases = True
+            continue
+        if phases and PHASE_CONTINUATION.match(stripped):
+            continue  # more steps of the phase program above, not a labelled statement
+        phases = False
+        parts = tokens(stripped)
+        if parts and parts[0] == 'if' and len(parts) > 1 and parts[1].startswith('"'):
+            conditional = Conditional(number, parts[1].strip('"'))
+            blocks[-1].append(conditional)
+            pending.append((conditional, 'then'))
+            parts = parts[2:]
+        elif parts and parts[0] == 'else' and blocks[-1] and isinstance(blocks[-1][-1], Conditional):
+            pending.append((blocks[-1][-1], 'otherwise'))
+            parts = parts[1:]
+        rest = []
+        for part in parts:
+            if part == '{' and pending:
+                conditional, branch = pending.pop()
+                blocks.append(getattr(conditional, branch))
+            elif part == '}' and len(blocks) > 1:
+                if rest:
+                    blocks[-1].append(_statement(number, ' '.join(rest), lists))
+                    rest = []
+                blocks.pop()
+            else:
+                rest.append(part)
+        if rest:
+            blocks[-1].append(_statement(number, ' '.join(rest), lists))
+    return Program(root, lists)
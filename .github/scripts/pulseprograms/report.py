@@ -0,0 +1,119 @@
+"""
+Validation findings collected across the corpus, written as JSON or SARIF.
+
+A finding is a plain dict:
+
+    {'file', 'line', 'column', 'end_line', 'end_column',   # 1-based, may be None
+     'path', 'rule', 'level', 'message'}
+
+Checkers add findings per file; every checked file is listed in the report,
+including clean ones, so one run can be triaged as a whole.
+"""
+import json
+from pathlib import Path
+from typing import Dict, List, Any, Optional
+
+from pulseprograms import __version__
+
+LEVELS = ('error', 'warning', 'note')
+_SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+
+
+def finding(file: str, message: str, rule: str, level: str = 'error',
+            line: Optional[int] = None, column: Optional[int] = None,
+            end_line: Optional[int] = None, end_column: Optional[int] = None,
+            path: str = '') -> Dict[str, Any]:
+    """Build a finding dict."""
+    return {
+        'file': str(file),
+        'line': line,
+        'column': column,
+        'end_line': end_line,
+        'end_column': end_column,
+        'path': path,
+        'rule': rule,
+        'level': level,
+        'message': message,
+    }
+
+
+class Report:
+    def __init__(self):
+        self.files: Dict[str, List[Dict[str, Any]]] = {}
+
+    def add_file(self, file) -> List[Dict[str, Any]]:
+        """Register a checked file and return its finding list."""
+        return self.files.setdefault(Path(file).as_posix(), [])
+
+    def extend(self, file, findings: List[Dict[str, Any]]):
+        self.add_file(file).extend(findings)
+
+    def findings(self) -> List[Dict[str, Any]]:
+        return [f for findings in self.files.values() for f in findings]
+
+    def count(self, level: str = 'error') -> int:
+        return sum(1 for f in self.findings() if f['level'] == level)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'tool': 'pulseprograms',
+            'version': __version__,
+            'summary': {
+                'files': len(self.files),
+                'files_with_errors': sum(1 for fs in self.files.values()
+                                         if any(f['level'] == 'error' for f in fs)),
+                **{level: self.count(level) for level in LEVELS},
+            },
+            'files': [{'file': file, 'findings': findings}
+                      for file, findings in sorted(self.files.items())],
+        }
+
+    def to_sarif(self) -> Dict[str, Any]:
+        rules = sorted({f['rule'] for f in self.findings()})
+        results = []
+        for f in self.findings():
+            location = {'artifactLocation': {'uri': Path(f['file']).as_posix()}}
+            if f['line'] is not None:
+                region = {'startLine': f['line']}
+                if f['column'] is not None:
+                    region['startColumn'] = f['column']
+                if f['end_line'] is not None:
+                    region['endLine'] = f['end_line']
+                if f['end_column'] is not None:
+                    region['endColumn'] = f['end_column']
+                location['region'] = region
+            result = {
+                'ruleId': f['rule'],
+                'ruleIndex': rules.index(f['rule']),
+                'level': f['level'],
+                'message': {'text': f['message']},
+                'locations': [{'physicalLocation': location}],
+            }
+            if f['path']:
+                result['properties'] = {'path': f['path']}
+            results.append(result)
+        return {
+            '$schema': _SARIF_SCHEMA,
+            'version': '2.1.0',
+            'runs': [{
+                'tool': {'driver': {
+                    'name': 'pulseprograms',
+                    'version': __version__,
+                    'informationUri': 'https://github.com/waudbylab/pulseprograms',
+                    'rules': [{'id': rule} for rule in rules],
+                }},
+                'artifacts': [{'location': {'uri': file}} for file in sorted(self.files)],
+                'results': results,
+            }],
+        }
+
+    def write(self, output: str, fmt: Optional[str] = None):
+        """Write the report; the format defaults from the extension (.sarif or JSON)."""
+        output_file = Path(output)
+        if fmt is None:
+            fmt = 'sarif' if output_file.suffix == '.sarif' else 'json'
+        data = self.to_sarif() if fmt == 'sarif' else self.to_json()
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        print(f"Wrote {fmt.upper()} report for {len(self.files)} files: {output_file}")
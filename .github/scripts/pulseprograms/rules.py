@@ -0,0 +1,162 @@
+"""
+Semantic consistency rules - cross-field checks the JSON schema cannot express.
+
+Rules are declared per schema version as data (RULES) and compiled once per
+schema into plain functions. Each file is then checked against a dotted-path
+index of its metadata, built in a single walk, so every rule is a handful of
+dict lookups and a file costs O(fields).
+
+Blocks and channel names come from the schema itself (blocks extending
+block_base, block_base's channel pattern), so a block added in a new schema
+version is checked without code changes.
+"""
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Any, Tuple
+
+from pulseprograms.crossref import block_fields
+
+# Rules per schema version; a schema uses the newest declaration not newer than itself
+RULES: Dict[str, List[Dict[str, Any]]] = {
+    '0.0.2': [
+        {'check': 'resolves', 'field': 'dimensions'},
+        {'check': 'resolves', 'field': 'acquisition_order'},
+        {'check': 'permutation', 'field': 'acquisition_order', 'of': 'dimensions'},
+    ],
+    '0.0.3': [
+        {'check': 'resolves', 'field': 'dimensions'},
+        {'check': 'resolves', 'field': 'acquisition_order'},
+        {'check': 'permutation', 'field': 'acquisition_order', 'of': 'dimensions'},
+        # '2d' counts frequency dimensions of the processed spectrum, i.e. channels
+        {'check': 'frequency_count', 'field': 'dimensions', 'tags': 'experiment_type'},
+    ],
+}
+
+DEFAULT_CHANNEL = r'^f[1-8]$'
+_DIMENSIONALITY = re.compile(r'^(\d+)d$')
+
+# (instance path, message)
+Problem = Tuple[List[Any], str]
+Rule = Callable[[Dict[str, Any], Dict[str, Any]], List[Problem]]
+
+
+def path_index(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Map every dotted path of nested mappings ('cest', 'cest.offset', ...) to its value."""
+    index = {}
+    stack = [('', metadata)]
+    while stack:
+        prefix, mapping = stack.pop()
+        for key, value in mapping.items():
+            path = f'{prefix}.{key}' if prefix else str(key)
+            index[path] = value
+            if isinstance(value, dict):
+                stack.append((path, value))
+    return index
+
+
+def _version(text: Any) -> Tuple[int, ...]:
+    try:
+        return tuple(int(part) for part in str(text).split('.'))
+    except ValueError:
+        return ()
+
+
+def rules_for(version: Any) -> List[Dict[str, Any]]:
+    """Rule declarations that apply to a schema version."""
+    declared = sorted(RULES, key=_version)
+    applicable = [v for v in declared if _version(v) <= _version(version)] if _version(version) else declared
+    return RULES[applicable[-1]] if applicable else []
+
+
+def _entries(metadata: Dict[str, Any], field: str) -> List[Any]:
+    value = metadata.get(field)
+    return value if isinstance(value, list) else []
+
+
+def _resolves(field: str, blocks: List[str], channel: re.Pattern) -> Rule:
+    def check(metadata, index):
+        problems = []
+        for i, entry in enumerate(_entries(metadata, field)):
+            if not isinstance(entry, str):
+                continue
+            if '.' not in entry:
+                if not channel.match(entry):
+                    problems.append(([field, i], f"{entry!r} is neither a channel nor a dotted block path"))
+                continue
+            block = entry.split('.', 1)[0]
+            # Schemas without declared blocks accept any top-level mapping
+            if blocks and block not in blocks:
+                problems.append(([field, i], f"{entry!r} does not start with an experiment block "
+                                             f"({', '.join(blocks)})"))
+            elif block not in metadata:
+                problems.append(([field, i], f"{entry!r} refers to block '{block}', which is not in the metadata"))
+            elif entry not in index:
+                problems.append(([field, i], f"{entry!r} does not resolve; '{block}' has no such field"))
+        return problems
+    return check
+
+
+def _permutation(field: str, of: str) -> Rule:
+    def check(metadata, index):
+        if field not in metadata or of not in metadata:
+            return []
+        entries, reference = _entries(metadata, field), _entries(metadata, of)
+        problems = []
+        for name, values in ((field, entries), (of, reference)):
+            repeated = sorted(str(v) for v, n in Counter(map(str, values)).items() if n > 1)
+            if repeated:
+                problems.append(([name], f"repeats {', '.join(repeated)}"))
+        missing = sorted(set(map(str, reference)) - set(map(str, entries)))
+        extra = sorted(set(map(str, entries)) - set(map(str, reference)))
+        if missing or extra:
+            detail = []
+            if missing:
+                detail.append(f"missing {', '.join(missing)}")
+            if extra:
+                detail.append(f"extra {', '.join(extra)}")
+            problems.append(([field], f"not a permutation of {of} ({'; '.join(detail)})"))
+        return problems
+    return check
+
+
+def _frequency_count(field: str, tags: str, channel: re.Pattern) -> Rule:
+    def check(metadata, index):
+        if field not in metadata:
+            return []
+        declared = [int(m.group(1)) for m in map(_DIMENSIONALITY.match, map(str, _entries(metadata, tags))) if m]
+        if len(declared) != 1:
+            return []
+        count = sum(1 for entry in _entries(metadata, field) if isinstance(entry, str) and channel.match(entry))
+        if count != declared[0]:
+            return [([field], f"{count} frequency dimension{'s' if count != 1 else ''} "
+                              f"but {tags} declares {declared[0]}d")]
+        return []
+    return check
+
+
+def compile_rules(schema: Dict[str, Any]) -> List[Tuple[str, Rule]]:
+    """Compile the declarations for ``schema`` into (rule id, check function) pairs."""
+    blocks, _ = block_fields(schema)
+    channel_spec = schema.get('$defs', {}).get('block_base', {}).get('properties', {}).get('channel', {})
+    channel = re.compile(channel_spec.get('pattern', DEFAULT_CHANNEL))
+    compiled = []
+    for rule in rules_for(schema.get('version')):
+        kind = rule['check']
+        if kind == 'resolves':
+            check = _resolves(rule['field'], blocks, channel)
+        elif kind == 'permutation':
+            check = _permutation(rule['field'], rule['of'])
+        elif kind == 'frequency_count':
+            check = _frequency_count(rule['field'], rule['tags'], channel)
+        else:
+            raise ValueError(f"Unknown consistency rule: {kind}")
+        compiled.append((f"rules.{kind}", check))
+    return compiled
+
+
+def check_metadata(rules: List[Tuple[str, Rule]], metadata: Dict[str, Any]) -> List[Tuple[str, List[Any], str]]:
+    """Run compiled rules on one metadata tree; returns (rule id, path, message)."""
+    index = path_index(metadata)
+    return [(rule_id, path, message)
+            for rule_id, check in rules
+            for path, message in check(metadata, index)]
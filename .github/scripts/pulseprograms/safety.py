@@ -0,0 +1,533 @@
+"""
+RF duty-cycle and gradient-load calculator for one scan of a pulse program.
+
+The statement tree from pulseprogram.parse() is walked once from the
+'go=' label to the 'go' statement. Relations ('"p25=1000000/(4*cnst25)"'),
+loop counts and 'if' conditions are evaluated with NumPy, so every
+parameter may be an array: a grid of power/duration/d1 values is evaluated
+in one pass and the result has the grid's shape.
+
+Per channel the scan yields RF on-time, energy (plw x time), average power,
+duty cycle and peak power; the reference_pulse calibration turns peak power
+into a B1 field. Gradients contribute time x (gpz/100)^2 to the gradient duty.
+
+Parameters come from, in order of precedence: the program's own relations,
+the values given by the caller, and the defaults written in the program's
+comments (';d11: delay for disk I/O [30 msec]', ';gpz1: 41%'). Experiment
+block fields can be used as names ('cest.duration' is d18 in 19f_cest.cw).
+List variables take the value given for them, so give the longest entry
+for a worst case. Shaped pulses are counted at their full spw power, which
+overestimates their energy.
+
+Requires numpy (``pip install -e .[analysis]``).
+"""
+import ast
+import math
+import operator
+import re
+from typing import Dict, List, Any, Callable, Iterable, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import Conditional, Program, Relation, Statement, parse
+
+# Placeholder limits: replace them with the probe's specification
+DEFAULT_LIMITS = {
+    'negative_delay': 0.0,  # any negative delay makes the parameter set invalid
+    'rf_power': 1.0,        # W, average over the scan, per channel
+    'gradient_duty': 0.1,   # fraction of the scan at full gradient strength
+}
+
+_PULSE_NAME = re.compile(r'^(p\d+|pcpd\d+)$')
+_DELAY_NAME = re.compile(r'^(d\d+|in\d+|inf\d+|aq|de|vd|DELTA\w*|TAU\w*)$')
+_UNIT_LITERAL = re.compile(r'(?<![\w.])(\d+(?:\.\d*)?)(up|mp|u|m|s)(?![\w.])')
+_UNIT_SECONDS = {'u': 1e-6, 'up': 1e-6, 'm': 1e-3, 'mp': 1e-3, 's': 1.0}
+_HINT = re.compile(r'^\s*;\s*(\w+)\s*:.*\[\s*(\d+(?:\.\d+)?)\s*(usec|msec|sec|us|ms|s)\s*\]')
+_GRADIENT_HINT = re.compile(r'^\s*;\s*(gpz\d+)\s*:\s*(-?\d+(?:\.\d+)?)\s*%')
+_HINT_SECONDS = {'usec': 1e-6, 'us': 1e-6, 'msec': 1e-3, 'ms': 1e-3, 'sec': 1.0, 's': 1.0}
+# A --set value, optionally with TopSpin's time suffix: '0.5', '200m', '10u', '2s'
+_VALUE = re.compile(r'^\s*([-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][-+]?\d+)?)\s*([ums]?)\s*$')
+_SUFFIX_SECONDS = {'u': 1e-6, 'm': 1e-3, 's': 1.0}
+
+_BINARY = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.Mod: np.mod, ast.Pow: np.power,
+}
+_COMPARE = {
+    ast.Eq: np.equal, ast.NotEq: np.not_equal, ast.Lt: np.less,
+    ast.LtE: np.less_equal, ast.Gt: np.greater, ast.GtE: np.greater_equal,
+}
+_FUNCTIONS = {
+    'pow': np.power, 'sqrt': np.sqrt, 'exp': np.exp, 'log': np.log, 'log10': np.log10,
+    'sin': np.sin, 'cos': np.cos, 'tan': np.tan, 'atan': np.arctan, 'asin': np.arcsin,
+    'acos': np.arccos, 'fabs': np.abs, 'abs': np.abs,
+    'larger': np.maximum, 'smaller': np.minimum,
+}
+
+
+class SafetyError(Exception):
+    pass
+
+
+def unit(name: str, lists: Dict[str, str]) -> str:
+    """Time unit of a parameter: 'us' for pulses, 's' for delays, '' otherwise."""
+    base = re.split(r'[.\[]', name, 1)[0]
+    if _PULSE_NAME.match(base) or lists.get(base) == 'pulse':
+        return 'us'
+    if _DELAY_NAME.match(base) or lists.get(base) == 'delay':
+        return 's'
+    return ''
+
+
+def _factor(source: str, target: str) -> float:
+    if not source or not target or source == target:
+        return 1.0
+    return 1e-6 if source == 'us' else 1e6
+
+
+def hints(content: str) -> Dict[str, float]:
+    """Default values written in the program's trailing comments."""
+    values = {}
+    for line in content.split('\n'):
+        match = _HINT.match(line)
+        if match:
+            name, value, suffix = match.groups()
+            seconds = float(value) * _HINT_SECONDS[suffix]
+            values.setdefault(name, seconds * (1e6 if _PULSE_NAME.match(name) else 1.0))
+            continue
+        match = _GRADIENT_HINT.match(line)
+        if match:
+            values.setdefault(match.group(1), float(match.group(2)))
+    return values
+
+
+def value_name(name: str) -> str:
+    """Power levels are given in watts: 'pl25' is stored as plw25, 'sp20' as spw20."""
+    match = re.match(r'^(pl|sp)(\d+)$', name)
+    return f'{match.group(1)}w{match.group(2)}' if match else name
+
+
+def parameter_names(metadata: Optional[Dict[str, Any]], params: Dict[str, Any]) -> Dict[str, Any]:
+    """Map experiment block paths ('cest.duration') and pl/sp names to program parameters."""
+    resolved = {}
+    for key, value in params.items():
+        name = key
+        block, _, field = key.partition('.')
+        if field and isinstance((metadata or {}).get(block), dict) and field in metadata[block]:
+            name = metadata[block][field]
+            if not isinstance(name, str):
+                raise SafetyError(f"{key} is not a single parameter ({name!r})")
+        resolved[value_name(name)] = value
+    return resolved
+
+
+class Evaluator:
+    """Lazily evaluated parameter namespace: relations, then given values, then hints."""
+
+    def __init__(self, program: Program, params: Dict[str, Any], defaults: Dict[str, float]):
+        self.lists = program.lists
+        self.params = params
+        self.defaults = defaults
+        self.relations: Dict[str, str] = {}
+        self.cache: Dict[str, Any] = {}
+        self.missing: Set[str] = set()
+        self._active: Set[str] = set()
+
+    def assign(self, relation: Relation):
+        name = re.split(r'\[', relation.name, 1)[0]
+        self.relations[name] = relation.expression
+        self.cache.clear()
+
+    def value(self, name: str) -> Any:
+        """Value of a parameter in its own unit (µs for pulses, s for delays)."""
+        if name in self.cache:
+            return self.cache[name]
+        if name in self.relations and name not in self._active:
+            self._active.add(name)
+            try:
+                result = self.evaluate(self.relations[name], unit(name, self.lists))
+            finally:
+                self._active.discard(name)
+        elif name in self.params:
+            result = np.asarray(self.params[name], dtype=float)
+        elif name in self.defaults:
+            result = np.float64(self.defaults[name])
+        else:
+            self.missing.add(name)
+            result = np.float64(np.nan)
+        self.cache[name] = result
+        return result
+
+    def evaluate(self, expression: str, target: str = 's') -> Any:
+        """Evaluate a Bruker expression, converting times to ``target`` ('s', 'us' or '')."""
+        text = _UNIT_LITERAL.sub(
+            lambda m: f"({float(m.group(1)) * _UNIT_SECONDS[m.group(2)]!r}*__SECONDS__)", expression)
+        text = text.replace('&&', ' and ').replace('||', ' or ')
+        text = re.sub(r'!(?!=)', ' not ', text)
+        try:
+            tree = ast.parse(text.strip(), mode='eval')
+        except SyntaxError:
+            raise SafetyError(f"cannot evaluate '{expression}'")
+        return self._node(tree.body, target, expression)
+
+    def _node(self, node: ast.AST, target: str, expression: str) -> Any:
+        recurse = lambda child: self._node(child, target, expression)
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return np.float64(node.value)
+        if isinstance(node, ast.Name):
+            if node.id == '__SECONDS__':
+                return _factor('s', target)
+            if node.id == 'PI':
+                return math.pi
+            return self.value(node.id) * _factor(unit(node.id, self.lists), target)
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name):
+            # 'taulist.max': the caller's value for it, else the list's own value
+            name = f'{node.value.id}.{node.attr}'
+            source = self.params.get(name)
+            value = np.asarray(source, dtype=float) if source is not None else self.value(node.value.id)
+            return value * _factor(unit(node.value.id, self.lists), target)
+        if isinstance(node, ast.Subscript) and isinstance(node.value, ast.Name):
+            return self.value(node.value.id) * _factor(unit(node.value.id, self.lists), target)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+            return _BINARY[type(node.op)](recurse(node.left), recurse(node.right))
+        if isinstance(node, ast.UnaryOp):
+            operand = recurse(node.operand)
+            if isinstance(node.op, ast.USub):
+                return -operand
+            if isinstance(node.op, ast.UAdd):
+                return operand
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+        if isinstance(node, ast.Compare):
+            left, result = recurse(node.left), True
+            for op, right in zip(node.ops, node.comparators):
+                right = recurse(right)
+                result = np.logical_and(result, _COMPARE[type(op)](left, right))
+                left = right
+            return result
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            result = recurse(node.values[0])
+            for value in node.values[1:]:
+                result = combine(result, recurse(value))
+            return result
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS:
+            return _FUNCTIONS[node.func.id](*[recurse(arg) for arg in node.args])
+        raise SafetyError(f"cannot evaluate '{expression}'")
+
+
+class Load:
+    """Accumulated time, RF and gradient load; 'peak_*' entries combine by maximum."""
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        self.values: Dict[str, Any] = dict(values or {})
+
+    def add(self, key: str, amount: Any):
+        if key.startswith('peak_'):
+            self.values[key] = np.maximum(self.values.get(key, 0.0), amount)
+        else:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def merge(self, other: 'Load', times: Any = 1):
+        for key, amount in other.values.items():
+            self.add(key, amount if key.startswith('peak_') else amount * times)
+
+    def since(self, snapshot: 'Load') -> 'Load':
+        """Additive load accumulated after ``snapshot`` (peaks are kept as they are)."""
+        return Load({key: value - snapshot.values.get(key, 0.0) if not key.startswith('peak_') else value
+                     for key, value in self.values.items()})
+
+    @staticmethod
+    def where(condition: Any, then: 'Load', otherwise: 'Load') -> 'Load':
+        keys = set(then.values) | set(otherwise.values)
+        return Load({key: np.where(condition, then.values.get(key, 0.0), otherwise.values.get(key, 0.0))
+                     for key in keys})
+
+
+Power = Callable[[], Any]
+
+
+class State:
+    """Power level and continuous (cw/cpd) irradiation per channel; powers are evaluated lazily."""
+
+    def __init__(self, power: Dict[str, Power], continuous: Optional[Dict[str, Power]] = None):
+        self.power = dict(power)
+        self.continuous = dict(continuous or {})
+
+    def copy(self) -> 'State':
+        return State(self.power, self.continuous)
+
+    @staticmethod
+    def where(condition: Any, then: 'State', otherwise: 'State') -> 'State':
+        def choose(a: Optional[Power], b: Optional[Power]) -> Power:
+            a, b = a or (lambda: 0.0), b or (lambda: 0.0)
+            return lambda: np.where(condition, a(), b())
+        power = {ch: choose(then.power.get(ch), otherwise.power.get(ch))
+                 for ch in set(then.power) | set(otherwise.power)}
+        continuous = {ch: choose(then.continuous.get(ch), otherwise.continuous.get(ch))
+                      for ch in set(then.continuous) | set(otherwise.continuous)}
+        return State(power, continuous)
+
+
+class Scan:
+    """Walks the statement tree of one scan, accumulating a Load."""
+
+    def __init__(self, program: Program, evaluator: Evaluator):
+        self.program = program
+        self.evaluator = evaluator
+
+    def _power(self, name: str) -> Power:
+        return lambda: self.evaluator.value(value_name(name))
+
+    def run(self, nodes: Sequence[Any], state: State, load: Optional[Load]) -> State:
+        """Execute ``nodes``; with ``load`` None only relations and switches are followed."""
+        snapshots: Dict[str, Load] = {}
+        for node in nodes:
+            if isinstance(node, Relation):
+                self.evaluator.assign(node)
+            elif isinstance(node, Conditional):
+                condition = self.evaluator.evaluate(node.condition, '')
+                then, otherwise = Load(), Load()
+                then_state = self.run(node.then, state.copy(), then if load is not None else None)
+                else_state = self.run(node.otherwise, state.copy(), otherwise if load is not None else None)
+                state = State.where(condition, then_state, else_state)
+                if load is not None:
+                    load.merge(Load.where(condition, then, otherwise))
+            elif isinstance(node, Statement):
+                if load is not None and node.label is not None:
+                    snapshots[node.label] = Load(load.values)
+                self.statement(node, state, load)
+                if load is not None and node.loop and node.loop[0] in snapshots:
+                    count = self.evaluator.evaluate(node.loop[1], '')
+                    load.merge(load.since(snapshots[node.loop[0]]), count - 1)
+        return state
+
+    def statement(self, statement: Statement, state: State, load: Optional[Load]):
+        for action, channel, argument in statement.actions:
+            if action == 'power':
+                state.power[channel] = self._power(argument)
+            elif action in ('cw', 'cpd'):
+                state.continuous[channel] = state.power.get(channel, lambda: 0.0)
+            elif action == 'do':
+                state.continuous.pop(channel, None)
+        if load is None:
+            return
+
+        pulsed = set()
+        durations = []
+        for group in statement.groups:
+            elapsed = 0.0
+            for element in group:
+                duration = self._duration(load, element.duration)
+                elapsed = elapsed + duration
+                if element.kind == 'rf':
+                    power = (self.evaluator.value(value_name(element.power)) if element.power
+                             else state.power.get(element.channel, lambda: 0.0)())
+                    self._rf(load, element.channel, duration, power)
+                    pulsed.add(element.channel)
+                elif element.kind == 'gradient':
+                    strength = self.evaluator.value('gpz' + element.power[2:])
+                    if element.scale:
+                        strength = strength * self.evaluator.evaluate('1' + element.scale, '')
+                    load.add('gradient', duration * (strength / 100.0) ** 2)
+            durations.append(elapsed)
+        if statement.go is not None:
+            durations.append(self.evaluator.value('aq'))
+        elif statement.duration is not None:
+            durations.append(self._duration(load, statement.duration))
+        if not durations:
+            return
+        duration = durations[0]
+        for other in durations[1:]:
+            duration = np.maximum(duration, other)
+        for channel, power in state.continuous.items():
+            if channel not in pulsed:
+                self._rf(load, channel, duration, power())
+        load.add('time', duration)
+
+    def _duration(self, load: Load, expression: str) -> Any:
+        duration = self.evaluator.evaluate(expression, 's')
+        # Negative delays are rejected by the spectrometer; record by how much
+        load.add('peak_negative_delay', np.maximum(-duration, 0.0))
+        return duration
+
+    @staticmethod
+    def _rf(load: Load, channel: str, duration: Any, power: Any):
+        load.add(f'rf_time.{channel}', duration)
+        load.add(f'rf_energy.{channel}', duration * power)
+        load.add(f'peak_power.{channel}', np.where(duration > 0, power, 0.0))
+
+
+def _references(metadata: Optional[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    references = (metadata or {}).get('reference_pulse') or []
+    return {ref['channel']: ref for ref in references if isinstance(ref, dict) and 'channel' in ref}
+
+
+def scan_bounds(nodes: Sequence[Any]) -> Tuple[int, int]:
+    """Indices of the first statement of a scan (the 'go=' label) and of the 'go' statement."""
+    go = next((i for i, n in enumerate(nodes) if isinstance(n, Statement) and n.go), None)
+    if go is None:
+        raise SafetyError("no 'go=' statement at the top level of the program")
+    start = next((i for i, n in enumerate(nodes[:go])
+                  if isinstance(n, Statement) and n.label == nodes[go].go), None)
+    if start is None:
+        raise SafetyError(f"label {nodes[go].go} of the 'go' loop not found")
+    return start, go
+
+
+def analyse(content: str, metadata: Optional[Dict[str, Any]], params: Dict[str, Any],
+            defines: Iterable[str] = ()) -> Tuple[Dict[str, Any], Set[str]]:
+    """
+    RF and gradient load of one scan, vectorised over array-valued ``params``.
+
+    Returns (results, missing parameter names). Results hold 'scan_time',
+    'gradient_duty', 'negative_delay' (s, the most negative delay) and per
+    channel 'rf_energy.fN' (J), 'rf_power.fN' (W, average), 'rf_duty.fN',
+    'peak_power.fN' (W) and 'peak_b1.fN' (Hz, where the channel has a
+    reference_pulse calibration).
+    """
+    program = parse(content, defines)
+    evaluator = Evaluator(program, parameter_names(metadata, params), hints(content))
+    references = _references(metadata)
+    state = State({})
+    for index in range(1, 9):
+        channel = f'f{index}'
+        power = references.get(channel, {}).get('power', f'pl{index}')
+        state.power[channel] = (lambda name: lambda: evaluator.value(value_name(name)))(power)
+
+    nodes = program.nodes
+    start, go = scan_bounds(nodes)
+    scan = Scan(program, evaluator)
+    state = scan.run(nodes[:start], state, None)
+    load = Load()
+    scan.run(nodes[start:go + 1], state, load)
+
+    time = load.values.get('time', 0.0)
+    results: Dict[str, Any] = {'scan_time': time,
+                               'gradient_duty': load.values.get('gradient', 0.0) / time,
+                               'negative_delay': load.values.get('peak_negative_delay', 0.0)}
+    for key in sorted(load.values):
+        if not key.startswith('rf_energy.'):
+            continue
+        channel = key.split('.', 1)[1]
+        energy = load.values[key]
+        results[f'rf_energy.{channel}'] = energy
+        results[f'rf_power.{channel}'] = energy / time
+        results[f'rf_duty.{channel}'] = load.values[f'rf_time.{channel}'] / time
+        results[f'peak_power.{channel}'] = peak = load.values[f'peak_power.{channel}']
+        reference = references.get(channel)
+        if reference and 'duration' in reference and 'power' in reference:
+            duration = evaluator.value(reference['duration']) * 1e-6
+            power = evaluator.value(value_name(reference['power']))
+            results[f'peak_b1.{channel}'] = np.sqrt(peak / power) / (4 * duration)
+    return results, evaluator.missing
+
+
+def grid(axes: Dict[str, Sequence[float]]) -> Dict[str, np.ndarray]:
+    """Give each parameter its own axis, so results broadcast to the full grid."""
+    count = len(axes)
+    return {name: np.asarray(values, dtype=float).reshape([-1 if i == j else 1 for j in range(count)])
+            for i, (name, values) in enumerate(axes.items())}
+
+
+def unsafe(results: Dict[str, Any], limits: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """Mask of grid points exceeding any limit; a limit on 'rf_power' applies to every channel."""
+    limits = DEFAULT_LIMITS if limits is None else limits
+    mask = np.zeros(np.broadcast_shapes(*(np.shape(v) for v in results.values())), dtype=bool)
+    for key, value in results.items():
+        limit = limits.get(key, limits.get(key.split('.', 1)[0]))
+        if limit is not None:
+            mask |= np.asarray(value) > limit
+    return mask
+
+
+def parse_value(text: str, target: str = '') -> float:
+    """
+    One number in the parameter's own unit (``target``, see unit()): us for
+    pulses, s for delays, W for powers. A TopSpin time suffix ('200m', '10u',
+    '2s') is converted to ``target``; without a time unit it is an error.
+    """
+    match = _VALUE.match(text)
+    if not match:
+        raise SafetyError(f"not a number: {text.strip()!r}")
+    value, suffix = float(match.group(1)), match.group(2)
+    if not suffix:
+        return value
+    if not target:
+        raise SafetyError(f"cannot convert {text.strip()!r}: a time suffix needs a pulse (us) or delay (s) "
+                          f"parameter; give the value without a suffix in the parameter's unit")
+    return value * _SUFFIX_SECONDS[suffix] / _HINT_SECONDS[target]
+
+
+def parse_values(text: str, target: str = '') -> List[float]:
+    """'0.5', '1,2,5' or 'start:stop:count' (inclusive, evenly spaced); numbers as parse_value."""
+    if text.count(':') == 2:
+        start, stop, count = text.split(':')
+        if not count.strip().isdigit():
+            raise SafetyError(f"the count of {text.strip()!r} must be a whole number")
+        return list(np.linspace(parse_value(start, target), parse_value(stop, target), int(count)))
+    return [parse_value(v, target) for v in text.split(',')]
+
+
+def parse_settings(settings: Sequence[str]) -> Dict[str, List[float]]:
+    """
+    NAME=VALUES options (see parse_values) as a dict of value lists.
+
+    Time suffixes are converted for pulse and delay names (p1, d18); block
+    paths and list variables depend on the sequence, so need plain values.
+    """
+    axes = {}
+    for setting in settings:
+        name, _, values = setting.partition('=')
+        name = name.strip()
+        try:
+            axes[name] = parse_values(values, unit(name, {}) if '.' not in name else '')
+        except SafetyError as e:
+            raise SafetyError(f"--set {setting}: {e}") from None
+    return axes
+
+
+def main(corpus: Optional[Corpus] = None, settings: Sequence[str] = (), defines: Sequence[str] = (),
+         limits: Sequence[str] = ()) -> bool:
+    """Evaluate every selected sequence over the grid given as NAME=VALUES settings."""
+    corpus = corpus or Corpus()
+    limit_values = dict(DEFAULT_LIMITS)
+    try:
+        axes = parse_settings(settings)
+        for setting in limits:
+            name, _, value = setting.partition('=')
+            try:
+                limit_values[name.strip()] = parse_value(value)
+            except SafetyError as e:
+                raise SafetyError(f"--limit {setting}: {e}") from None
+    except SafetyError as e:
+        print(f"✗ {e}")
+        return False
+    params = grid(axes)
+    points = int(np.prod([len(v) for v in axes.values()])) if axes else 1
+
+    print(f"Evaluating RF and gradient load over {points} parameter set(s)...")
+    safe = True
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        try:
+            results, missing = analyse(corpus.source(file_path), metadata, params, defines)
+        except SafetyError as e:
+            print(f"⚠️  {file_path} - {e}")
+            continue
+        if missing:
+            print(f"- {file_path} - needs {', '.join(sorted(missing))}")
+            continue
+        mask = unsafe(results, limit_values)
+        worst = ', '.join(f"{key} {np.max(value):.3g}" for key, value in results.items()
+                          if key.startswith(('rf_power.', 'rf_duty.')) or key == 'gradient_duty')
+        if mask.any():
+            safe = False
+            exceeded = [key for key, value in results.items()
+                        if unsafe({key: value}, limit_values).any()]
+            print(f"✗ {file_path} - {int(mask.sum())} of {mask.size} parameter sets exceed "
+                  f"{', '.join(exceeded)} ({worst})")
+        else:
+            print(f"✓ {file_path} - within limits ({worst})")
+    return safe
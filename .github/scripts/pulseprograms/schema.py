@@ -0,0 +1,93 @@
+"""
+Schema loading and compiled validators.
+"""
+from pathlib import Path
+from typing import Dict, List, Any, Iterator, Optional
+
+from pulseprograms.metadata import load_yaml
+
+FALLBACK_SCHEMA = "v0.0.3.yaml"
+
+
+def schema_path(schema_dir: Path) -> Path:
+    """Return the file behind ``schemas/current``, falling back to the last known version."""
+    current = Path(schema_dir) / "current"
+    if current.exists():
+        return current.resolve()
+    return Path(schema_dir) / FALLBACK_SCHEMA
+
+
+def load_schema(schema_dir: Path) -> Dict[str, Any]:
+    """Load the current schema. Raises FileNotFoundError if there is none."""
+    with open(schema_path(schema_dir), 'r') as f:
+        return load_yaml(f.read())
+
+
+def compile_validator(schema: Dict[str, Any]):
+    """Build a reusable jsonschema validator (checks the schema once, not per file)."""
+    from jsonschema.validators import validator_for
+
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def _def_name(schema: Dict[str, Any], node: Any) -> Optional[str]:
+    """Name of the $defs entry a '$ref' node points at, if any."""
+    if isinstance(node, dict) and isinstance(node.get('$ref'), str):
+        return node['$ref'].rsplit('/', 1)[-1]
+    return None
+
+
+def rule_id(schema: Dict[str, Any], error) -> str:
+    """
+    Stable rule identifier for an error, e.g. 'block_base.pattern'.
+
+    Walks the error's schema path through '$ref's so errors raised inside
+    $defs (linear_sweep, block_base, ...) are attributed to that definition.
+    """
+    defs = schema.get('$defs', {})
+    owner = 'schema'
+    node = schema
+    for part in list(error.absolute_schema_path)[:-1]:
+        name = _def_name(schema, node)
+        if name in defs and not (isinstance(node, dict) and part in node):
+            owner, node = name, defs[name]
+        try:
+            node = node[part]
+        except (KeyError, IndexError, TypeError):
+            break
+    name = _def_name(schema, node)
+    if name in defs:
+        owner = name
+    return f"{owner}.{error.validator}"
+
+
+def iter_leaf_errors(validator, instance) -> Iterator[Any]:
+    """
+    Yield every error in one pass, expanding oneOf/anyOf failures.
+
+    For a failed oneOf/anyOf the branch whose type matched the instance and
+    that has the fewest errors is expanded (recursively), so a bad
+    linear_sweep reports its missing/unexpected keys instead of "not valid
+    under any of the given schemas". If no branch matched the type, the
+    combined error itself is reported.
+    """
+    for error in validator.iter_errors(instance):
+        yield from _expand(error)
+
+
+def _expand(error) -> Iterator[Any]:
+    if error.validator not in ('oneOf', 'anyOf') or not error.context:
+        yield error
+        return
+    branches: Dict[int, List[Any]] = {}
+    for sub in error.context:
+        branches.setdefault(sub.relative_schema_path[0], []).append(sub)
+    candidates = [errors for errors in branches.values()
+                  if not any(e.validator == 'type' and not e.relative_path for e in errors)]
+    if not candidates:
+        yield error
+        return
+    for sub in min(candidates, key=len):
+        yield from _expand(sub)
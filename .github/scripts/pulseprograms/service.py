@@ -0,0 +1,285 @@
+"""
+Catalog service - a small asyncio HTTP/1.1 server over the catalog index.
+
+For acquisition robots and analysis workers that query metadata many times
+a minute. The index (catalog.build_index), a token index for search and
+facet postings are built once and kept in memory; responses carry strong
+ETags and honour If-None-Match. Lookups and sources are rendered when the
+catalog is loaded, so serving them is a dictionary lookup. A background task
+polls the repository HEAD and swaps in a rebuilt catalog, built in a worker
+thread, when it moves; requests in flight finish on the catalog they started
+with.
+
+Endpoints (GET or HEAD):
+
+    /                         head commit, schema version, counts
+    /sequences                name, title, version and status of every sequence
+    /sequences/<name>         full index record, with fingerprint
+    /sequences/<name>/source  the file as text/plain
+    /search?q=...&<facet>=... matching sequences, best first
+    /facets?<facet>=...       value counts, optionally over a filtered set
+
+Facets are FACETS; repeating a facet parameter requires every value.
+Uses only the standard library.
+"""
+import asyncio
+import bisect
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from pulseprograms import gitlog
+from pulseprograms.catalog import build_index
+from pulseprograms.corpus import Corpus
+from pulseprograms.pulseprogram import fingerprint
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+RELOAD_INTERVAL = 2.0
+FACETS = ('experiment_type', 'features', 'typical_nuclei', 'status')
+# Search fields and their weight in the ranking
+SEARCH_FIELDS = {'title': 3, 'file': 3, 'features': 2, 'experiment_type': 2, 'typical_nuclei': 2,
+                 'description': 1, 'authors': 1}
+MAX_CACHED_QUERIES = 1024
+DEFAULT_LIMIT = 50
+
+_WORD = re.compile(r'[a-z0-9]+')
+_STATUS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed'}
+
+
+def words(value: Any) -> Set[str]:
+    if isinstance(value, list):
+        return set().union(*(words(v) for v in value)) if value else set()
+    return set(_WORD.findall(str(value).lower())) if value is not None else set()
+
+
+def _values(value: Any) -> List[str]:
+    if value is None:
+        return []
+    return [str(v) for v in value] if isinstance(value, list) else [str(value)]
+
+
+class Response:
+    def __init__(self, status: int, body: bytes, content_type: str = 'application/json'):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"' if status == 200 else None
+
+
+def _json(data: Any, status: int = 200) -> Response:
+    return Response(status, json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8'))
+
+
+def _error(status: int, message: str) -> Response:
+    return _json({'error': message}, status)
+
+
+class Catalog:
+    """One immutable snapshot of the repository, with prerendered lookups."""
+
+    def __init__(self, head: Optional[str], index: Dict[str, Any], sources: Dict[str, str]):
+        self.head = head
+        self.index = index
+        self.sequences = index['sequences']
+        self.names = sorted(self.sequences)
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.facets: Dict[str, Dict[str, Set[str]]] = {field: {} for field in FACETS}
+        for name, record in self.sequences.items():
+            metadata = record['metadata']
+            for field, weight in SEARCH_FIELDS.items():
+                value = name if field == 'file' else metadata.get(field)
+                for word in words(value):
+                    scores = self.postings.setdefault(word, {})
+                    scores[name] = max(scores.get(name, 0), weight)
+            for field in FACETS:
+                for value in _values(metadata.get(field)):
+                    self.facets[field].setdefault(value, set()).add(name)
+        self.vocabulary = sorted(self.postings)
+
+        self.responses: Dict[str, Response] = {
+            '/': _json({'head': head, 'schema_version': index.get('schema_version'),
+                        'sequences': len(self.names), 'facets': list(FACETS)}),
+            '/sequences': _json({'sequences': [self.summary(name) for name in self.names]}),
+        }
+        for name in self.names:
+            record = dict(self.sequences[name], name=name, fingerprint=fingerprint(sources[name]))
+            self.responses[f'/sequences/{name}'] = _json(record)
+            self.responses[f'/sequences/{name}/source'] = Response(
+                200, sources[name].encode('utf-8'), 'text/plain; charset=utf-8')
+        self.queries: Dict[str, Response] = {}
+
+    @classmethod
+    def load(cls, root: str) -> 'Catalog':
+        corpus = Corpus(root)
+        head = gitlog.head(corpus.root)
+        index = build_index(corpus)
+        sources = {name: corpus.source(Path(record['file'])) for name, record in index['sequences'].items()}
+        return cls(head, index, sources)
+
+    def summary(self, name: str) -> Dict[str, Any]:
+        metadata = self.sequences[name]['metadata']
+        return {'name': name, 'title': metadata.get('title'), 'version': metadata.get('sequence_version'),
+                'status': metadata.get('status')}
+
+    def _matches(self, word: str) -> Dict[str, int]:
+        """Sequences with a word starting with ``word``, and their best field weight."""
+        scores: Dict[str, int] = {}
+        start = bisect.bisect_left(self.vocabulary, word)
+        for candidate in self.vocabulary[start:]:
+            if not candidate.startswith(word):
+                break
+            for name, weight in self.postings[candidate].items():
+                # an exact word outranks a prefix match in the same field
+                score = weight * 2 if candidate == word else weight
+                scores[name] = max(scores.get(name, 0), score)
+        return scores
+
+    def select(self, query: str, filters: Dict[str, List[str]]) -> Tuple[List[str], Dict[str, int]]:
+        """Names matching every query word and facet filter, with their scores."""
+        names: Set[str] = set(self.names)
+        for field, values in filters.items():
+            for value in values:
+                names &= self.facets[field].get(value, set())
+        scores = {name: 0 for name in names}
+        for word in words(query):
+            matches = self._matches(word)
+            scores = {name: score + matches[name] for name, score in scores.items() if name in matches}
+        return sorted(scores, key=lambda n: (-scores[n], n)), scores
+
+    def search(self, params: Dict[str, List[str]]) -> Response:
+        query = ' '.join(params.get('q', []))
+        limit = int(params.get('limit', [DEFAULT_LIMIT])[0])
+        names, scores = self.select(query, {f: params[f] for f in FACETS if f in params})
+        return _json({'query': query, 'count': len(names),
+                      'results': [dict(self.summary(n), score=scores[n]) for n in names[:limit]]})
+
+    def facet_counts(self, params: Dict[str, List[str]]) -> Response:
+        names, _ = self.select(' '.join(params.get('q', [])), {f: params[f] for f in FACETS if f in params})
+        selected = set(names)
+        counts = {field: {value: len(members & selected)
+                          for value, members in sorted(values.items()) if members & selected}
+                  for field, values in self.facets.items()}
+        return _json({'count': len(selected), 'facets': counts})
+
+    def respond(self, target: str) -> Response:
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip('/') or '/'
+        if path in self.responses:
+            return self.responses[path]
+        if path not in ('/search', '/facets'):
+            return _error(404, f"no such resource: {path}")
+        key = f'{path}?{url.query}'
+        response = self.queries.get(key)
+        if response is None:
+            params = parse_qs(url.query)
+            try:
+                response = self.search(params) if path == '/search' else self.facet_counts(params)
+            except ValueError as e:
+                return _error(400, str(e))
+            if len(self.queries) >= MAX_CACHED_QUERIES:
+                self.queries.clear()
+            self.queries[key] = response
+        return response
+
+
+class Service:
+    """Serves the current Catalog and replaces it when the repository HEAD moves."""
+
+    def __init__(self, root: str, reload_interval: float = RELOAD_INTERVAL):
+        self.root = root
+        self.reload_interval = reload_interval
+        self.catalog = Catalog.load(root)
+
+    async def reload(self) -> bool:
+        """Rebuild the catalog if HEAD has moved; returns True when it was replaced."""
+        head = await asyncio.to_thread(gitlog.head, Path(self.root))
+        if head is None or head == self.catalog.head:
+            return False
+        self.catalog = await asyncio.to_thread(Catalog.load, self.root)
+        print(f"Reloaded catalog at {head[:8]}: {len(self.catalog.names)} sequences")
+        return True
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload()
+            except Exception as e:  # keep serving the previous catalog
+                print(f"✗ Reload failed: {e}")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await reader.readline()
+                if not request.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get('content-length', '0').isdigit() and int(headers.get('content-length', '0')):
+                    await reader.readexactly(int(headers['content-length']))
+
+                parts = request.decode('latin-1').split()
+                version = parts[2] if len(parts) == 3 else 'HTTP/1.0'
+                if len(parts) != 3:
+                    response = _error(400, "malformed request line")
+                elif parts[0] not in ('GET', 'HEAD'):
+                    response = _error(405, f"{parts[0]} is not supported")
+                else:
+                    response = self.catalog.respond(parts[1])
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or (version == 'HTTP/1.1' and connection != 'close')
+                writer.write(self.render(response, headers.get('if-none-match'),
+                                         len(parts) == 3 and parts[0] == 'HEAD', keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def render(response: Response, if_none_match: Optional[str], head_only: bool, keep_alive: bool) -> bytes:
+        status, body = response.status, response.body
+        if response.etag and if_none_match and (
+                if_none_match.strip() == '*' or response.etag in [t.strip() for t in if_none_match.split(',')]):
+            status, body = 304, b''
+        lines = [f"HTTP/1.1 {status} {_STATUS[status]}",
+                 f"Content-Type: {response.content_type}",
+                 f"Content-Length: {len(body) if status != 304 else 0}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}",
+                 "Cache-Control: no-cache"]
+        if response.etag:
+            lines.append(f"ETag: {response.etag}")
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        return head if head_only or status == 304 else head + body
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle, host, port)
+        watcher = asyncio.create_task(self.watch())
+        print(f"Serving {len(self.catalog.names)} sequences on http://{host}:{port}/ (Ctrl-C to stop)")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            watcher.cancel()
+
+
+def main(corpus: Optional[Corpus] = None, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+         reload_interval: float = RELOAD_INTERVAL):
+    corpus = corpus or Corpus()
+    service = Service(str(corpus.root), reload_interval)
+    try:
+        asyncio.run(service.serve(host, port))
+    except KeyboardInterrupt:
+        pass
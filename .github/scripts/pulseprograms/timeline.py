@@ -0,0 +1,408 @@
+"""
+Event timeline of one scan, with loops kept run-length encoded.
+
+The statement tree from pulseprogram.parse() is evaluated for one set of
+parameter values (see safety.Evaluator) into a Block of entries: a Step per
+statement (its pulses, gradients and acquisition, plus the cw/cpd
+irradiation running through it) or a Repeat of a nested Block for every
+'lo to' loop. A CPMG train of ncyc = 10000 echoes is one Repeat of a
+three-step Block rather than 30000 steps, so a timeline is as large as its
+pulse program, whatever the loop counts.
+
+Entries of a Block do not overlap and are sorted by start time, so the
+state at any time offset is found by bisection at each loop level (O(log n)
+per level), and a time window is listed without unrolling the loops around
+it. Phases are those of one scan of the phase cycle; 'ipp' increments and
+list variable '.inc' steps within the scan are not followed.
+
+Requires numpy (``pip install -e .[analysis]``).
+"""
+import bisect
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.phases import PhaseCycle
+from pulseprograms.pulseprogram import Conditional, Program, Relation, Statement, parse
+from pulseprograms.safety import (Evaluator, SafetyError, hints, parameter_names, parse_settings,
+                                  scan_bounds, value_name)
+
+DEFAULT_OUTPUT = "docs-generated/docs/timelines"
+OBSERVE_CHANNEL = 'f1'
+
+
+class TimelineError(Exception):
+    pass
+
+
+def _round(seconds: float) -> float:
+    # to 0.1 ns: hides float noise from summing delays and keeps exports short
+    return round(seconds, 10)
+
+
+class Event:
+    """A pulse, gradient or acquisition; ``start`` is relative to its Step."""
+
+    def __init__(self, start: float, duration: float, kind: str, channel: Optional[str], name: str,
+                 power: Optional[float] = None, phase: Optional[float] = None):
+        self.start = start
+        self.duration = duration
+        self.kind = kind
+        self.channel = channel
+        self.name = name
+        self.power = power
+        self.phase = phase
+
+    def as_list(self) -> List[Any]:
+        return [_round(self.start), _round(self.duration), self.kind, self.channel, self.name,
+                self.power, self.phase]
+
+    def __repr__(self):
+        return f"Event({self.start:g}+{self.duration:g}, {self.kind}, {self.channel}, {self.name})"
+
+
+class Step:
+    """
+    One statement of the scan. ``continuous`` maps channels under cw/cpd
+    irradiation to its power (W) for the whole step.
+    """
+
+    def __init__(self, start: float, duration: float, line: int, events: List[Event],
+                 continuous: Dict[str, float]):
+        self.start = start
+        self.duration = duration
+        self.line = line
+        self.events = events
+        self.continuous = continuous
+
+    def count(self) -> int:
+        return len(self.events) + len(self.continuous)
+
+    def export(self) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {'t': _round(self.start), 'd': _round(self.duration), 'line': self.line}
+        if self.events:
+            entry['events'] = [event.as_list() for event in self.events]
+        if self.continuous:
+            entry['continuous'] = self.continuous
+        return entry
+
+
+class Repeat:
+    """``block`` run ``times`` times back to back from ``start``."""
+
+    def __init__(self, start: float, block: 'Block', times: int, line: int):
+        self.start = start
+        self.block = block
+        self.times = times
+        self.line = line
+
+    @property
+    def duration(self) -> float:
+        return self.block.duration * self.times
+
+    def count(self) -> int:
+        return self.block.count() * self.times
+
+    def export(self) -> Dict[str, Any]:
+        return {'t': _round(self.start), 'd': _round(self.duration), 'line': self.line, 'times': self.times,
+                'body': self.block.export()}
+
+
+Entry = Union[Step, Repeat]
+
+
+class Block:
+    """Non-overlapping entries sorted by start time, relative to the start of the block."""
+
+    def __init__(self, entries: List[Entry]):
+        self.entries = entries
+        self.starts = [entry.start for entry in entries]
+        self.duration = entries[-1].start + entries[-1].duration if entries else 0.0
+
+    def count(self) -> int:
+        """Events (and continuous irradiation spans) in the unrolled block."""
+        return sum(entry.count() for entry in self.entries)
+
+    def size(self) -> int:
+        """Entries actually stored, at every level."""
+        return sum(1 + (entry.block.size() if isinstance(entry, Repeat) else 0) for entry in self.entries)
+
+    def locate(self, offset: float) -> Tuple[Optional[Step], float, List[Tuple[int, int]]]:
+        """
+        The Step running at ``offset``, the time since that step started, and
+        the (line, iteration) of every enclosing loop, outermost first.
+        """
+        iterations = []
+        block = self
+        while True:
+            index = bisect.bisect_right(block.starts, offset) - 1
+            if index < 0:
+                return None, 0.0, iterations
+            entry = block.entries[index]
+            offset -= entry.start
+            if offset >= entry.duration:
+                return None, 0.0, iterations
+            if isinstance(entry, Step):
+                return entry, offset, iterations
+            iteration = min(int(offset // entry.block.duration), entry.times - 1)
+            iterations.append((entry.line, iteration))
+            offset -= iteration * entry.block.duration
+            block = entry.block
+
+    def window(self, start: float, stop: float, origin: float = 0.0) -> Iterator[Tuple[float, Step]]:
+        """(absolute start, Step) for every step overlapping [start, stop), in time order."""
+        index = max(0, bisect.bisect_right(self.starts, start - origin) - 1)
+        for entry in self.entries[index:]:
+            begin = origin + entry.start
+            if begin >= stop:
+                break
+            if begin + entry.duration <= start:
+                continue
+            if isinstance(entry, Step):
+                yield begin, entry
+                continue
+            period = entry.block.duration
+            first = max(0, int((start - begin) // period)) if period > 0 else 0
+            for iteration in range(first, entry.times):
+                if begin + iteration * period >= stop:
+                    break
+                yield from entry.block.window(start, stop, begin + iteration * period)
+                if period <= 0:
+                    break
+
+    def export(self) -> List[Dict[str, Any]]:
+        return [entry.export() for entry in self.entries]
+
+
+class Timeline:
+    """The event timeline of one scan."""
+
+    def __init__(self, block: Block, scan: int, receiver: Optional[str]):
+        self.block = block
+        self.scan = scan
+        self.receiver = receiver
+
+    @property
+    def duration(self) -> float:
+        return self.block.duration
+
+    def at(self, time: float) -> Optional[Dict[str, Any]]:
+        """What is happening ``time`` seconds into the scan, or None outside it."""
+        step, offset, iterations = self.block.locate(time)
+        if step is None:
+            return None
+        return {
+            'time': time,
+            'line': step.line,
+            'step_offset': offset,
+            'loops': [{'line': line, 'iteration': iteration} for line, iteration in iterations],
+            'events': [event.as_list() for event in step.events
+                       if event.start <= offset < event.start + event.duration],
+            'continuous': dict(step.continuous),
+        }
+
+    def window(self, start: float, stop: float) -> Iterator[Tuple[float, Step]]:
+        return self.block.window(start, stop)
+
+    def export(self) -> Dict[str, Any]:
+        """Compact, JSON-serialisable form; loops stay run-length encoded."""
+        return {
+            'scan': self.scan,
+            'duration': self.duration,
+            'events': self.block.count(),
+            'receiver': self.receiver,
+            'fields': ['start', 'duration', 'kind', 'channel', 'name', 'power', 'phase'],
+            'timeline': self.block.export(),
+        }
+
+
+def _scalar(value: Any, what: str, line: int) -> float:
+    value = np.asarray(value, dtype=float)
+    if value.ndim:
+        raise TimelineError(f"line {line}: {what} takes several values; give one value per parameter")
+    return float(value)
+
+
+class Builder:
+    """Evaluates the statements of one scan into Blocks."""
+
+    def __init__(self, program: Program, evaluator: Evaluator, phases: Dict[str, float]):
+        self.program = program
+        self.evaluator = evaluator
+        self.phases = phases
+        self.power: Dict[str, str] = {f'f{index}': f'pl{index}' for index in range(1, 9)}
+        self.continuous: Dict[str, str] = {}
+        self.receiver: Optional[str] = None
+
+    def run(self, nodes: Sequence[Any], entries: Optional[List[Entry]], labels: Dict[str, int],
+            now: float) -> float:
+        """Append the steps of ``nodes`` to ``entries`` from time ``now``; with None only switch state."""
+        for node in nodes:
+            if isinstance(node, Relation):
+                self.evaluator.assign(node)
+            elif isinstance(node, Conditional):
+                condition = self.evaluator.evaluate(node.condition, '')
+                if np.asarray(condition).ndim:
+                    raise TimelineError(f"line {node.line}: condition takes several values")
+                branch = node.then if bool(condition) else node.otherwise
+                now = self.run(branch, entries, labels, now)
+            elif isinstance(node, Statement):
+                now = self.statement(node, entries, labels, now)
+        return now
+
+    def _value(self, name: str) -> float:
+        return float(self.evaluator.value(value_name(name)))
+
+    def _duration(self, expression: str, line: int) -> float:
+        duration = _scalar(self.evaluator.evaluate(expression, 's'), expression, line)
+        if duration < 0:
+            raise TimelineError(f"line {line}: {expression} is negative ({duration:.3g} s)")
+        return duration
+
+    def statement(self, statement: Statement, entries: Optional[List[Entry]], labels: Dict[str, int],
+                  now: float) -> float:
+        for action, channel, argument in statement.actions:
+            if action == 'power':
+                self.power[channel] = argument
+            elif action in ('cw', 'cpd'):
+                self.continuous[channel] = self.power[channel]
+            elif action == 'do':
+                self.continuous.pop(channel, None)
+        if entries is None:
+            return now
+
+        if statement.label is not None:
+            labels[statement.label] = len(entries)
+        events = []
+        durations = []
+        for group in statement.groups:
+            elapsed = 0.0
+            for element in group:
+                duration = self._duration(element.duration, statement.line)
+                if element.kind == 'rf':
+                    power = self._value(element.power or self.power[element.channel])
+                    events.append(Event(elapsed, duration, 'rf', element.channel, element.duration,
+                                        power, self.phases.get(element.phase)))
+                elif element.kind == 'gradient':
+                    strength = self._value('gpz' + element.power[2:])
+                    if element.scale:
+                        strength *= float(self.evaluator.evaluate('1' + element.scale, ''))
+                    events.append(Event(elapsed, duration, 'gradient', None,
+                                        element.duration, strength))
+                elapsed += duration
+            durations.append(elapsed)
+        if statement.go is not None:
+            duration = self._duration('aq', statement.line)
+            self.receiver = statement.receiver
+            events.append(Event(0.0, duration, 'acquire', OBSERVE_CHANNEL, 'aq', None,
+                                self.phases.get(statement.receiver)))
+            durations.append(duration)
+        elif statement.duration is not None:
+            durations.append(self._duration(statement.duration, statement.line))
+        if durations:
+            continuous = {channel: self._value(name) for channel, name in self.continuous.items()}
+            entries.append(Step(now, max(durations), statement.line, events, continuous))
+            now += max(durations)
+
+        if statement.loop:
+            label, count = statement.loop
+            if label not in labels:
+                raise TimelineError(f"line {statement.line}: 'lo to {label}' does not close a loop "
+                                    f"at this level")
+            times = _scalar(self.evaluator.evaluate(count, ''), count, statement.line)
+            if math.isnan(times):
+                return now
+            index = labels[label]
+            body = entries[index:]
+            if body:
+                start = body[0].start
+                for entry in body:
+                    entry.start -= start
+                repeat = Repeat(start, Block(body), max(1, int(round(times))), statement.line)
+                entries[index:] = [repeat]
+                now = start + repeat.duration
+            for name in [name for name, position in labels.items() if position > index]:
+                del labels[name]
+        return now
+
+
+def build(content: str, metadata: Optional[Dict[str, Any]], params: Dict[str, Any],
+          defines: Iterable[str] = (), scan: int = 0) -> Tuple[Optional[Timeline], Set[str]]:
+    """
+    Timeline of scan number ``scan`` (which selects the phases) for scalar ``params``.
+
+    Returns (timeline, missing parameter names); the timeline is None when
+    parameters are missing.
+    """
+    program = parse(content, defines)
+    evaluator = Evaluator(program, parameter_names(metadata, params), hints(content))
+    cycle = PhaseCycle.scan(content)
+    phases = {name: float(values[scan % len(values)]) for name, values in cycle.table().items()}
+    builder = Builder(program, evaluator, phases)
+    for channel, reference in ((r['channel'], r) for r in (metadata or {}).get('reference_pulse') or []
+                               if isinstance(r, dict) and 'channel' in r and 'power' in r):
+        builder.power[channel] = reference['power']
+
+    start, go = scan_bounds(program.nodes)
+    builder.run(program.nodes[:start], None, {}, 0.0)
+    entries: List[Entry] = []
+    builder.run(program.nodes[start:go + 1], entries, {}, 0.0)
+    if evaluator.missing:
+        return None, evaluator.missing
+    return Timeline(Block(entries), scan, builder.receiver), set()
+
+
+def main(corpus: Optional[Corpus] = None, settings: Sequence[str] = (), defines: Sequence[str] = (),
+         output: Optional[str] = None, at: Optional[float] = None, scan: int = 0) -> bool:
+    """Build the timeline of every selected sequence; optionally export it and query one time."""
+    corpus = corpus or Corpus()
+    params = {}
+    try:
+        axes = parse_settings(settings)
+    except SafetyError as e:
+        print(f"✗ {e}")
+        return False
+    for name, values in axes.items():
+        if len(values) != 1:
+            print(f"✗ {name}: a timeline takes one value per parameter, not {len(values)}")
+            return False
+        params[name] = values[0]
+
+    print(f"Building scan timelines (scan {scan + 1} of the phase cycle)...")
+    failed = 0
+    for file_path in corpus.sequence_files():
+        try:
+            timeline, missing = build(corpus.source(file_path), corpus.metadata(file_path),
+                                      params, defines, scan)
+        except (SafetyError, TimelineError) as e:
+            failed += 1
+            print(f"✗ {file_path} - {e}")
+            continue
+        if timeline is None:
+            print(f"- {file_path} - needs {', '.join(sorted(missing))}")
+            continue
+        print(f"✓ {file_path} - {timeline.duration:.6g} s, {timeline.block.count()} events "
+              f"in {timeline.block.size()} entries")
+        if at is not None:
+            state = timeline.at(at)
+            if state is None:
+                print(f"    {at:g} s is outside the scan")
+            else:
+                loops = ''.join(f", loop at line {loop['line']} pass {loop['iteration'] + 1}"
+                                for loop in state['loops'])
+                print(f"    {at:g} s: line {state['line']}{loops}")
+                for event in state['events']:
+                    print(f"      {event[2]} {event[4]} on {event[3] or 'gradient'}"
+                          + (f", phase {event[6]:g}" if event[6] is not None else ""))
+                for channel, power in state['continuous'].items():
+                    print(f"      continuous on {channel} at {power:g} W")
+        if output:
+            path = Path(output) / f"{Path(file_path).stem}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(timeline.export(), f, separators=(',', ':'))
+    return failed == 0
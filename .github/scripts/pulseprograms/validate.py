@@ -0,0 +1,348 @@
+"""
+Sequence validation - YAML syntax, schema compliance and naming conventions.
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+
+import yaml
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.crossref import block_fields, check_references, check_source
+from pulseprograms.lint import check_lint, check_source as lint_source
+from pulseprograms.metadata import compose, extract_annotation, file_range, locator
+from pulseprograms.report import Report, finding
+from pulseprograms.rules import check_metadata
+from pulseprograms.schema import iter_leaf_errors, rule_id
+
+# Allow letters, numbers, underscores, dots, and hyphens
+FILENAME_PATTERN = re.compile(r'^[a-zA-Z0-9_.-]+$')
+
+
+def format_path(path: Sequence[Any]) -> str:
+    """Render a jsonschema instance path as 'cest.power' / 'reference_pulse[0]'."""
+    text = ''
+    for part in path:
+        text += f'[{part}]' if isinstance(part, int) else (f'.{part}' if text else str(part))
+    return text
+
+
+def syntax_findings(corpus: Corpus, file_path: Path) -> List[Dict[str, Any]]:
+    """YAML syntax problems of a file, positioned at the parser's mark."""
+    if file_path not in corpus.errors:
+        return []
+    annotation = extract_annotation(corpus.source(file_path))
+    line = column = None
+    try:
+        compose([text for _, _, text in annotation])
+    except yaml.MarkedYAMLError as e:
+        mark = e.problem_mark or e.context_mark
+        if mark is not None:
+            line, column, _, _ = file_range(annotation, (mark.line, mark.column, mark.line, mark.column))
+    except yaml.YAMLError:
+        pass
+    return [finding(file_path, f"YAML syntax error: {corpus.errors[file_path]}", 'yaml.syntax',
+                    line=line, column=column)]
+
+
+def schema_findings(corpus: Corpus, file_path: Path,
+                    metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Every schema error of a file in a single validation pass.
+
+    oneOf branches are expanded (see schema.iter_leaf_errors) and each error
+    is positioned on the ';@' line of the offending value.
+    """
+    errors = list(iter_leaf_errors(corpus.validator, metadata))
+    if not errors:
+        return []
+    position = locator(corpus.source(file_path))
+    findings = []
+    for error in errors:
+        line, column, end_line, end_column = position(error.absolute_path)
+        path = format_path(error.absolute_path)
+        message = f"{path}: {error.message}" if path else error.message
+        findings.append(finding(file_path, message, rule_id(corpus.schema, error),
+                                line=line, column=column,
+                                end_line=end_line, end_column=end_column, path=path))
+    findings.sort(key=lambda f: (f['line'], f['column']))
+    return findings
+
+
+def consistency_findings(corpus: Corpus, file_path: Path,
+                         metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Cross-field problems (dimensions vs acquisition_order, blocks, 1d/2d/3d)."""
+    problems = check_metadata(corpus.rules, metadata)
+    if not problems:
+        return []
+    position = locator(corpus.source(file_path))
+    findings = []
+    for rule, path, message in problems:
+        line, column, end_line, end_column = position(path)
+        findings.append(finding(file_path, f"{format_path(path)}: {message}", rule,
+                                line=line, column=column, end_line=end_line,
+                                end_column=end_column, path=format_path(path)))
+    return findings
+
+
+def vocabulary_findings(corpus: Corpus, file_path: Path,
+                        metadata: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Terms of controlled fields that are not in VOCABULARY.md, with "did you mean".
+
+    Fields whose terms the schema already enumerates only get a finding when
+    there is a suggestion; the schema error covers the rest.
+    """
+    vocabulary = corpus.vocabulary
+    position = None
+    findings = []
+    for field in vocabulary.terms:
+        if field not in metadata:
+            continue
+        enforced = 'enum' in corpus.schema.get('properties', {}).get(field, {}).get('items', {})
+        for index, value, suggestion in vocabulary.check(field, metadata[field]):
+            if enforced and suggestion is None:
+                continue
+            if position is None:
+                position = locator(corpus.source(file_path))
+            path = [field, index] if isinstance(metadata[field], list) else [field]
+            line, column, end_line, end_column = position(path)
+            if not isinstance(value, str):
+                message = f"{format_path(path)}: {value!r} is not a term (expected a word from VOCABULARY.md)"
+            elif suggestion is not None:
+                message = f"{format_path(path)}: {value!r} is not in VOCABULARY.md; did you mean {suggestion!r}?"
+            else:
+                message = (f"{format_path(path)}: {value!r} is not in VOCABULARY.md "
+                           f"(propose new terms there if widely applicable)")
+            findings.append(finding(file_path, message, 'vocabulary.unknown_term', level='warning',
+                                    line=line, column=column, end_line=end_line,
+                                    end_column=end_column, path=format_path(path)))
+    return findings
+
+
+def naming_findings(file_path: Path) -> List[Dict[str, Any]]:
+    if FILENAME_PATTERN.match(file_path.name):
+        return []
+    return [finding(file_path, "Invalid filename (should contain only letters, numbers, "
+                               "underscores, dots, and hyphens)", 'naming.filename')]
+
+
+def check_file(corpus: Corpus, file_path: Path) -> List[Dict[str, Any]]:
+    """Run every check on a single file and return its findings."""
+    findings = naming_findings(file_path)
+    metadata = corpus.metadata(file_path)
+    if file_path in corpus.errors:
+        findings += syntax_findings(corpus, file_path)
+    elif metadata is None:
+        findings.append(finding(file_path, "No metadata found", 'metadata.missing', level='warning'))
+    else:
+        findings += schema_findings(corpus, file_path, metadata)
+        findings += consistency_findings(corpus, file_path, metadata)
+        findings += vocabulary_findings(corpus, file_path, metadata)
+        blocks, descriptive = block_fields(corpus.schema)
+        findings += check_source(str(file_path), corpus.source(file_path), metadata, blocks, descriptive)
+    findings += lint_source(str(file_path), corpus.source(file_path))
+    return findings
+
+
+def describe(f: Dict[str, Any]) -> str:
+    """One-line text for a finding, prefixed with its line number."""
+    return f"line {f['line']}: {f['message']}" if f['line'] else f['message']
+
+
+def validate_file(corpus: Corpus, file_path: Path) -> List[str]:
+    """Run every check on a single file and return its problems (empty if valid)."""
+    problems = []
+    for f in check_file(corpus, file_path):
+        if f['level'] == 'note':
+            continue
+        if f['level'] == 'warning':
+            problems.append(f"Warning: {describe(f)}")
+        elif f['rule'].startswith(('yaml.', 'naming.')):
+            problems.append(describe(f))
+        else:
+            problems.append(f"Invalid: {describe(f)}")
+    return problems
+
+
+def validate_yaml_syntax(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Validate YAML syntax in all sequence files."""
+    print("Validating YAML syntax in sequence files...")
+
+    error_count = 0
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        if file_path in corpus.errors:
+            findings = syntax_findings(corpus, file_path)
+            line = findings[0]['line']
+            where = f'{file_path}:{line}' if line else f'{file_path}'
+            print(f'YAML syntax error in {where}: {corpus.errors[file_path]}')
+            error_count += 1
+        elif metadata is None:
+            findings = [finding(file_path, "No metadata found", 'metadata.missing', level='warning')]
+            print(f"Warning: No metadata found in {file_path}")
+        else:
+            findings = []
+            print(f"✓ {file_path} - Valid YAML syntax")
+        if report is not None:
+            report.extend(file_path, findings)
+
+    if error_count > 0:
+        print(f"YAML syntax validation failed: {error_count} files have errors")
+        return False
+
+    print("All YAML syntax validation passed!")
+    return True
+
+
+def validate_against_schema(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Validate all sequence files against the schema, reporting every error."""
+    print("Validating sequences against schema...")
+
+    try:
+        corpus.validator  # compile once up front; raises if no schema exists
+    except FileNotFoundError:
+        print("Error: No schema file found")
+        return False
+
+    error_count = 0
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+
+        if file_path in corpus.errors:
+            error_count += 1
+            continue
+        elif metadata is None:
+            print(f'Warning: No metadata found in {file_path}')
+            continue
+
+        findings = schema_findings(corpus, file_path, metadata)
+        if report is not None:
+            report.extend(file_path, findings)
+        if not findings:
+            print(f'✓ {file_path} - Valid')
+        else:
+            print(f'✗ {file_path} - Invalid ({len(findings)} errors):')
+            for f in findings:
+                print(f'    {describe(f)}')
+            error_count += 1
+
+    if error_count > 0:
+        print(f'\nValidation failed: {error_count} files have errors')
+        return False
+    else:
+        print('\nAll sequences validated successfully!')
+        return True
+
+
+def check_consistency(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Check dimensions, acquisition_order and experiment_type agree with each other."""
+    print("Checking cross-field consistency...")
+
+    try:
+        corpus.rules  # compile once up front; raises if no schema exists
+    except FileNotFoundError:
+        print("Error: No schema file found")
+        return False
+
+    error_count = 0
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        if metadata is None:
+            continue
+        findings = consistency_findings(corpus, file_path, metadata)
+        if report is not None:
+            report.extend(file_path, findings)
+        if findings:
+            print(f'✗ {file_path} - Inconsistent:')
+            for f in findings:
+                print(f'    {describe(f)}')
+            error_count += 1
+
+    if error_count > 0:
+        print(f'Consistency check failed: {error_count} files have errors')
+        return False
+
+    print("All cross-field checks passed!")
+    return True
+
+
+def check_vocabulary(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Warn about experiment_type/features terms missing from VOCABULARY.md."""
+    print("Checking terms against VOCABULARY.md...")
+
+    warning_count = 0
+    for file_path in corpus.sequence_files():
+        metadata = corpus.metadata(file_path)
+        if metadata is None:
+            continue
+        findings = vocabulary_findings(corpus, file_path, metadata)
+        if report is not None:
+            report.extend(file_path, findings)
+        for f in findings:
+            print(f"⚠️ {file_path}:{f['line']}: {f['message']}")
+            warning_count += 1
+
+    if warning_count > 0:
+        print(f"Vocabulary check: {warning_count} terms not in VOCABULARY.md")
+    else:
+        print("All terms are in the controlled vocabulary!")
+    # Vocabulary findings are advisory and never fail validation
+    return True
+
+
+def check_naming_conventions(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Check file naming conventions."""
+    print("Checking file naming conventions...")
+
+    error_count = 0
+    for file_path in corpus.sequence_files():
+        if report is not None:
+            report.extend(file_path, naming_findings(file_path))
+        if not FILENAME_PATTERN.match(file_path.name):
+            print(f"❌ Invalid filename: {file_path} (should contain only letters, numbers, underscores, dots, and hyphens)")
+            error_count += 1
+        else:
+            print(f"✓ {file_path} - Valid filename")
+
+    if error_count > 0:
+        print(f"Naming convention check failed: {error_count} files have invalid names")
+        return False
+
+    print("All filename checks passed!")
+    return True
+
+
+def run(corpus: Corpus, report: Optional[Report] = None) -> bool:
+    """Run all validation checks, adding their findings to ``report`` if given."""
+    success = True
+
+    # Run YAML syntax validation
+    if not validate_yaml_syntax(corpus, report):
+        success = False
+
+    # Run schema validation
+    if not validate_against_schema(corpus, report):
+        success = False
+
+    # Run cross-field consistency checks
+    if not check_consistency(corpus, report):
+        success = False
+
+    # Check controlled vocabulary (warnings only)
+    check_vocabulary(corpus, report)
+
+    # Cross-reference annotation parameters with the pulse program (warnings only)
+    check_references(corpus, report)
+
+    # Static checks of the pulse program bodies (only broken #ifdef blocks and labels fail)
+    if not check_lint(corpus, report):
+        success = False
+
+    # Run naming convention checks
+    if not check_naming_conventions(corpus, report):
+        success = False
+
+    if success:
+        print("\n🎉 All validation checks passed!")
+    return success
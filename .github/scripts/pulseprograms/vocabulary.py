@@ -0,0 +1,218 @@
+"""
+Controlled vocabulary for ``experiment_type`` and ``features``, read from VOCABULARY.md.
+
+VocabularyIndex compiles the prose into frozensets for membership tests and
+a BK-tree per field for "did you mean" suggestions, so checking a large
+corpus costs one set lookup per known term and a bounded tree search per
+unknown one.
+"""
+import json
+import re
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+# VOCABULARY.md section heading -> metadata field it documents
+SECTIONS = {
+    'Experiment Types': 'experiment_type',
+    'Features': 'features',
+}
+
+DEFAULT_OUTPUT = "docs-generated/docs/vocabulary.json"
+
+_TERM = re.compile(r'`([^`]+)`')
+_SEPARATORS = re.compile(r'[\s\-./]+')
+
+
+def parse_vocabulary(text: str) -> Dict[str, Dict[str, str]]:
+    """
+    Map each field to {term: description}.
+
+    Terms are the backticked words of a bullet line; the description is the
+    text after ' - ', or the enclosing ### heading when there is none.
+    """
+    vocabulary = {field: {} for field in SECTIONS.values()}
+    field = None
+    heading = ''
+    for line in text.split('\n'):
+        if line.startswith('## '):
+            title = line[3:].strip()
+            field = next((f for name, f in SECTIONS.items() if title.startswith(name)), None)
+            heading = ''
+        elif line.startswith('### '):
+            heading = line[4:].strip()
+        elif field and line.lstrip().startswith('- '):
+            item = line.lstrip()[2:]
+            terms_part, _, description = item.partition(' - ')
+            for term in _TERM.findall(terms_part):
+                vocabulary[field][term] = description.strip() or heading
+    return vocabulary
+
+
+def load_vocabulary(root: Path = Path(".")) -> Dict[str, Dict[str, str]]:
+    """Load VOCABULARY.md from the repository root (empty if missing)."""
+    path = Path(root) / "VOCABULARY.md"
+    if not path.exists():
+        return {field: {} for field in SECTIONS.values()}
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_vocabulary(f.read())
+
+
+def normalize(term: str) -> str:
+    """Spelling-insensitive key: lower case with '-', '.', '/' and spaces as '_'."""
+    return _SEPARATORS.sub('_', term.strip()).lower()
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Damerau-Levenshtein distance: adjacent transpositions count as one edit
+    ('cpgm' -> 'cpmg'), and unlike the restricted variant the transposed
+    characters may be edited further, so it is a metric as BKTree requires.
+    """
+    far = len(a) + len(b)
+    # Offset by one row and column holding ``far``, so a transposition never reaches before the start
+    table = [[far] * (len(b) + 2)] + [[far, i] + [0] * len(b) for i in range(len(a) + 1)]
+    table[1][1:] = range(len(b) + 1)
+    last_row: Dict[str, int] = {}  # character -> last row of ``a`` it occurred in
+    for i, ca in enumerate(a, 1):
+        last_column = 0  # last column of ``b`` matching ``ca`` in this row
+        for j, cb in enumerate(b, 1):
+            k, l = last_row.get(cb, 0), last_column
+            if ca == cb:
+                cost, last_column = 0, j
+            else:
+                cost = 1
+            table[i + 1][j + 1] = min(table[i][j] + cost, table[i + 1][j] + 1, table[i][j + 1] + 1,
+                                      table[k][l] + (i - k - 1) + 1 + (j - l - 1))
+        last_row[ca] = i
+    return table[-1][-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree over edit distance for nearest-term lookups."""
+
+    def __init__(self, terms: Iterable[str] = ()):
+        # Each node is [term, {distance: child node}]
+        self.root: Optional[list] = None
+        for term in terms:
+            self.add(term)
+
+    def add(self, term: str):
+        if self.root is None:
+            self.root = [term, {}]
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(term, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = [term, {}]
+                return
+            node = child
+
+    def search(self, term: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        All (distance, term) within ``max_distance``, closest first.
+
+        The exact distance to every visited node decides which children can
+        hold a match (triangle inequality).
+        """
+        matches = []
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            distance = edit_distance(term, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[0]))
+            for d, child in node[1].items():
+                if distance - max_distance <= d <= distance + max_distance:
+                    stack.append(child)
+        return sorted(matches)
+
+
+class VocabularyIndex:
+    """Compiled controlled vocabulary: membership, spelling variants and suggestions."""
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, str]]):
+        self.descriptions = vocabulary
+        self.terms: Dict[str, frozenset] = {field: frozenset(terms) for field, terms in vocabulary.items()}
+        # normalized spelling -> canonical term, e.g. 'states_tppi' for 'States-TPPI'
+        self.variants: Dict[str, Dict[str, str]] = {
+            field: {normalize(term): term for term in terms} for field, terms in vocabulary.items()
+        }
+        self._trees: Dict[str, BKTree] = {}
+        self._suggestions: Dict[Tuple[str, str], Optional[str]] = {}
+
+    @classmethod
+    def load(cls, root: Path = Path(".")) -> 'VocabularyIndex':
+        return cls(load_vocabulary(root))
+
+    def __contains__(self, item: Tuple[str, str]) -> bool:
+        field, term = item
+        return term in self.terms.get(field, ())
+
+    def controls(self, field: str) -> bool:
+        """Whether ``field`` has a controlled vocabulary."""
+        return bool(self.terms.get(field))
+
+    def suggest(self, field: str, term: str) -> Optional[str]:
+        """
+        Closest controlled term for an unknown one, or None.
+
+        Spelling variants (case, '-' vs '_') map directly; otherwise the
+        nearest term within an edit distance of about a quarter of its length.
+        Values that are not strings (e.g. a nested mapping) are not terms and
+        get no suggestion.
+        """
+        if not isinstance(term, str):
+            return None
+        key = (field, term)
+        if key not in self._suggestions:
+            self._suggestions[key] = self._suggest(field, term)
+        return self._suggestions[key]
+
+    def _suggest(self, field: str, term: str) -> Optional[str]:
+        if not self.controls(field):
+            return None
+        normalized = normalize(term)
+        variants = self.variants[field]
+        if normalized in variants:
+            return variants[normalized]
+        tree = self._trees.get(field)
+        if tree is None:
+            tree = self._trees[field] = BKTree(variants)
+        matches = tree.search(normalized, max(1, len(normalized) // 4))
+        return variants[matches[0][1]] if matches else None
+
+    def check(self, field: str, values: Any) -> List[Tuple[int, Any, Optional[str]]]:
+        """(position, value, suggestion) for each value of ``field`` not in the vocabulary."""
+        if not self.controls(field):
+            return []
+        if not isinstance(values, list):
+            values = [values]
+        known = self.terms[field]
+        return [(i, value, self.suggest(field, value))
+                for i, value in enumerate(values)
+                if not (isinstance(value, str) and value in known)]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Machine-readable form of VOCABULARY.md."""
+        return {
+            field: {
+                'terms': {term: description for term, description in sorted(terms.items())},
+                'variants': dict(sorted(self.variants[field].items())),
+            }
+            for field, terms in self.descriptions.items()
+        }
+
+
+def main(corpus, output: str = DEFAULT_OUTPUT):
+    """Write the compiled vocabulary as JSON."""
+    index = corpus.vocabulary
+    output_file = Path(output)
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(index.to_json(), f, indent=2)
+    total = sum(len(terms) for terms in index.terms.values())
+    print(f"Compiled {total} vocabulary terms: {output_file}")
@@ -0,0 +1,209 @@
+"""
+Watch mode - revalidate sequences as they are saved.
+
+The corpus stays loaded between runs, so the schema is compiled once and only
+changed files are re-read and re-parsed. Linux uses inotify (through ctypes,
+no extra dependency); elsewhere directories are polled for mtime changes. A
+change under schemas/ drops all cached state and revalidates everything.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from pulseprograms.corpus import Corpus
+from pulseprograms.validate import validate_file
+
+# Collect follow-up events for this long so one save triggers one run
+DEBOUNCE = 0.02
+
+_IN_ATTRIB = 0x004
+_IN_CLOSE_WRITE = 0x008
+_IN_MOVED_FROM = 0x040
+_IN_MOVED_TO = 0x080
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+            | _IN_DELETE | _IN_ATTRIB)
+_EVENT = struct.Struct('iIII')
+
+
+class PollingWatcher:
+    """Detects changed files by comparing directory mtimes snapshots."""
+
+    def __init__(self, directories: List[Path], interval: float = 0.2):
+        self.directories = directories
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        snapshot = {}
+        for directory in self.directories:
+            if not directory.exists():
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    snapshot[Path(directory) / entry.name] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def wait(self) -> Set[Path]:
+        """Block until something changes and return the changed paths."""
+        while True:
+            time.sleep(self.interval)
+            snapshot = self._scan()
+            changed = {path for path in snapshot.keys() | self._snapshot.keys()
+                       if snapshot.get(path) != self._snapshot.get(path)}
+            self._snapshot = snapshot
+            if changed:
+                return changed
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify watcher on a set of directories."""
+
+    def __init__(self, directories: List[Path]):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._fd = libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init failed")
+        self._dirs = {}
+        for directory in directories:
+            if not directory.exists():
+                continue
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), _IN_MASK)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+            self._dirs[wd] = Path(directory)
+
+    def _read(self) -> Set[Path]:
+        data = os.read(self._fd, 64 * 1024)
+        changed = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if wd in self._dirs and name:
+                changed.add(self._dirs[wd] / os.fsdecode(name))
+        return changed
+
+    def wait(self) -> Set[Path]:
+        """Block until something changes and return the changed paths."""
+        select.select([self._fd], [], [])
+        changed = self._read()
+        while select.select([self._fd], [], [], DEBOUNCE)[0]:
+            changed |= self._read()
+        return changed
+
+    def close(self):
+        os.close(self._fd)
+
+
+def make_watcher(directories: List[Path], poll: bool = False):
+    """inotify where available, otherwise mtime polling."""
+    if not poll and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(directories)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directories)
+
+
+def _is_sequence(path: Path) -> bool:
+    # Skip README and editor temporaries (swap files, backups, dotfiles)
+    name = path.name
+    return not (name == 'README.md' or name.startswith('.') or name.endswith(('~', '.swp', '.swx', '.tmp')))
+
+
+def revalidate(corpus: Corpus, files: List[Path]) -> int:
+    """Validate ``files`` and print the results. Returns the number of failing files."""
+    failures = 0
+    for file_path in files:
+        if not file_path.exists():
+            print(f"- {file_path} - removed")
+            continue
+        problems = validate_file(corpus, file_path)
+        errors = [p for p in problems if not p.startswith('Warning')]
+        if errors:
+            failures += 1
+            print(f"✗ {file_path}")
+        else:
+            print(f"✓ {file_path} - Valid")
+        for problem in problems:
+            print(f"    {problem}")
+    return failures
+
+
+def run(corpus: Corpus, poll: bool = False, once: Optional[int] = None):
+    """
+    Watch sequences/ and schemas/ and revalidate changes until interrupted.
+
+    ``once`` stops after that many change batches (used for scripting).
+    """
+    sequences_dir = corpus.sequences_dir.resolve()
+    schema_dir = corpus.schema_dir.resolve()
+    watcher = make_watcher([sequences_dir, schema_dir], poll=poll)
+    kind = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"Watching {corpus.sequences_dir}/ and {corpus.schema_dir}/ ({kind}), Ctrl-C to stop")
+
+    # Warm the caches so the first edit only pays for itself
+    corpus.validator
+    known = set(corpus.sequence_files())
+    for file_path in known:
+        corpus.metadata(file_path)
+
+    batches = 0
+    try:
+        while once is None or batches < once:
+            changed = watcher.wait()
+            batches += 1
+            start = time.perf_counter()
+
+            if any(path.parent == schema_dir for path in changed):
+                print("\nSchema changed - revalidating all sequences")
+                corpus.invalidate()
+                try:
+                    corpus.validator
+                except Exception as e:
+                    print(f"✗ Schema could not be loaded: {e}")
+                    continue
+                files = corpus.sequence_files()
+            else:
+                files = []
+                for path in sorted(changed):
+                    if path.parent != sequences_dir or not _is_sequence(path):
+                        continue
+                    # Corpus paths are relative to the root, as in batch mode
+                    file_path = corpus.sequences_dir / path.name
+                    # Ignore short-lived temporaries that came and went
+                    if not file_path.exists() and file_path not in known:
+                        continue
+                    corpus.invalidate(file_path)
+                    files.append(file_path)
+                if not files:
+                    continue
+                print()
+
+            known = set(corpus.sequence_files())
+            failures = revalidate(corpus, files)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"[{time.strftime('%H:%M:%S')}] {len(files)} file(s), "
+                  f"{failures} with errors, {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()